@@ -20,6 +20,7 @@ from .BECMessage import (
     LogMessage,
 )
 from .endpoints import MessageEndpoints
+from .frame_buffer import FrameReader, FrameUnavailableError
 from .logger import bec_logger
 from .redis_connector import RedisProducer
 
@@ -194,18 +195,20 @@ class Device:
         val = self.parent.producer.get(MessageEndpoints.device_read(self.name))
         if not val:
             return None
+        signals = self.parent.resolve_frames(DeviceMessage.loads(val).content["signals"])
         if filter_readback:
-            return DeviceMessage.loads(val).content["signals"].get(self.name)
-        return DeviceMessage.loads(val).content["signals"]
+            return signals.get(self.name)
+        return signals
 
     def readback(self, filter_readback=True):
         """get the last readback value from a device"""
         val = self.parent.producer.get(MessageEndpoints.device_readback(self.name))
         if not val:
             return None
+        signals = self.parent.resolve_frames(DeviceMessage.loads(val).content["signals"])
         if filter_readback:
-            return DeviceMessage.loads(val).content["signals"].get(self.name)
-        return DeviceMessage.loads(val).content["signals"]
+            return signals.get(self.name)
+        return signals
 
     @property
     def device_status(self):
@@ -222,7 +225,7 @@ class Device:
         val = self.parent.producer.get(MessageEndpoints.device_read(self.name))
         if val is None:
             return None
-        self._signals = DeviceMessage.loads(val).content["signals"]
+        self._signals = self.parent.resolve_frames(DeviceMessage.loads(val).content["signals"])
         return self._signals
 
     @property
@@ -545,6 +548,25 @@ class DeviceManagerBase:
         self.connector = connector
         self.config_helper = ConfigHelper(self.connector)
         self._status_cb = status_cb if isinstance(status_cb, list) else [status_cb]
+        self.frame_reader = FrameReader()
+
+    def resolve_frames(self, signals: dict) -> dict:
+        """
+        Replace the frame descriptors of a device reading by the frames of the shared frame
+        buffers. Frames that are not available, e.g. because they were written on another
+        host, keep their descriptor.
+
+        Args:
+            signals (dict): Device reading as signal -> {value, timestamp}
+
+        Returns:
+            dict: Device reading with the frame data
+        """
+        try:
+            return self.frame_reader.resolve(signals)
+        except FrameUnavailableError as exc:
+            logger.warning(f"Failed to read the frames of a device reading: {exc}")
+            return signals
 
     def initialize(self, bootstrap_server) -> None:
         """
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import glob
+import os
+import socket
+import tempfile
+import threading
+import uuid
+
+import numpy as np
+
+FRAME_KEY = "bec_frame"
+_HEADER_SIZE = 64
+
+
+class FrameUnavailableError(Exception):
+    """The frame of a descriptor cannot be read, e.g. because it has been overwritten."""
+
+
+def default_frame_directory() -> str:
+    """Get the default directory of the frame buffers, i.e. /dev/shm if available."""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "bec_frames")
+
+
+class FrameRingBuffer:
+    def __init__(self, name: str, directory: str = None, num_slots: int = 16) -> None:
+        """
+        Ring buffer of frames in a memory-mapped file. Consumers on the same host can map
+        the file and read the frames that are referenced by the descriptors returned by
+        write.
+
+        Each slot consists of a header with the sequence number of the frame and the frame
+        data. The sequence number is reset while a frame is written, so that readers can
+        detect frames that have been overwritten in the meantime. A new file is created
+        whenever the shape or dtype of the frames changes. The file name contains the ID of
+        the process that owns the buffer, see remove_stale_buffers.
+
+        Args:
+            name (str): Name of the buffer, e.g. <device>.<signal>
+            directory (str, optional): Directory of the buffer files. Defaults to
+                /dev/shm/bec_frames.
+            num_slots (int, optional): Number of frames in the buffer. Defaults to 16.
+        """
+        self.name = name
+        self.directory = directory or default_frame_directory()
+        self.num_slots = num_slots
+        self.host = socket.gethostname()
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._path = None
+        self._mmap = None
+        self._layout = None
+        self._slot_size = 0
+
+    def _allocate(self, shape: tuple, dtype: np.dtype) -> None:
+        self.close()
+        os.makedirs(self.directory, exist_ok=True)
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        # keep the frames aligned to the header size
+        self._slot_size = _HEADER_SIZE + -(-nbytes // _HEADER_SIZE) * _HEADER_SIZE
+        self._path = os.path.join(
+            self.directory, f"{self.name}_{os.getpid()}_{uuid.uuid4().hex[:8]}.frames"
+        )
+        self._mmap = np.memmap(
+            self._path, dtype=np.uint8, mode="w+", shape=(self.num_slots * self._slot_size,)
+        )
+        self._layout = (shape, dtype)
+
+    def write(self, frame: np.ndarray) -> dict:
+        """
+        Write a frame to the next slot of the buffer.
+
+        Args:
+            frame (np.ndarray): Frame data
+
+        Returns:
+            dict: Frame descriptor
+        """
+        frame = np.ascontiguousarray(frame)
+        with self._lock:
+            if self._layout != (frame.shape, frame.dtype):
+                self._allocate(frame.shape, frame.dtype)
+            self._sequence += 1
+            slot = self._sequence % self.num_slots
+            offset = slot * self._slot_size
+            header = self._mmap[offset : offset + 8].view(np.int64)
+            header[0] = 0
+            self._mmap[
+                offset + _HEADER_SIZE : offset + _HEADER_SIZE + frame.nbytes
+            ] = frame.reshape(-1).view(np.uint8)
+            header[0] = self._sequence
+            return {
+                FRAME_KEY: {
+                    "host": self.host,
+                    "path": self._path,
+                    "offset": offset,
+                    "sequence": self._sequence,
+                    "shape": list(frame.shape),
+                    "dtype": frame.dtype.str,
+                }
+            }
+
+    def close(self) -> None:
+        """Close and remove the buffer file. Readers that have mapped it keep their mapping."""
+        if self._mmap is None:
+            return
+        del self._mmap
+        self._mmap = None
+        self._layout = None
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
+
+
+class FrameReader:
+    """
+    Read frames from the frame buffers of the local host.
+
+    The buffer files are mapped on first use. Mappings of files that have been removed by
+    the device server are released whenever a new file is mapped; clear releases all
+    mappings, e.g. at the end of a scan.
+    """
+
+    def __init__(self) -> None:
+        self.host = socket.gethostname()
+        self._lock = threading.Lock()
+        self._maps = {}
+
+    def _get_map(self, path: str) -> np.memmap:
+        with self._lock:
+            mmap = self._maps.get(path)
+            if mmap is None:
+                # buffers are reallocated under a new name, so a new path means that
+                # previous buffers may have been removed
+                for stale in [name for name in self._maps if not os.path.exists(name)]:
+                    del self._maps[stale]
+                try:
+                    mmap = self._maps[path] = np.memmap(path, dtype=np.uint8, mode="r")
+                except FileNotFoundError as exc:
+                    raise FrameUnavailableError(f"Frame buffer {path} does not exist.") from exc
+            return mmap
+
+    def clear(self) -> None:
+        """Release all mapped frame buffers."""
+        with self._lock:
+            self._maps.clear()
+
+    def read(self, descriptor: dict, copy: bool = True) -> np.ndarray:
+        """
+        Read the frame of a descriptor.
+
+        Args:
+            descriptor (dict): Frame descriptor as returned by FrameRingBuffer.write
+            copy (bool, optional): Return a copy of the frame. If False, a read-only view on
+                the buffer is returned, which is only valid until the slot is overwritten.
+                Defaults to True.
+
+        Returns:
+            np.ndarray: Frame data
+
+        Raises:
+            FrameUnavailableError: If the frame is not available on this host or has been
+                overwritten.
+        """
+        desc = descriptor[FRAME_KEY]
+        if desc["host"] != self.host:
+            raise FrameUnavailableError(f"Frame buffer is located on host {desc['host']}.")
+        mmap = self._get_map(desc["path"])
+        offset = desc["offset"]
+        header = mmap[offset : offset + 8].view(np.int64)
+        dtype = np.dtype(desc["dtype"])
+        count = int(np.prod(desc["shape"], dtype=np.int64))
+        start = offset + _HEADER_SIZE
+        if header[0] != desc["sequence"]:
+            raise FrameUnavailableError("Frame has been overwritten.")
+        frame = mmap[start : start + count * dtype.itemsize].view(dtype).reshape(desc["shape"])
+        if not copy:
+            return frame
+        frame = np.array(frame)
+        if header[0] != desc["sequence"]:
+            raise FrameUnavailableError("Frame has been overwritten while it was read.")
+        return frame
+
+    def resolve(self, signals: dict) -> dict:
+        """
+        Replace the frame descriptors of a device reading by the frames.
+
+        Args:
+            signals (dict): Device reading as signal -> {value, timestamp}
+
+        Returns:
+            dict: Device reading with the frame data
+
+        Raises:
+            FrameUnavailableError: If a frame is not available. All other frames are
+                resolved nonetheless; the signals of unavailable frames keep their descriptor.
+        """
+        errors = []
+        for signal_name, signal in signals.items():
+            if not isinstance(signal, dict) or not is_frame_descriptor(signal.get("value")):
+                continue
+            try:
+                signal["value"] = self.read(signal["value"])
+            except FrameUnavailableError as exc:
+                errors.append(f"{signal_name}: {exc}")
+        if errors:
+            raise FrameUnavailableError(f"Failed to read frames of signals {', '.join(errors)}")
+        return signals
+
+
+def remove_stale_buffers(directory: str = None) -> list:
+    """
+    Remove the buffer files of processes that are not running anymore, e.g. buffers left
+    behind by a device server that was killed.
+
+    Args:
+        directory (str, optional): Directory of the buffer files. Defaults to
+            /dev/shm/bec_frames.
+
+    Returns:
+        list: Paths of the removed files
+    """
+    removed = []
+    for path in glob.glob(os.path.join(directory or default_frame_directory(), "*.frames")):
+        try:
+            pid = int(os.path.basename(path).rsplit("_", 2)[-2])
+        except (IndexError, ValueError):
+            continue
+        if _is_process_running(pid):
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        removed.append(path)
+    return removed
+
+
+def _is_process_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # the process exists but belongs to another user
+        return True
+    return True
+
+
+def is_frame_descriptor(value) -> bool:
+    """Check if a value is a frame descriptor."""
+    return isinstance(value, dict) and len(value) == 1 and FRAME_KEY in value
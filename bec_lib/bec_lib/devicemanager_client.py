@@ -257,7 +257,7 @@ class DeviceBase(RPCBase, Device):
 
         if not val:
             return None
-        signals = BECMessage.DeviceMessage.loads(val).content["signals"]
+        signals = self.parent.resolve_frames(BECMessage.DeviceMessage.loads(val).content["signals"])
         if filter_signal and signals.get(self.name):
             return signals.get(self.name)
         return signals
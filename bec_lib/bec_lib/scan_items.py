@@ -9,6 +9,7 @@ from collections import defaultdict, deque
 from typing import TYPE_CHECKING, Optional
 
 from bec_lib.core import BECMessage, bec_logger, threadlocked
+from bec_lib.core.frame_buffer import FrameReader, FrameUnavailableError
 
 if TYPE_CHECKING:
     from bec_lib.scan_manager import ScanManager
@@ -124,6 +125,7 @@ class ScanStorage:
         self.scan_manager = scan_manager
         self.storage = deque(maxlen=maxlen)
         self.last_scan_number = init_scan_number
+        self.frame_reader = FrameReader()
         self._lock = threading.RLock()
 
     @property
@@ -214,6 +216,7 @@ class ScanStorage:
         logger.info(
             f"Received scan segment {scan_msg.content['point_id']} for scan {scan_msg.metadata['scanID']}: "
         )
+        self._resolve_frames(scan_msg)
         while True:
             with self._lock:
                 for scan_item in self.storage:
@@ -223,6 +226,17 @@ class ScanStorage:
                         return
             time.sleep(0.01)
 
+    def _resolve_frames(self, scan_msg: BECMessage.ScanMessage) -> None:
+        # frames that the device server has written to shared frame buffers are only
+        # available on its host; elsewhere, the frame descriptors are kept
+        for dev, signals in scan_msg.content["data"].items():
+            if not isinstance(signals, dict):
+                continue
+            try:
+                self.frame_reader.resolve(signals)
+            except FrameUnavailableError as exc:
+                logger.warning(f"Failed to read the frames of device {dev}: {exc}")
+
     @threadlocked
     def add_scan_item(self, queueID: str, scan_number: list, scanID: list, status: str):
         """append new scan item to scan storage"""
@@ -1,7 +1,10 @@
 from unittest import mock
 
+import numpy as np
 import pytest
+from bec_lib.core import BECMessage
 from bec_lib.core.devicemanager import DeviceManagerBase
+from bec_lib.core.frame_buffer import FrameRingBuffer
 from bec_lib.core.tests.utils import ConnectorMock
 
 
@@ -96,3 +99,22 @@ def test_device_update_user_parameter(device_config, val, raised_error):
         else:
             with pytest.raises(raised_error):
                 obj.update_user_parameter(val)
+
+
+def test_device_read_resolves_frames(device_config, tmp_path):
+    connector = ConnectorMock("")
+    dm = DeviceManagerBase(connector)
+    dm.producer = mock.MagicMock()
+    obj = dm._create_device(device_config, ())
+    frame_buffer = FrameRingBuffer("eiger.image", directory=str(tmp_path))
+    frame = np.arange(6.0).reshape(2, 3)
+    msg = BECMessage.DeviceMessage(
+        signals={"eiger": {"value": frame_buffer.write(frame), "timestamp": 1}}, metadata={}
+    )
+    dm.producer.get.return_value = msg.dumps()
+    try:
+        assert np.array_equal(obj.read(cached=False)["value"], frame)
+        assert np.array_equal(obj.readback()["value"], frame)
+        assert np.array_equal(obj.signals["eiger"]["value"], frame)
+    finally:
+        frame_buffer.close()
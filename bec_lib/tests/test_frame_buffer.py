@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from bec_lib.core import BECMessage
+from bec_lib.core.frame_buffer import (
+    FrameReader,
+    FrameRingBuffer,
+    FrameUnavailableError,
+    is_frame_descriptor,
+    remove_stale_buffers,
+)
+
+
+@pytest.fixture
+def frame_buffer(tmp_path):
+    frame_buffer = FrameRingBuffer("eiger.image", directory=str(tmp_path), num_slots=4)
+    yield frame_buffer
+    frame_buffer.close()
+
+
+def test_frame_buffer_write_and_read(frame_buffer):
+    frame = np.arange(100, dtype=np.uint16).reshape(10, 10)
+    descriptor = frame_buffer.write(frame)
+    assert is_frame_descriptor(descriptor)
+    out = FrameReader().read(descriptor)
+    assert np.array_equal(out, frame)
+    assert out.dtype == np.uint16
+
+
+def test_frame_buffer_descriptor_is_serializable(frame_buffer):
+    descriptor = frame_buffer.write(np.zeros((4, 4)))
+    msg = BECMessage.DeviceMessage(signals={"image": {"value": descriptor}}, metadata={})
+    out = BECMessage.DeviceMessage.loads(msg.dumps())
+    assert FrameReader().read(out.content["signals"]["image"]["value"]).shape == (4, 4)
+
+
+def test_frame_buffer_overwritten_frame(frame_buffer):
+    reader = FrameReader()
+    descriptors = [frame_buffer.write(np.full((8, 8), ii)) for ii in range(5)]
+    with pytest.raises(FrameUnavailableError):
+        reader.read(descriptors[0])
+    for ii, descriptor in enumerate(descriptors[1:], start=1):
+        assert np.all(reader.read(descriptor) == ii)
+
+
+def test_frame_buffer_shape_change(frame_buffer):
+    reader = FrameReader()
+    first = frame_buffer.write(np.ones((4, 4)))
+    second = frame_buffer.write(np.ones((8, 2), dtype=np.int32))
+    assert first["bec_frame"]["path"] != second["bec_frame"]["path"]
+    assert reader.read(second).shape == (8, 2)
+
+
+def test_frame_reader_other_host(frame_buffer):
+    descriptor = frame_buffer.write(np.ones(10))
+    descriptor["bec_frame"]["host"] = "other_host"
+    with pytest.raises(FrameUnavailableError):
+        FrameReader().read(descriptor)
+
+
+def test_frame_reader_resolve(frame_buffer):
+    frame = np.ones((3, 3))
+    signals = {
+        "image": {"value": frame_buffer.write(frame), "timestamp": 1},
+        "counts": {"value": 5, "timestamp": 1},
+    }
+    lost = {"bec_frame": {**signals["image"]["value"]["bec_frame"], "path": "/does/not/exist"}}
+    signals["lost"] = {"value": lost, "timestamp": 1}
+    with pytest.raises(FrameUnavailableError):
+        FrameReader().resolve(signals)
+    assert np.array_equal(signals["image"]["value"], frame)
+    assert signals["counts"]["value"] == 5
+    assert signals["lost"]["value"] is lost
+
+
+def test_frame_reader_releases_removed_buffers(frame_buffer):
+    reader = FrameReader()
+    first = frame_buffer.write(np.ones((4, 4)))
+    reader.read(first)
+    # the buffer is reallocated and the previous file is removed
+    second = frame_buffer.write(np.ones((8, 2)))
+    reader.read(second)
+    assert list(reader._maps) == [second["bec_frame"]["path"]]
+    reader.clear()
+    assert not reader._maps
+
+
+def test_remove_stale_buffers(tmp_path):
+    frame_buffer = FrameRingBuffer("eiger.image", directory=str(tmp_path))
+    descriptor = frame_buffer.write(np.ones(4))
+    stale = tmp_path / "eiger.image_999999999_0123abcd.frames"
+    stale.write_bytes(b"")
+    other = tmp_path / "unrelated.frames"
+    other.write_bytes(b"")
+    assert remove_stale_buffers(str(tmp_path)) == [str(stale)]
+    assert not stale.exists()
+    assert other.exists()
+    # the buffer of the running process is kept
+    assert np.array_equal(FrameReader().read(descriptor), np.ones(4))
+    frame_buffer.close()
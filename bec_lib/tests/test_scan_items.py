@@ -3,8 +3,10 @@ import sys
 import time
 from unittest import mock
 
+import numpy as np
 import pytest
 from bec_lib.core import BECMessage, MessageEndpoints
+from bec_lib.core.frame_buffer import FrameRingBuffer, is_frame_descriptor
 from bec_lib.core.tests.utils import ConnectorMock
 from bec_lib.queue_items import QueueItem
 from bec_lib.scan_items import ScanItem
@@ -387,3 +389,28 @@ def test_add_scan_segment_emits_data():
     scan_manager.scan_storage.add_scan_segment(msg)
     scan_item.emit_data.assert_called_once_with(msg)
     assert scan_item.data == {0: msg}
+
+
+def test_add_scan_segment_resolves_frames(tmp_path):
+    scan_manager = ScanManager(ConnectorMock(""))
+    scan_item = mock.MagicMock()
+    scan_item.scanID = "scanID"
+    scan_item.data = {}
+    scan_manager.scan_storage.storage.append(scan_item)
+    frame_buffer = FrameRingBuffer("eiger.image", directory=str(tmp_path))
+    remote = frame_buffer.write(np.zeros(4))
+    remote["bec_frame"]["host"] = "other_host"
+    data = {
+        "eiger": {
+            "eiger_image": {"value": frame_buffer.write(np.ones(4)), "timestamp": 1},
+            "eiger_remote": {"value": remote, "timestamp": 1},
+        }
+    }
+    msg = BECMessage.ScanMessage(
+        point_id=0, scanID="scanID", data=data, metadata={"scanID": "scanID"}
+    )
+    scan_manager.scan_storage.add_scan_segment(msg)
+    frame_buffer.close()
+    signals = scan_item.data[0].content["data"]["eiger"]
+    assert np.array_equal(signals["eiger_image"]["value"], np.ones(4))
+    assert is_frame_descriptor(signals["eiger_remote"]["value"])
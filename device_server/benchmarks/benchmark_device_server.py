@@ -0,0 +1,470 @@
+"""
+Benchmark for the device server.
+
+The benchmark starts a device server in a separate process with simulated devices
+(ophyd.sim motors and detectors and ophyd_devices flyers) and replays a synthetic
+instruction stream similar to the one of a step scan: the devices are staged, every point
+sets the motors, triggers the detectors and reads all devices, the flyers are kicked off
+and completed and finally all devices are unstaged. The replay starts once the device server responds to
+a read of all devices. Each instruction is sent to the device server the same way the scan
+worker does and the benchmark waits for the response of the device server before the next
+group of instructions is sent. It reports the latency of each action, the number of
+instructions per second, the CPU and memory usage of the device server process and,
+separately, the CPU usage of the benchmark process. As all devices are simulated, the
+results quantify the overhead of the device server.
+
+Examples:
+    Start a private redis-server and run 1000 points with 2 motors and 10 detectors:
+    >>> python benchmark_device_server.py --start-redis --motors 2 --detectors 10 --points 1000
+
+    Compare device server settings, e.g. the number of read workers:
+    >>> python benchmark_device_server.py --start-redis --config '{"read_workers": 1}'
+
+    Only replay read instructions of 50 detectors:
+    >>> python benchmark_device_server.py --start-redis --detectors 50 --actions read
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import shutil
+import socket
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import msgpack
+import numpy as np
+import psutil
+import yaml
+from bec_lib.core import BECMessage, MessageEndpoints, RedisConnector, bec_logger
+
+logger = bec_logger.logger
+
+ACTIONS = ["stage", "set", "trigger", "read", "kickoff", "complete", "unstage"]
+
+
+def get_free_port() -> int:
+    """Get a free TCP port on localhost."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def start_redis_server(port: int) -> subprocess.Popen:
+    """Start a redis-server without persistence on the given port."""
+    executable = shutil.which("redis-server")
+    if executable is None:
+        raise RuntimeError("Could not find redis-server. Please install redis or use --redis.")
+    proc = subprocess.Popen(
+        [executable, "--port", str(port), "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            with socket.create_connection(("localhost", port), timeout=0.1):
+                return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError(f"redis-server did not start on port {port}.")
+
+
+def _device_config(name: str, device_class: str, group: str, device_config: dict) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "accessGroups": "customer",
+        "name": name,
+        "sessionId": "benchmark",
+        "enabled": True,
+        "enabled_set": True,
+        "acquisitionConfig": {
+            "acquisitionGroup": group,
+            "readoutPriority": "monitored",
+            "schedule": "sync",
+        },
+        "deviceClass": device_class,
+        "deviceConfig": {"name": name, **device_config},
+        "deviceTags": ["benchmark"],
+        "onFailure": "retry",
+    }
+
+
+def create_device_config(num_motors: int, num_detectors: int, num_flyers: int) -> list:
+    """Create a device config with simulated motors, detectors and flyers."""
+    devices = [_device_config(f"motor{ii}", "SynAxis", "motor", {}) for ii in range(num_motors)]
+    devices.extend(
+        _device_config(f"det{ii}", "DetWithCountTime", "detector", {})
+        for ii in range(num_detectors)
+    )
+    devices.extend(
+        _device_config(f"flyer{ii}", "SynFlyer", "flyer", {"speed": 100, "update_frequency": 400})
+        for ii in range(num_flyers)
+    )
+    return devices
+
+
+class Instruction:
+    """Device instruction together with the check for the response of the device server."""
+
+    def __init__(self, action: str, devices: list, parameter: dict, metadata: dict) -> None:
+        self.action = action
+        self.devices = devices
+        self.msg = BECMessage.DeviceInstructionMessage(
+            device=devices if len(devices) > 1 else devices[0],
+            action=action,
+            parameter=parameter,
+            metadata=metadata,
+        )
+        self.sent = None
+        self.pending = set(devices)
+
+    def response_endpoint(self, dev: str) -> str:
+        """Endpoint that holds the response of the device server for a device."""
+        if self.action == "read":
+            return MessageEndpoints.device_read(dev)
+        if self.action in ["stage", "unstage"]:
+            return MessageEndpoints.device_staged(dev)
+        if self.action == "kickoff":
+            return MessageEndpoints.device_status(dev)
+        return MessageEndpoints.device_req_status(dev)
+
+    def load_response(self, response: bytes):
+        """Load the response message of the device server."""
+        if self.action == "read":
+            return BECMessage.DeviceMessage.loads(response)
+        if self.action in ["stage", "unstage", "kickoff"]:
+            return BECMessage.DeviceStatusMessage.loads(response)
+        return BECMessage.DeviceReqStatusMessage.loads(response)
+
+    def is_done(self, msg) -> bool:
+        """Check if a response belongs to the instruction."""
+        if msg is None or msg.metadata.get("DIID") != self.msg.metadata["DIID"]:
+            return False
+        if self.action == "stage":
+            return msg.content["status"] == 1
+        if self.action in ["unstage", "kickoff"]:
+            return msg.content["status"] == 0
+        return True
+
+
+class InstructionStatistics:
+    """Collect the latencies of the instructions."""
+
+    def __init__(self) -> None:
+        self.latencies = {}
+        self.instructions = 0
+        self.timeouts = 0
+
+    def add(self, instr: Instruction, latency: float) -> None:
+        self.latencies.setdefault(instr.action, []).append(latency)
+        self.instructions += 1
+
+    def summary(self) -> dict:
+        results = {}
+        for action, latencies in self.latencies.items():
+            latencies = np.asarray(latencies) * 1e3
+            results[f"{action}_count"] = int(latencies.size)
+            results[f"{action}_latency_ms_mean"] = float(np.mean(latencies))
+            results[f"{action}_latency_ms_p50"] = float(np.percentile(latencies, 50))
+            results[f"{action}_latency_ms_p95"] = float(np.percentile(latencies, 95))
+            results[f"{action}_latency_ms_max"] = float(np.max(latencies))
+        return results
+
+
+class MemorySampler(threading.Thread):
+    """Sample the RSS of a process in the background."""
+
+    def __init__(self, process: psutil.Process, interval: float = 0.05) -> None:
+        super().__init__(daemon=True, name="memory_sampler")
+        self.process = process
+        self.interval = interval
+        self.peak_rss = self.process.memory_info().rss
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+            except psutil.NoSuchProcess:
+                return
+            time.sleep(self.interval)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class InstructionReplay:
+    """Send groups of device instructions and wait for the responses of the device server."""
+
+    def __init__(
+        self,
+        producer,
+        stats: InstructionStatistics | None,
+        timeout: float,
+        poll_interval: float = 0.001,
+    ) -> None:
+        self.producer = producer
+        self.stats = stats
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.scanID = str(uuid.uuid4())
+        self.RID = str(uuid.uuid4())
+        self._DIID = itertools.count()
+
+    def create(self, action: str, devices: list, parameter: dict = None) -> Instruction:
+        """Create an instruction with a new DIID."""
+        metadata = {
+            "stream": "primary",
+            "DIID": next(self._DIID),
+            "RID": self.RID,
+            "scanID": self.scanID,
+        }
+        return Instruction(action, devices, parameter or {}, metadata)
+
+    def run(self, instructions: list) -> bool:
+        """
+        Send instructions and wait until all of them have been handled. Latencies and
+        timeouts are only recorded if the replay has statistics.
+
+        Returns:
+            bool: True if all instructions have been handled within the timeout
+        """
+        pipe = self.producer.pipeline()
+        for instr in instructions:
+            self.producer.send(MessageEndpoints.device_instructions(), instr.msg.dumps(), pipe)
+        sent = time.time()
+        pipe.execute()
+        for instr in instructions:
+            instr.sent = sent
+        pending = list(instructions)
+        while pending:
+            if time.time() - sent > self.timeout:
+                if self.stats is not None:
+                    logger.warning(
+                        f"Timeout while waiting for {[instr.action for instr in pending]}."
+                    )
+                    self.stats.timeouts += len(pending)
+                return False
+            pipe = self.producer.pipeline()
+            keys = [(instr, dev) for instr in pending for dev in instr.pending]
+            for instr, dev in keys:
+                self.producer.get(instr.response_endpoint(dev), pipe)
+            responses = pipe.execute()
+            now = time.time()
+            for (instr, dev), response in zip(keys, responses):
+                if response and instr.is_done(instr.load_response(response)):
+                    instr.pending.discard(dev)
+            for instr in [instr for instr in pending if not instr.pending]:
+                if self.stats is not None:
+                    self.stats.add(instr, now - instr.sent)
+                pending.remove(instr)
+            if pending:
+                time.sleep(self.poll_interval)
+        return True
+
+
+def replay_scan(replay: InstructionReplay, args, motors: list, detectors: list, flyers: list):
+    """Replay the instructions of a synthetic scan."""
+    actions = set(args.actions)
+    all_devices = motors + detectors
+    if "stage" in actions:
+        replay.run([replay.create("stage", all_devices)])
+    for point in range(args.points):
+        if "set" in actions and motors:
+            replay.run(
+                [
+                    replay.create("set", [motor], {"value": float(point % 100), "wait_group": "m"})
+                    for motor in motors
+                ]
+            )
+        if "trigger" in actions and detectors:
+            replay.run([replay.create("trigger", detectors, {"group": "trigger"})])
+        if "read" in actions:
+            replay.run([replay.create("read", all_devices, {"group": "primary"})])
+    if "kickoff" in actions and flyers:
+        parameter = {
+            "configure": {
+                "num_pos": args.flyer_points,
+                "positions": np.zeros((args.flyer_points, 2)).tolist(),
+                "exp_time": 0,
+            }
+        }
+        replay.run([replay.create("kickoff", [flyer], parameter) for flyer in flyers])
+    if "complete" in actions and flyers:
+        replay.run([replay.create("complete", [flyer]) for flyer in flyers])
+    if "unstage" in actions:
+        replay.run([replay.create("unstage", all_devices)])
+
+
+def start_device_server(host: str, port: int, device_server_config: dict, directory: str):
+    """Start a device server in a separate process."""
+    config_path = os.path.join(directory, "service_config.yaml")
+    with open(config_path, "w", encoding="utf-8") as file:
+        yaml.safe_dump(
+            {
+                "redis": {"host": host, "port": int(port)},
+                "service_config": {"device_server": device_server_config},
+            },
+            file,
+        )
+    return subprocess.Popen(
+        [sys.executable, "-c", "from device_server import main; main()", "--config", config_path],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_for_device_server(
+    producer, proc: subprocess.Popen, devices: list, timeout: float = 120
+) -> None:
+    """Wait until the device server has loaded the devices and responds to instructions."""
+    probe = InstructionReplay(producer, None, timeout=1)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"The device server exited with code {proc.returncode}.")
+        if probe.run([probe.create("read", devices)]):
+            return
+    raise RuntimeError(f"The device server did not respond within {timeout} s.")
+
+
+def _cpu_time(process: psutil.Process) -> float:
+    cpu_times = process.cpu_times()
+    return cpu_times.user + cpu_times.system
+
+
+def run_benchmark(args) -> dict:
+    """Run the benchmark and return a summary of the results."""
+    redis_proc = None
+    if args.start_redis:
+        port = get_free_port()
+        redis_proc = start_redis_server(port)
+        host = "localhost"
+    else:
+        host, port = args.redis.split(":")
+    connector = RedisConnector(f"{host}:{port}")
+    producer = connector.producer()
+    devices = create_device_config(args.motors, args.detectors, args.flyers)
+    producer.set(MessageEndpoints.device_config(), msgpack.dumps(devices))
+    motors = [dev["name"] for dev in devices if dev["deviceClass"] == "SynAxis"]
+    detectors = [dev["name"] for dev in devices if dev["deviceClass"] == "DetWithCountTime"]
+    flyers = [dev["name"] for dev in devices if dev["deviceClass"] == "SynFlyer"]
+
+    server_proc = None
+    sampler = None
+    benchmark_process = psutil.Process()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.time()
+            server_proc = start_device_server(
+                host, port, json.loads(args.config) if args.config else {}, directory
+            )
+            wait_for_device_server(producer, server_proc, motors + detectors)
+            startup_time = time.time() - start
+
+        server_process = psutil.Process(server_proc.pid)
+        sampler = MemorySampler(server_process)
+        rss_start = server_process.memory_info().rss
+        stats = InstructionStatistics()
+        replay = InstructionReplay(producer, stats, args.timeout, args.poll_interval)
+        sampler.start()
+        server_cpu_start = _cpu_time(server_process)
+        benchmark_cpu_start = _cpu_time(benchmark_process)
+        start = time.time()
+        replay_scan(replay, args, motors, detectors, flyers)
+        duration = time.time() - start
+        server_cpu_time = _cpu_time(server_process) - server_cpu_start
+        benchmark_cpu_time = _cpu_time(benchmark_process) - benchmark_cpu_start
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        if server_proc is not None:
+            server_proc.terminate()
+            try:
+                server_proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server_proc.kill()
+                server_proc.wait()
+        if redis_proc is not None:
+            redis_proc.terminate()
+            redis_proc.wait()
+
+    return {
+        "points": args.points,
+        "motors": len(motors),
+        "detectors": len(detectors),
+        "flyers": len(flyers),
+        "startup_time_s": startup_time,
+        "duration_s": duration,
+        "instructions": stats.instructions,
+        "timeouts": stats.timeouts,
+        "instructions_per_second": stats.instructions / duration if duration > 0 else 0,
+        "server_cpu_time_s": server_cpu_time,
+        "server_cpu_percent": 100 * server_cpu_time / duration if duration > 0 else 0,
+        "benchmark_cpu_time_s": benchmark_cpu_time,
+        "benchmark_cpu_percent": 100 * benchmark_cpu_time / duration if duration > 0 else 0,
+        **stats.summary(),
+        "server_rss_start_mb": rss_start / 1e6,
+        "server_rss_peak_mb": sampler.peak_rss / 1e6,
+    }
+
+
+def main():
+    """
+    Launch the device server benchmark.
+    """
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--redis", default="localhost:6379", help="redis server address")
+    parser.add_argument(
+        "--start-redis",
+        action="store_true",
+        help="start a private redis-server on a free port instead of using --redis",
+    )
+    parser.add_argument("--points", type=int, default=200, help="number of points")
+    parser.add_argument("--motors", type=int, default=2, help="number of ophyd.sim motors")
+    parser.add_argument("--detectors", type=int, default=10, help="number of ophyd.sim detectors")
+    parser.add_argument("--flyers", type=int, default=1, help="number of simulated flyers")
+    parser.add_argument(
+        "--flyer-points", type=int, default=100, help="number of points per flyer kickoff"
+    )
+    parser.add_argument(
+        "--actions",
+        nargs="+",
+        choices=ACTIONS,
+        default=ACTIONS,
+        help="actions of the instruction stream",
+    )
+    parser.add_argument("--config", default=None, help="device server config as json")
+    parser.add_argument("--timeout", type=float, default=10, help="timeout per instruction")
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=0.001,
+        help="interval in seconds between polls for the responses of the device server",
+    )
+    parser.add_argument("--json", action="store_true", help="print the results as json")
+    clargs = parser.parse_args()
+
+    bec_logger.level = bec_logger.LOGLEVEL.WARNING
+    results = run_benchmark(clargs)
+    if clargs.json:
+        print(json.dumps(results, indent=4))
+        return
+    for key, val in results.items():
+        if isinstance(val, float):
+            print(f"{key:>28}: {val:.2f}")
+        else:
+            print(f"{key:>28}: {val}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,27 @@
 import inspect
-import sys
 import threading
 import time
 import traceback
-from concurrent.futures import ThreadPoolExecutor
-from io import StringIO
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_for_futures
 from typing import Any
 
+import numpy as np
 import ophyd
 from bec_lib.core import Alarms, BECMessage, BECService, MessageEndpoints, bec_logger
 from bec_lib.core.BECMessage import BECStatus
 from bec_lib.core.connector import ConnectorBase
 from bec_lib.core.devicemanager import OnFailure
+from bec_lib.core.frame_buffer import FrameRingBuffer, remove_stale_buffers
 from ophyd import Staged
+from ophyd.status import Status
 from ophyd.utils import errors as ophyd_errors
 
-from device_server.devices import is_serializable, rgetattr
+from device_server.devices import is_serializable
 from device_server.devices.devicemanager import DeviceManagerDS
+from device_server.devices.read_cache import ReadCache
+from device_server.instruction_queue import DeviceInstructionQueue
+from device_server.rpc_executor import RPCExecutor
 
 logger = bec_logger.logger
 
@@ -48,11 +53,43 @@ class DeviceServer(BECService):
             parent=self,
         )
         self.sig_thread.start()
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.device_server_config = self._service_config.service_config.get("device_server") or {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.device_server_config.get("instruction_workers", 4),
+            thread_name_prefix="device_instruction",
+        )
+        self.instruction_queue = DeviceInstructionQueue(self.executor)
+        self.read_timeout = self.device_server_config.get("read_timeout")
+        self.read_executor = ThreadPoolExecutor(
+            max_workers=self.device_server_config.get("read_workers", 8),
+            thread_name_prefix="device_read",
+        )
+        self.group_executor = ThreadPoolExecutor(
+            max_workers=self.device_server_config.get("group_workers", 8),
+            thread_name_prefix="device_group",
+        )
+        self.rpc_executor = RPCExecutor(
+            capture_output=self.device_server_config.get("rpc_capture_output", True)
+        )
+        self.read_cache = ReadCache(self.device_server_config.get("read_cache"))
+        self.shared_frames_config = self.device_server_config.get("shared_frames") or {}
+        self._frame_buffers = {}
+        if self.shared_frames_config:
+            self._remove_stale_frame_buffers()
         self._start_device_manager()
 
     def _start_device_manager(self):
-        self.device_manager = DeviceManagerDS(self.connector, status_cb=self.update_status)
+        init_config = {
+            key: self.device_server_config[key]
+            for key in ["init_workers", "init_timeout", "reconnect_interval", "readback_max_rate"]
+            if key in self.device_server_config
+        }
+        self.device_manager = DeviceManagerDS(
+            self.connector,
+            status_cb=self.update_status,
+            reload_cb=self.read_cache.clear,
+            **init_config,
+        )
         self.device_manager.initialize(self.bootstrap_server)
 
     def start(self) -> None:
@@ -88,6 +125,10 @@ class DeviceServer(BECService):
         self.stop()
         self.sig_thread.signal_event.set()
         self.sig_thread.join()
+        self.read_executor.shutdown(wait=False)
+        self.group_executor.shutdown(wait=False)
+        for frame_buffer in self._frame_buffers.values():
+            frame_buffer.close()
         self.device_manager.shutdown()
 
     def _update_device_metadata(self, instr) -> None:
@@ -148,9 +189,13 @@ class DeviceServer(BECService):
             msg (str): A DeviceInstructionMessage string containing the action and its parameters
 
         """
+        self._handle_device_instructions(BECMessage.DeviceInstructionMessage.loads(msg), msg)
+
+    def _handle_device_instructions(
+        self, instructions: BECMessage.DeviceInstructionMessage, msg: str
+    ) -> None:
         action = None
         try:
-            instructions = BECMessage.DeviceInstructionMessage.loads(msg)
             if not instructions.content["device"]:
                 return
             action = instructions.content["action"]
@@ -208,7 +253,35 @@ class DeviceServer(BECService):
     @staticmethod
     def instructions_callback(msg, *, parent, **_kwargs) -> None:
         """callback for handling device instructions"""
-        parent.executor.submit(parent.handle_device_instructions, msg.value)
+        try:
+            instructions = BECMessage.DeviceInstructionMessage.loads(msg.value)
+        except Exception:  # pylint: disable=broad-except
+            logger.error(f"Failed to load device instruction: {traceback.format_exc()}")
+            return
+        devices = instructions.content["device"] if instructions else None
+        if not devices:
+            return
+        if not isinstance(devices, list):
+            devices = [devices]
+        if parent._is_thread_safe_rpc(instructions, devices):
+            # thread-safe RPCs do not wait for the pending instructions of the device
+            parent.executor.submit(parent._handle_device_instructions, instructions, msg.value)
+            return
+        # instructions on the same device are executed in order
+        parent.instruction_queue.submit(
+            devices, parent._handle_device_instructions, instructions, msg.value
+        )
+
+    def _is_thread_safe_rpc(
+        self, instructions: BECMessage.DeviceInstructionMessage, devices: list
+    ) -> bool:
+        if instructions.content["action"] != "rpc":
+            return False
+        for dev in devices:
+            device = self.device_manager.devices.get(dev)
+            if device is None or not getattr(device.obj, "rpc_thread_safe", False):
+                return False
+        return True
 
     def _get_result_from_rpc(self, rpc_var: Any, instr_params: dict) -> Any:
         if callable(rpc_var):
@@ -240,17 +313,16 @@ class DeviceServer(BECService):
         return res
 
     def _run_rpc(self, instr: BECMessage.DeviceInstructionMessage) -> None:
-        save_stdout = sys.stdout
-        result = StringIO()
-        sys.stdout = result
         try:
             instr_params = instr.content.get("parameter")
             self._assert_device_is_enabled(instr)
-            rpc_var = rgetattr(
-                self.device_manager.devices[instr.content["device"]].obj,
-                instr_params.get("func"),
-            )
-            res = self._get_result_from_rpc(rpc_var, instr_params)
+            device_name = instr.content["device"]
+            obj = self.device_manager.devices[device_name].obj
+            with self.rpc_executor.device_lock(device_name, obj):
+                with self.rpc_executor.capture() as output:
+                    rpc_var = self.rpc_executor.resolve(device_name, obj, instr_params.get("func"))
+                    res = self._get_result_from_rpc(rpc_var, instr_params)
+            out = output.getvalue()
             if isinstance(res, ophyd.StatusBase):
                 res.__dict__["instruction"] = instr
                 res.add_callback(self._status_callback)
@@ -262,33 +334,23 @@ class DeviceServer(BECService):
                     "done": res.done,
                     "settle_time": res.settle_time,
                 }
-            elif isinstance(res, list) and isinstance(res[0], ophyd.Staged):
+            elif isinstance(res, list) and res and isinstance(res[0], ophyd.Staged):
                 res = [str(stage) for stage in res]
             else:
-                print(f"return value: {res}")
+                out += f"return value: {res}\n"
             # send result to client
             self.producer.set(
                 MessageEndpoints.device_rpc(instr_params.get("rpc_id")),
                 BECMessage.DeviceRPCMessage(
-                    device=instr.content["device"],
-                    return_val=res,
-                    out=result.getvalue(),
-                    success=True,
+                    device=device_name, return_val=res, out=out, success=True
                 ).dumps(),
                 expire=1800,
             )
             logger.trace(res)
-        except KeyboardInterrupt as kbi:
-            sys.stdout = save_stdout
-            raise KeyboardInterrupt from kbi
-
         except Exception as exc:  # pylint: disable=broad-except
             # send error to client
             self._send_rpc_exception(exc, instr)
 
-        finally:
-            sys.stdout = save_stdout
-
     def _send_rpc_exception(self, exc: Exception, instr: BECMessage.DeviceInstructionMessage):
         exc_formatted = {
             "error": exc.__class__.__name__,
@@ -313,11 +375,106 @@ class DeviceServer(BECService):
         if not isinstance(devices, list):
             devices = [devices]
         for dev in devices:
-            obj = self.device_manager.devices.get(dev)
-            obj.metadata = instr.metadata
-            status = obj.obj.trigger()
-            status.__dict__["instruction"] = instr
-            status.add_callback(self._status_callback)
+            self.device_manager.devices.get(dev).metadata = instr.metadata
+        statuses, errors = self._run_on_devices(
+            devices, lambda dev: self.device_manager.devices.get(dev).obj.trigger()
+        )
+        for dev, exc in errors.items():
+            # devices that failed to trigger are reported as failed together with the others
+            statuses[dev] = Status()
+            statuses[dev].set_exception(exc)
+        group_status = self._combine_status(statuses.values())
+        group_status.add_callback(lambda _status: self._group_status_callback(instr, statuses))
+        self._raise_first_error(errors)
+
+    def _run_on_devices(self, devices: list, func) -> tuple:
+        """
+        Call a function for each device concurrently on the group executor and wait for
+        all calls to return.
+
+        Args:
+            devices (list): Device names
+            func (Callable): Function that receives the device name
+
+        Returns:
+            tuple: Return value of each device that succeeded and the exception of each
+                device that failed
+        """
+        if len(devices) == 1:
+            futures = {devices[0]: Future()}
+            try:
+                futures[devices[0]].set_result(func(devices[0]))
+            except Exception as exc:  # pylint: disable=broad-except
+                futures[devices[0]].set_exception(exc)
+        else:
+            futures = {dev: self.group_executor.submit(func, dev) for dev in devices}
+            wait_for_futures(futures.values())
+        results, errors = {}, {}
+        for dev, future in futures.items():
+            if future.exception() is not None:
+                errors[dev] = future.exception()
+            else:
+                results[dev] = future.result()
+        return results, errors
+
+    @staticmethod
+    def _raise_first_error(errors: dict) -> None:
+        """Re-raise the first of the collected device errors after logging the others."""
+        if not errors:
+            return
+        devices = list(errors)
+        for dev in devices[1:]:
+            logger.error(f"Device {dev} failed: {errors[dev]}")
+        raise errors[devices[0]]
+
+    @staticmethod
+    def _combine_status(statuses) -> Status:
+        """
+        Combine status objects into a single status that finishes once all of them have
+        finished. It succeeds if all of them succeed.
+        """
+        statuses = list(statuses)
+        group_status = Status()
+        remaining = [len(statuses)]
+        lock = threading.Lock()
+
+        def _member_done(_status):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            failed = [status for status in statuses if not status.success]
+            if failed:
+                group_status.set_exception(
+                    RuntimeError(f"{len(failed)} of {len(statuses)} devices failed.")
+                )
+            else:
+                group_status.set_finished()
+
+        if not statuses:
+            group_status.set_finished()
+        for status in statuses:
+            status.add_callback(_member_done)
+        return group_status
+
+    def _group_status_callback(self, instr: BECMessage.DeviceInstructionMessage, statuses: dict):
+        """Publish the request status of all devices of a group in one pipeline."""
+        pipe = self.producer.pipeline()
+        response = instr.metadata.get("response")
+        for dev, status in statuses.items():
+            dev_msg = BECMessage.DeviceReqStatusMessage(
+                device=dev, success=status.success, metadata=instr.metadata
+            ).dumps()
+            logger.debug(f"req status for device {dev}: {status.success}")
+            self.producer.set_and_publish(MessageEndpoints.device_req_status(dev), dev_msg, pipe)
+            if response:
+                self.producer.lpush(
+                    MessageEndpoints.device_req_status(instr.metadata["RID"]),
+                    dev_msg,
+                    pipe,
+                    expire=18000,
+                )
+        pipe.execute()
 
     def _kickoff_device(self, instr: BECMessage.DeviceInstructionMessage) -> None:
         logger.debug(f"Kickoff device: {instr}")
@@ -334,7 +491,13 @@ class DeviceServer(BECService):
 
     def _complete_device(self, instr: BECMessage.DeviceInstructionMessage) -> None:
         obj = self.device_manager.devices.get(instr.content["device"]).obj
-        status = obj.complete()
+        if hasattr(obj, "complete"):
+            status = obj.complete()
+        else:
+            # devices that do not implement complete, e.g. flyers that finish on their own,
+            # are done
+            status = Status(obj=obj)
+            status.set_finished()
         status.__dict__["instruction"] = instr
         status.add_callback(self._status_callback)
 
@@ -397,53 +560,25 @@ class DeviceServer(BECService):
         pipe.execute()
 
     def _read_device(self, instr: BECMessage.DeviceInstructionMessage) -> None:
-        # check performance -- we might have to change it to a background thread
         devices = instr.content["device"]
         if not isinstance(devices, list):
             devices = [devices]
 
         start = time.time()
-        pipe = self.producer.pipeline()
         for dev in devices:
             self.device_manager.devices.get(dev).metadata = instr.metadata
-            obj = self.device_manager.devices.get(dev).obj
-            try:
-                signals = obj.read()
-            except Exception as exc:
-                self.device_manager.connector.raise_alarm(
-                    severity=Alarms.WARNING,
-                    alarm_type="Warning",
-                    source="DeviceServer",
-                    content=f"Failed to read device {dev}.",
-                    metadata={},
-                )
-                ds_dev = self.device_manager.devices.get(dev)
-                if ds_dev.on_failure == OnFailure.RAISE:
-                    raise exc
-
-                if ds_dev.on_failure == OnFailure.RETRY:
-                    # try to read it again, may have been only a glitch
-                    signals = obj.read()
-                elif ds_dev.on_failure == OnFailure.BUFFER:
-                    # if possible, fall back to past readings
-                    logger.warning(f"Failed to read {dev}. Trying to load an old value.")
-                    old_msg = BECMessage.DeviceMessage.loads(
-                        self.producer.get(MessageEndpoints.device_read(dev))
-                    )
-                    if not old_msg:
-                        raise exc
-                    signals = old_msg.content["signals"]
-
-            self.producer.set_and_publish(
-                MessageEndpoints.device_read(dev),
-                BECMessage.DeviceMessage(signals=signals, metadata=instr.metadata).dumps(),
-                pipe,
-            )
-            self.producer.set_and_publish(
-                MessageEndpoints.device_readback(dev),
-                BECMessage.DeviceMessage(signals=signals, metadata=instr.metadata).dumps(),
-                pipe,
-            )
+        readings = self._read_devices_parallel(devices)
+        if self.shared_frames_config:
+            readings = {
+                dev: self._offload_frames(dev, signals) for dev, signals in readings.items()
+            }
+
+        pipe = self.producer.pipeline()
+        for dev in devices:
+            # the same message is published to device_read and device_readback
+            msg = BECMessage.DeviceMessage(signals=readings[dev], metadata=instr.metadata).dumps()
+            self.producer.set_and_publish(MessageEndpoints.device_read(dev), msg, pipe)
+            self.producer.set_and_publish(MessageEndpoints.device_readback(dev), msg, pipe)
             self.producer.set(
                 MessageEndpoints.device_status(dev),
                 BECMessage.DeviceStatusMessage(
@@ -456,48 +591,163 @@ class DeviceServer(BECService):
             f"Elapsed time for reading and updating status info: {(time.time()-start)*1000} ms"
         )
 
+    def _remove_stale_frame_buffers(self) -> None:
+        removed = remove_stale_buffers(self.shared_frames_config.get("directory"))
+        if removed:
+            logger.info(f"Removed {len(removed)} frame buffers of previous device servers.")
+
+    def _offload_frames(self, dev: str, signals: dict) -> dict:
+        """
+        Write large arrays of a device reading to shared frame buffers and replace them by
+        their frame descriptors.
+
+        Args:
+            dev (str): Device name
+            signals (dict): Device reading as signal -> {value, timestamp}
+
+        Returns:
+            dict: Device reading with frame descriptors
+        """
+        min_bytes = self.shared_frames_config.get("min_bytes", 1_000_000)
+        out = {}
+        for signal_name, signal in signals.items():
+            value = signal.get("value") if isinstance(signal, dict) else None
+            if (
+                not isinstance(value, np.ndarray)
+                or value.nbytes < min_bytes
+                or value.dtype.kind not in "biuf"
+            ):
+                out[signal_name] = signal
+                continue
+            frame_buffer = self._frame_buffers.get((dev, signal_name))
+            if frame_buffer is None:
+                frame_buffer = self._frame_buffers.setdefault(
+                    (dev, signal_name),
+                    FrameRingBuffer(
+                        f"{dev}.{signal_name}",
+                        directory=self.shared_frames_config.get("directory"),
+                        num_slots=self.shared_frames_config.get("num_slots", 16),
+                    ),
+                )
+            out[signal_name] = {**signal, "value": frame_buffer.write(value)}
+        return out
+
+    def _read_devices_parallel(self, devices: list) -> dict:
+        """
+        Read devices in parallel on the read executor. If a read timeout is configured, the
+        time to read all devices is limited by the timeout; devices that do not respond in
+        time are handled according to their on_failure setting. Reads that have timed out
+        cannot be interrupted and keep their worker busy until they return.
+
+        Args:
+            devices (list): Device names
+
+        Returns:
+            dict: Signals of each device
+        """
+        if len(devices) == 1 and self.read_timeout is None:
+            return {devices[0]: self._read_single_device(devices[0])}
+        futures = {dev: self.read_executor.submit(self._read_single_device, dev) for dev in devices}
+        wait_for_futures(futures.values(), timeout=self.read_timeout)
+        readings = {}
+        for dev, future in futures.items():
+            if future.done():
+                # re-raises the exception of the read
+                readings[dev] = future.result()
+                continue
+            future.cancel()
+            exc = TimeoutError(f"Reading device {dev} timed out after {self.read_timeout} s.")
+            readings[dev] = self._handle_read_failure(dev, exc, retry=False)
+        return readings
+
+    def _read_single_device(self, dev: str) -> dict:
+        obj = self.device_manager.devices.get(dev).obj
+        if self.read_cache.enabled:
+            reading = self.read_cache.get(dev, obj)
+            if reading is not None:
+                return reading
+        try:
+            reading = obj.read()
+        except Exception as exc:  # pylint: disable=broad-except
+            return self._handle_read_failure(dev, exc)
+        if self.read_cache.enabled:
+            self.read_cache.update(dev, obj, reading)
+        return reading
+
+    def _handle_read_failure(self, dev: str, exc: Exception, retry: bool = True) -> dict:
+        self.device_manager.connector.raise_alarm(
+            severity=Alarms.WARNING,
+            alarm_type="Warning",
+            source="DeviceServer",
+            content=f"Failed to read device {dev}.",
+            metadata={},
+        )
+        ds_dev = self.device_manager.devices.get(dev)
+        if ds_dev.on_failure == OnFailure.RETRY and retry:
+            # try to read it again, may have been only a glitch
+            return ds_dev.obj.read()
+        if ds_dev.on_failure == OnFailure.BUFFER:
+            # if possible, fall back to past readings
+            logger.warning(f"Failed to read {dev}. Trying to load an old value.")
+            old_msg = BECMessage.DeviceMessage.loads(
+                self.producer.get(MessageEndpoints.device_read(dev))
+            )
+            if old_msg:
+                return old_msg.content["signals"]
+        raise exc
+
     def _stage_device(self, instr: BECMessage.DeviceInstructionMessage) -> None:
         devices = instr.content["device"]
         if not isinstance(devices, list):
             devices = [devices]
 
+        _, errors = self._run_on_devices(devices, self._stage_single_device)
         pipe = self.producer.pipeline()
         for dev in devices:
-            obj = self.device_manager.devices[dev].obj
-            if hasattr(obj, "_staged"):
-                # pylint: disable=protected-access
-                if obj._staged == Staged.yes:
-                    logger.info(f"Device {obj.name} was already staged and will be first unstaged.")
-                    self.device_manager.devices[dev].obj.unstage()
-                self.device_manager.devices[dev].obj.stage()
             self.producer.set(
                 MessageEndpoints.device_staged(dev),
                 BECMessage.DeviceStatusMessage(
-                    device=dev, status=1, metadata=instr.metadata
+                    device=dev, status=int(dev not in errors), metadata=instr.metadata
                 ).dumps(),
                 pipe,
             )
         pipe.execute()
+        self._raise_first_error(errors)
+
+    def _stage_single_device(self, dev: str) -> None:
+        obj = self.device_manager.devices[dev].obj
+        if not hasattr(obj, "_staged"):
+            return
+        # pylint: disable=protected-access
+        if obj._staged == Staged.yes:
+            logger.info(f"Device {obj.name} was already staged and will be first unstaged.")
+            obj.unstage()
+        obj.stage()
 
     def _unstage_device(self, instr: BECMessage.DeviceInstructionMessage) -> None:
         devices = instr.content["device"]
         if not isinstance(devices, list):
             devices = [devices]
 
+        _, errors = self._run_on_devices(devices, self._unstage_single_device)
         pipe = self.producer.pipeline()
         for dev in devices:
-            obj = self.device_manager.devices[dev].obj
-            if hasattr(obj, "_staged"):
-                # pylint: disable=protected-access
-                if obj._staged == Staged.yes:
-                    self.device_manager.devices[dev].obj.unstage()
-                else:
-                    logger.debug(f"Device {obj.name} was already unstaged.")
             self.producer.set(
                 MessageEndpoints.device_staged(dev),
                 BECMessage.DeviceStatusMessage(
-                    device=dev, status=0, metadata=instr.metadata
+                    device=dev, status=int(dev in errors), metadata=instr.metadata
                 ).dumps(),
                 pipe,
             )
         pipe.execute()
+        self._raise_first_error(errors)
+
+    def _unstage_single_device(self, dev: str) -> None:
+        obj = self.device_manager.devices[dev].obj
+        if not hasattr(obj, "_staged"):
+            return
+        # pylint: disable=protected-access
+        if obj._staged == Staged.yes:
+            obj.unstage()
+        else:
+            logger.debug(f"Device {obj.name} was already unstaged.")
@@ -94,6 +94,8 @@ class ConfigUpdateHandler:
                     raise DeviceConfigError(f"Error during object update. {exc}")
 
             if "enabled" in dev_config:
+                # an explicit update by the user overrides the automatic reconnect
+                self.device_manager.cancel_reconnect(dev)
                 device._config["enabled"] = dev_config["enabled"]
                 if dev_config["enabled"]:
                     # pylint:disable=protected-access
@@ -1,14 +1,47 @@
 import msgpack
+import numpy as np
 from bec_lib.core.numpy_encoder import numpy_encode
 from ophyd import Device, PositionerBase, Signal
 
+SERIALIZABLE_TYPES = (
+    type(None),
+    bool,
+    float,
+    complex,
+    str,
+    bytes,
+    bytearray,
+    memoryview,
+    np.bool_,
+    np.number,
+)
+
+
+def _is_serializable_type(var):
+    """
+    Check if an object is serializable based on its type. Returns None if the type does not
+    allow a decision, e.g. for containers, whose items have to be checked as well.
+    """
+    if isinstance(var, SERIALIZABLE_TYPES):
+        return True
+    if isinstance(var, int):
+        # msgpack supports signed and unsigned 64 bit integers
+        return -(2**63) <= var < 2**64
+    if isinstance(var, np.ndarray) and var.dtype.kind != "O":
+        # arrays are encoded with numpy_encode; dumping them would copy the data
+        return True
+    return None
+
 
 def is_serializable(var) -> bool:
     """check if an object is serializable"""
+    result = _is_serializable_type(var)
+    if result is not None:
+        return result
     try:
         msgpack.dumps(var, default=numpy_encode)
         return True
-    except (TypeError, OverflowError):
+    except (TypeError, OverflowError, ValueError):
         return False
 
 
@@ -1,5 +1,10 @@
+import hashlib
 import inspect
+import json
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_for_futures
 from functools import reduce
 
 import ophyd
@@ -19,6 +24,7 @@ from ophyd.signal import EpicsSignalBase
 
 from device_server.devices.config_update_handler import ConfigUpdateHandler
 from device_server.devices.device_serializer import get_device_info
+from device_server.devices.readback_publisher import ReadbackPublisher
 
 try:
     from bec_plugins import devices as plugin_devices
@@ -61,12 +67,55 @@ class DeviceManagerDS(DeviceManagerBase):
         connector: ConnectorBase,
         config_update_handler: ConfigUpdateHandler = None,
         status_cb: list = None,
+        init_workers: int = 16,
+        init_timeout: float = 30,
+        reconnect_interval: float = 30,
+        readback_max_rate: float = 20,
+        reload_cb: list = None,
     ):
+        """
+        Device manager of the device server.
+
+        Args:
+            connector (ConnectorBase): Connector
+            config_update_handler (ConfigUpdateHandler, optional): Config update handler
+            status_cb (list, optional): Status callbacks
+            init_workers (int, optional): Number of devices that are connected in parallel when
+                a session is loaded. Defaults to 16.
+            init_timeout (float, optional): Time in seconds to wait for the devices of a session
+                to connect. Devices that are not connected by then continue to connect in the
+                background. Defaults to 30.
+            reconnect_interval (float, optional): Interval in seconds to retry the connection to
+                devices that were disabled because they could not be connected. 0 disables
+                the retries. Defaults to 30.
+            readback_max_rate (float, optional): Maximum number of readback updates per second
+                and device. Faster updates are coalesced to the latest value. 0 publishes every
+                update. Defaults to 20.
+            reload_cb (list, optional): Callbacks that are called before the devices are
+                destroyed on a config reload, e.g. to release subscriptions to their signals.
+        """
         super().__init__(connector, status_cb)
         self._config_request_connector = None
         self._device_instructions_connector = None
         self._config_update_handler_cls = config_update_handler
         self.config_update_handler = None
+        self.init_workers = init_workers
+        self.init_timeout = init_timeout
+        self.reconnect_interval = reconnect_interval
+        self._reconnect_lock = threading.Lock()
+        # devices that were disabled because they could not be connected, as opposed to
+        # devices disabled by the user
+        self._reconnect_devices = set()
+        self._load_generation = 0
+        self._reconnect_event = threading.Event()
+        self._reconnect_thread = None
+        self._device_info_cache = {}
+        self.readback_max_rate = readback_max_rate
+        self._readback_publisher = None
+        self._readback_publisher_lock = threading.Lock()
+        if reload_cb is None:
+            reload_cb = []
+        self._reload_cb = reload_cb if isinstance(reload_cb, list) else [reload_cb]
 
     def initialize(self, bootstrap_server) -> None:
         self.config_update_handler = (
@@ -77,6 +126,8 @@ class DeviceManagerDS(DeviceManagerBase):
         super().initialize(bootstrap_server)
 
     def _reload_action(self) -> None:
+        for cb in self._reload_cb:
+            cb()
         for dev, obj in self.devices.items():
             try:
                 obj.obj.destroy()
@@ -84,6 +135,10 @@ class DeviceManagerDS(DeviceManagerBase):
                 logger.warning(f"Failed to destroy {obj.obj.name}")
                 raise RuntimeError
         self.devices.flush()
+        with self._reconnect_lock:
+            # connections of the previous session that are still pending are ignored
+            self._load_generation += 1
+            self._reconnect_devices.clear()
         self._get_config()
 
     def _get_device_class(self, dev_type):
@@ -107,15 +162,130 @@ class DeviceManagerDS(DeviceManagerBase):
 
     def _load_session(self, *_args, **_kwargs):
         if self._is_config_valid():
+            enabled_devices = []
             for dev in self._session["devices"]:
                 name = dev.get("name")
                 enabled = dev.get("enabled")
                 logger.info(f"Adding device {name}: {'ENABLED' if enabled else 'DISABLED'}")
                 try:
-                    self.initialize_device(dev)
+                    opaas_obj = self.initialize_device(dev, connect=False)
                 except Exception as exc:
                     content = traceback.format_exc()
                     logger.error(f"Failed to initialize device: {dev}: {content}.")
+                    continue
+                if opaas_obj.enabled:
+                    enabled_devices.append(opaas_obj)
+            self._connect_devices(enabled_devices)
+
+    def _connect_devices(self, devices: list) -> None:
+        """
+        Connect devices in parallel. The call returns once all devices are connected or
+        the init timeout has expired; the remaining devices continue to connect in the
+        background.
+
+        Args:
+            devices (list): DSDevices to connect
+        """
+        if not devices:
+            return
+        with self._reconnect_lock:
+            generation = self._load_generation
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.init_workers, len(devices)), thread_name_prefix="device_init"
+        )
+        futures = {
+            executor.submit(self._connect_enabled_device, obj, generation): obj for obj in devices
+        }
+        executor.shutdown(wait=False)
+        _, not_done = wait_for_futures(futures, timeout=self.init_timeout)
+        if not_done:
+            names = sorted(futures[future].name for future in not_done)
+            logger.warning(
+                f"Devices {names} did not connect within {self.init_timeout} s and continue to"
+                " connect in the background."
+            )
+
+    def _connect_enabled_device(self, opaas_obj: DSDevice, generation: int = None) -> bool:
+        try:
+            self.initialize_enabled_device(opaas_obj)
+            return True
+        # pylint:disable=broad-except
+        except Exception:
+            if not self._is_current_generation(generation):
+                logger.debug(f"Ignoring failed connection to {opaas_obj.name} of a previous load.")
+                return False
+            error_traceback = traceback.format_exc()
+            logger.error(
+                f"{error_traceback}. Failed to stage {opaas_obj.name}. The device will be disabled."
+            )
+            opaas_obj.enabled = False
+            self._schedule_reconnect(opaas_obj.name, generation)
+            return False
+
+    def _is_current_generation(self, generation: int = None) -> bool:
+        with self._reconnect_lock:
+            return generation is None or generation == self._load_generation
+
+    def cancel_reconnect(self, name: str) -> None:
+        """
+        Stop retrying the connection to a device, e.g. because the user enabled or
+        disabled it explicitly.
+
+        Args:
+            name (str): Device name
+        """
+        with self._reconnect_lock:
+            self._reconnect_devices.discard(name)
+
+    def _schedule_reconnect(self, name: str, generation: int = None) -> None:
+        if not self.reconnect_interval:
+            return
+        with self._reconnect_lock:
+            if generation is not None and generation != self._load_generation:
+                return
+            self._reconnect_devices.add(name)
+            if self._reconnect_thread is None:
+                self._reconnect_thread = threading.Thread(
+                    target=self._reconnect_loop, daemon=True, name="device_reconnect"
+                )
+                self._reconnect_thread.start()
+
+    def _reconnect_loop(self) -> None:
+        while not self._reconnect_event.wait(self.reconnect_interval):
+            with self._reconnect_lock:
+                names = list(self._reconnect_devices)
+            for name in names:
+                opaas_obj = self.devices.get(name)
+                if opaas_obj is None or opaas_obj.enabled:
+                    # the device has been removed or enabled in the meantime
+                    with self._reconnect_lock:
+                        self._reconnect_devices.discard(name)
+                    continue
+                try:
+                    self.initialize_enabled_device(opaas_obj)
+                # pylint:disable=broad-except
+                except Exception:
+                    logger.debug(f"Failed to reconnect to device {name}.")
+                    continue
+                with self._reconnect_lock:
+                    if (
+                        name not in self._reconnect_devices
+                        or self.devices.get(name) is not opaas_obj
+                    ):
+                        # the device was disabled by the user or the config was reloaded
+                        # while connecting
+                        continue
+                    self._reconnect_devices.discard(name)
+                    opaas_obj.enabled = True
+                logger.info(f"Reconnected to device {name}. The device has been enabled.")
+
+    def shutdown(self):
+        self._reconnect_event.set()
+        if self._reconnect_thread is not None:
+            self._reconnect_thread.join()
+        if self._readback_publisher is not None:
+            self._readback_publisher.shutdown()
+        super().shutdown()
 
     @staticmethod
     def update_config(obj: OphydObject, config: dict) -> None:
@@ -155,12 +325,18 @@ class DeviceManagerDS(DeviceManagerBase):
                 else:
                     setattr(obj, config_key, config_value)
 
-    def initialize_device(self, dev: dict) -> DSDevice:
+    def initialize_device(self, dev: dict, connect: bool = True) -> DSDevice:
         """
         Prepares a device for later usage.
         This includes inspecting the device class signature,
         initializing the object, refreshing the device info and buffer,
         as well as adding subscriptions.
+
+        Args:
+            dev (dict): Device config
+            connect (bool, optional): Connect to an enabled device and initialize its buffer.
+                If False, the device has to be connected with initialize_enabled_device.
+                Defaults to True.
         """
         name = dev.get("name")
         enabled = dev.get("enabled")
@@ -200,7 +376,7 @@ class DeviceManagerDS(DeviceManagerBase):
         # refresh the device info
         pipe = self.producer.pipeline()
         self.reset_device_data(obj, pipe)
-        self.publish_device_info(obj, pipe)
+        self.publish_device_info(obj, pipe, config=dev)
         pipe.execute()
 
         # insert the created device obj into the device manager
@@ -213,15 +389,8 @@ class DeviceManagerDS(DeviceManagerBase):
             return opaas_obj
 
         # update device buffer for enabled devices
-        try:
-            self.initialize_enabled_device(opaas_obj)
-        # pylint:disable=broad-except
-        except Exception:
-            error_traceback = traceback.format_exc()
-            logger.error(
-                f"{error_traceback}. Failed to stage {opaas_obj.name}. The device will be disabled."
-            )
-            opaas_obj.enabled = False
+        if connect:
+            self._connect_enabled_device(opaas_obj)
 
         obj = opaas_obj.obj
         # add subscriptions
@@ -256,6 +425,17 @@ class DeviceManagerDS(DeviceManagerBase):
             return
         obj.destroy()
 
+    @property
+    def readback_publisher(self) -> ReadbackPublisher:
+        """Publisher of the device readbacks. It is created once the producer is available."""
+        if self._readback_publisher is None:
+            with self._readback_publisher_lock:
+                if self._readback_publisher is None:
+                    self._readback_publisher = ReadbackPublisher(
+                        self.producer, self.readback_max_rate
+                    )
+        return self._readback_publisher
+
     def reset_device(self, obj: DSDevice):
         """reset a device"""
         obj.initialized = False
@@ -277,21 +457,38 @@ class DeviceManagerDS(DeviceManagerBase):
         )
         raise ConnectionError(f"Failed to establish a connection to device {obj.name}")
 
-    def publish_device_info(self, obj: OphydObject, pipe=None) -> None:
+    def publish_device_info(self, obj: OphydObject, pipe=None, config: dict = None) -> None:
         """
         Publish the device info to redis. The device info contains
         inter alia the class name, user functions and signals.
 
+        If the device config is given, the device info is cached by device class and
+        config, so that devices that have not changed since the last config reload do not
+        have to be inspected again.
+
         Args:
-            obj (_type_): _description_
+            obj (OphydObject): Device object
+            pipe (Pipeline, optional): Redis pipeline
+            config (dict, optional): Device config the object has been created from
         """
+        key = self._get_device_info_key(obj, config) if config is not None else None
+        msg = self._device_info_cache.get(key) if key is not None else None
+        if msg is None:
+            interface = get_device_info(obj, {})
+            msg = BECMessage.DeviceInfoMessage(device=obj.name, info=interface).dumps()
+            if key is not None:
+                self._device_info_cache[key] = msg
+        self.producer.set(MessageEndpoints.device_info(obj.name), msg, pipe)
 
-        interface = get_device_info(obj, {})
-        self.producer.set(
-            MessageEndpoints.device_info(obj.name),
-            BECMessage.DeviceInfoMessage(device=obj.name, info=interface).dumps(),
-            pipe,
-        )
+    @staticmethod
+    def _get_device_info_key(obj: OphydObject, config: dict) -> tuple:
+        # the device info only depends on the class and the parameters the device was created with
+        params = {key: config.get(key) for key in ["name", "deviceClass", "deviceConfig"]}
+        config_hash = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        obj_cls = type(obj)
+        return (f"{obj_cls.__module__}.{obj_cls.__qualname__}", config_hash)
 
     def reset_device_data(self, obj: OphydObject, pipe=None) -> None:
         """delete all device data and device info"""
@@ -299,16 +496,18 @@ class DeviceManagerDS(DeviceManagerBase):
         self.producer.delete(MessageEndpoints.device_read(obj.name), pipe)
         self.producer.delete(MessageEndpoints.device_info(obj.name), pipe)
 
-    def _obj_callback_readback(self, *_args, **kwargs):
+    def _obj_callback_readback(self, *_args, force: bool = False, **kwargs):
         obj = kwargs["obj"]
         if obj.connected:
             name = obj.root.name
-            signals = obj.read()
-            metadata = self.devices.get(obj.root.name).metadata
-            dev_msg = BECMessage.DeviceMessage(signals=signals, metadata=metadata).dumps()
-            pipe = self.producer.pipeline()
-            self.producer.set_and_publish(MessageEndpoints.device_readback(name), dev_msg, pipe)
-            pipe.execute()
+
+            def get_message():
+                # read when the readback is published to send the latest value
+                signals = obj.read()
+                metadata = self.devices.get(name).metadata
+                return BECMessage.DeviceMessage(signals=signals, metadata=metadata).dumps()
+
+            self.readback_publisher.update(name, get_message, force=force)
 
     def _obj_callback_acq_done(self, *_args, **kwargs):
         device = kwargs["obj"].root.name
@@ -320,7 +519,8 @@ class DeviceManagerDS(DeviceManagerBase):
         )
 
     def _obj_callback_done_moving(self, *args, **kwargs):
-        self._obj_callback_readback(*args, **kwargs)
+        # the final position is published without rate limit
+        self._obj_callback_readback(*args, force=True, **kwargs)
         # self._obj_callback_acq_done(*args, **kwargs)
 
     def _obj_callback_is_moving(self, *_args, **kwargs):
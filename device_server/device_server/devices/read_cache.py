@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import fnmatch
+import threading
+import time
+
+from ophyd import Signal
+
+
+class ReadCache:
+    def __init__(self, validity: dict = None) -> None:
+        """
+        Cache of device readings that is updated by monitor subscriptions.
+
+        A device reading is served from the cache if every signal of the reading has been
+        updated, either by a monitor callback or by an active read, within its validity
+        window. Otherwise, the device is read actively. The signals of a device are
+        subscribed after its first active read.
+
+        Args:
+            validity (dict, optional): Validity windows in seconds, keyed by glob patterns of
+                device or signal names. Signals without a matching pattern are never
+                served from the cache.
+        """
+        self.validity = validity or {}
+        self._lock = threading.Lock()
+        self._devices = {}
+        self._values = {}
+
+    @property
+    def enabled(self) -> bool:
+        """True if validity windows are configured"""
+        return bool(self.validity)
+
+    def get_validity(self, dev: str, signal_name: str) -> float | None:
+        """
+        Get the validity window of a signal.
+
+        Args:
+            dev (str): Device name
+            signal_name (str): Signal name
+
+        Returns:
+            float: Validity window in seconds or None if the signal is not cached
+        """
+        for pattern, validity in self.validity.items():
+            if fnmatch.fnmatch(signal_name, pattern) or fnmatch.fnmatch(dev, pattern):
+                return validity
+        return None
+
+    def get(self, dev: str, obj) -> dict | None:
+        """
+        Get the cached reading of a device.
+
+        Args:
+            dev (str): Device name
+            obj: ophyd object of the device
+
+        Returns:
+            dict: Reading as signal -> {value, timestamp} or None if the reading is not
+                cached or not valid anymore
+        """
+        entry = self._devices.get(dev)
+        if entry is None or entry["obj"] is not obj or entry["validity"] is None:
+            return None
+        now = time.monotonic()
+        reading = {}
+        for signal_name, validity in entry["validity"].items():
+            cached = self._values.get((dev, signal_name))
+            if cached is None or now - cached[2] > validity:
+                return None
+            reading[signal_name] = {"value": cached[0], "timestamp": cached[1]}
+        return reading
+
+    def update(self, dev: str, obj, reading: dict) -> None:
+        """
+        Update the cache with the result of an active read and subscribe to the signals of
+        the device if necessary.
+
+        Args:
+            dev (str): Device name
+            obj: ophyd object of the device
+            reading (dict): Reading as signal -> {value, timestamp}
+        """
+        entry = self._devices.get(dev)
+        if entry is not None and entry["obj"] is obj:
+            if entry["validity"] is None:
+                return
+            if entry["validity"].keys() == reading.keys():
+                self._store(dev, reading)
+                return
+        validity = {name: self.get_validity(dev, name) for name in reading}
+        if not reading or None in validity.values():
+            # the device is always read actively
+            self._devices[dev] = {"obj": obj, "validity": None}
+            return
+        if entry is not None and entry["obj"] is not obj:
+            # the device has been replaced
+            self._unsubscribe(entry)
+            entry = None
+        subscribed = dict(entry.get("subscribed", {})) if entry else {}
+        subscribed.update(
+            self._subscribe(dev, obj, [name for name in reading if name not in subscribed])
+        )
+        self._store(dev, reading)
+        self._devices[dev] = {"obj": obj, "validity": validity, "subscribed": subscribed}
+
+    def clear(self) -> None:
+        """
+        Unsubscribe from all signals and drop the cached readings, e.g. before the devices
+        are destroyed on a config reload.
+        """
+        devices, self._devices = self._devices, {}
+        for entry in devices.values():
+            self._unsubscribe(entry)
+        with self._lock:
+            self._values.clear()
+
+    def _store(self, dev: str, reading: dict) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for signal_name, signal in reading.items():
+                self._values[(dev, signal_name)] = (
+                    signal.get("value"),
+                    signal.get("timestamp"),
+                    now,
+                )
+
+    def _subscribe(self, dev: str, obj, signal_names: list) -> dict:
+        if isinstance(obj, Signal):
+            signals = {obj.name: obj}
+        else:
+            signals = {walk.item.name: walk.item for walk in obj.walk_signals()}
+        subscriptions = {}
+        for signal_name in signal_names:
+            signal = signals.get(signal_name)
+            if signal is None:
+                subscriptions[signal_name] = None
+                continue
+            cid = signal.subscribe(self._get_callback(dev, signal_name), run=False)
+            subscriptions[signal_name] = (signal, cid)
+        return subscriptions
+
+    @staticmethod
+    def _unsubscribe(entry: dict) -> None:
+        for subscription in entry.get("subscribed", {}).values():
+            if subscription is None:
+                continue
+            signal, cid = subscription
+            signal.unsubscribe(cid)
+
+    def _get_callback(self, dev: str, signal_name: str):
+        def _monitor_callback(*_args, value=None, timestamp=None, **_kwargs):
+            with self._lock:
+                self._values[(dev, signal_name)] = (value, timestamp, time.monotonic())
+
+        return _monitor_callback
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from typing import Callable
+
+from bec_lib.core import MessageEndpoints, bec_logger
+
+logger = bec_logger.logger
+
+
+class ReadbackPublisher:
+    """
+    Publish device readbacks with a maximum rate per device.
+
+    Updates that arrive within 1 / max_rate seconds after the last readback of a device are
+    coalesced: only the latest reading is published once the interval has passed. The
+    reading is created when it is published, so the last update of a device is always
+    delivered. Readbacks that are due at the same time are published in one pipeline.
+    Publishing is serialized and every update carries a sequence number, so that a coalesced
+    reading never overwrites a newer, forced one.
+    """
+
+    def __init__(self, producer, max_rate: float = 20) -> None:
+        """
+        Args:
+            producer: Redis producer
+            max_rate (float, optional): Maximum number of readbacks per second and device.
+                0 publishes every update. Defaults to 20.
+        """
+        self.producer = producer
+        self.min_interval = 1 / max_rate if max_rate else 0
+        self._lock = threading.Lock()
+        self._last_published = {}
+        self._pending = {}
+        self._seq = itertools.count()
+        self._published_seq = {}
+        self._publish_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def update(self, name: str, get_message: Callable[[], bytes], force: bool = False) -> None:
+        """
+        Publish the readback of a device or schedule it for later.
+
+        Args:
+            name (str): Device name
+            get_message (Callable): Function that returns the serialized DeviceMessage
+            force (bool, optional): Publish immediately, e.g. for the final value of a move.
+                Defaults to False.
+        """
+        now = time.monotonic()
+        with self._lock:
+            seq = next(self._seq)
+            due = self._last_published.get(name, -self.min_interval) + self.min_interval
+            if not force and (name in self._pending or now < due):
+                self._pending[name] = (due, seq, get_message)
+                self._start_thread()
+                self._wakeup.set()
+                return
+            self._pending.pop(name, None)
+            self._last_published[name] = now
+        self._publish({name: (seq, get_message)})
+
+    def _start_thread(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="readback_publisher")
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            now = time.monotonic()
+            with self._lock:
+                due_updates = {
+                    name: (seq, get_message)
+                    for name, (due, seq, get_message) in self._pending.items()
+                    if due <= now
+                }
+                for name in due_updates:
+                    self._pending.pop(name)
+                    self._last_published[name] = now
+                next_due = min((due for due, _, _ in self._pending.values()), default=None)
+                self._wakeup.clear()
+            if due_updates:
+                self._publish(due_updates)
+            timeout = None if next_due is None else max(0, next_due - time.monotonic())
+            self._wakeup.wait(timeout)
+
+    def _publish(self, updates: dict) -> None:
+        with self._publish_lock:
+            pipe = self.producer.pipeline()
+            for name, (seq, get_message) in updates.items():
+                if seq < self._published_seq.get(name, -1):
+                    # a newer reading, e.g. a forced one, has been published in the meantime
+                    continue
+                self._published_seq[name] = seq
+                try:
+                    msg = get_message()
+                # pylint: disable=broad-except
+                except Exception as exc:
+                    logger.error(f"Failed to get the readback of device {name}: {exc}")
+                    continue
+                self.producer.set_and_publish(MessageEndpoints.device_readback(name), msg, pipe)
+            pipe.execute()
+
+    def shutdown(self) -> None:
+        """Stop the background thread. Pending readbacks are discarded."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import collections
+import threading
+import traceback
+from concurrent.futures import Executor
+from typing import Callable
+
+from bec_lib.core import bec_logger
+
+logger = bec_logger.logger
+
+
+class _Task:
+    __slots__ = ("devices", "func", "args", "submitted")
+
+    def __init__(self, devices: list, func: Callable, args: tuple) -> None:
+        self.devices = devices
+        self.func = func
+        self.args = args
+        self.submitted = False
+
+
+class DeviceInstructionQueue:
+    """
+    Per-device ordered execution of device instructions.
+
+    Each device has its own queue of pending instructions. An instruction is executed on the
+    executor once it is the first pending instruction of all of its devices. Instructions on
+    the same device are therefore executed in the order in which they were received, while
+    instructions on disjoint devices are executed concurrently.
+    """
+
+    def __init__(self, executor: Executor) -> None:
+        """
+        Args:
+            executor (Executor): Executor that runs the instructions
+        """
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._queues = {}
+
+    def submit(self, devices: list, func: Callable, *args) -> None:
+        """
+        Schedule an instruction.
+
+        Args:
+            devices (list): Devices of the instruction
+            func (Callable): Function that executes the instruction
+            *args: Arguments of the function
+        """
+        task = _Task(list(dict.fromkeys(devices)), func, args)
+        with self._lock:
+            for dev in task.devices:
+                self._queues.setdefault(dev, collections.deque()).append(task)
+            ready = self._is_ready(task)
+            if ready:
+                task.submitted = True
+        if ready:
+            self.executor.submit(self._run, task)
+
+    def _is_ready(self, task: _Task) -> bool:
+        return all(self._queues[dev][0] is task for dev in task.devices)
+
+    def _run(self, task: _Task) -> None:
+        try:
+            task.func(*task.args)
+        # pylint: disable=broad-except
+        except Exception:
+            logger.error(f"Failed to execute device instruction: {traceback.format_exc()}")
+        finally:
+            self._finish(task)
+
+    def _finish(self, task: _Task) -> None:
+        ready = []
+        with self._lock:
+            for dev in task.devices:
+                queue = self._queues[dev]
+                queue.popleft()
+                if not queue:
+                    del self._queues[dev]
+                    continue
+                head = queue[0]
+                if not head.submitted and self._is_ready(head):
+                    head.submitted = True
+                    ready.append(head)
+        for next_task in ready:
+            self.executor.submit(self._run, next_task)
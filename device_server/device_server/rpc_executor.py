@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import contextlib
+import sys
+import threading
+from io import StringIO
+
+from device_server.devices import rgetattr
+
+
+class ThreadLocalStdout:
+    """
+    Replacement of sys.stdout that redirects the output of threads that are capturing their
+    output to a thread-local buffer. The output of all other threads is forwarded to the
+    original stream.
+    """
+
+    def __init__(self, stream) -> None:
+        self.stream = stream
+        self._local = threading.local()
+
+    @property
+    def capture_buffer(self) -> StringIO | None:
+        """Capture buffer of the current thread"""
+        return getattr(self._local, "capture_buffer", None)
+
+    @capture_buffer.setter
+    def capture_buffer(self, val: StringIO | None) -> None:
+        self._local.capture_buffer = val
+
+    def write(self, text: str) -> int:
+        buffer = self.capture_buffer
+        if buffer is not None:
+            return buffer.write(text)
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        if self.capture_buffer is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class RPCExecutor:
+    """
+    Helper for running RPCs on devices.
+
+    The attribute path of an RPC (e.g. "x.velocity.get") is resolved once per device object
+    and cached. Only the parent of the last attribute is cached, so that properties and
+    signal values are still evaluated on every call. RPCs of different devices run
+    concurrently; RPCs of the same device are serialized unless the device sets
+    "rpc_thread_safe" to True. RPCs of such devices also bypass the device instruction queue.
+    """
+
+    _stdout_lock = threading.Lock()
+
+    def __init__(self, capture_output: bool = True) -> None:
+        """
+        Args:
+            capture_output (bool, optional): Capture the output printed during an RPC.
+                Defaults to True.
+        """
+        self.capture_output = capture_output
+        self._attr_cache = {}
+        self._device_locks = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, device_name: str, obj, func: str):
+        """
+        Get the attribute of a device that is addressed by an RPC.
+
+        Args:
+            device_name (str): Device name
+            obj: ophyd object of the device
+            func (str): Attribute path relative to the device
+
+        Returns:
+            The attribute, e.g. a bound method or a value
+        """
+        key = (device_name, func)
+        cached = self._attr_cache.get(key)
+        if cached is None or cached[0] is not obj:
+            parent_path, _, attr = func.rpartition(".")
+            parent = rgetattr(obj, parent_path) if parent_path else obj
+            cached = self._attr_cache[key] = (obj, parent, attr)
+        return getattr(cached[1], cached[2])
+
+    def device_lock(self, device_name: str, obj):
+        """
+        Get the context manager that guards the RPCs of a device.
+
+        Args:
+            device_name (str): Device name
+            obj: ophyd object of the device
+        """
+        if getattr(obj, "rpc_thread_safe", False):
+            return contextlib.nullcontext()
+        lock = self._device_locks.get(device_name)
+        if lock is None:
+            with self._lock:
+                lock = self._device_locks.setdefault(device_name, threading.RLock())
+        return lock
+
+    @contextlib.contextmanager
+    def capture(self):
+        """
+        Capture the output that the current thread prints to stdout.
+
+        Yields:
+            StringIO: Buffer with the captured output. Nothing is captured if capturing the
+                output is disabled.
+        """
+        output = StringIO()
+        if not self.capture_output:
+            yield output
+            return
+        stdout = self._install_stdout()
+        previous = stdout.capture_buffer
+        stdout.capture_buffer = output
+        try:
+            yield output
+        finally:
+            stdout.capture_buffer = previous
+
+    @classmethod
+    def _install_stdout(cls) -> ThreadLocalStdout:
+        with cls._stdout_lock:
+            if not isinstance(sys.stdout, ThreadLocalStdout):
+                sys.stdout = ThreadLocalStdout(sys.stdout)
+            return sys.stdout
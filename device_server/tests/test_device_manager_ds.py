@@ -1,4 +1,6 @@
 import os
+import threading
+import time
 from unittest import mock
 
 import bec_lib.core
@@ -12,6 +14,7 @@ from bec_lib.core.tests.utils import (
     create_session_from_config,
 )
 
+from device_server.devices import is_serializable
 from device_server.devices.devicemanager import DeviceManagerDS
 
 # pylint: disable=missing-function-docstring
@@ -118,6 +121,138 @@ def test_disable_unreachable_devices():
                 )
 
 
+def test_connect_devices_in_parallel(device_manager):
+    devices = [device_manager.devices.samx, device_manager.devices.samy]
+    with mock.patch.object(
+        device_manager, "initialize_enabled_device", side_effect=lambda obj: time.sleep(0.5)
+    ) as init:
+        start = time.time()
+        device_manager._connect_devices(devices)
+        assert time.time() - start < 0.9
+        assert init.call_count == 2
+
+
+def test_connect_devices_returns_after_timeout(device_manager):
+    device_manager.init_timeout = 0.1
+    connected = threading.Event()
+
+    def slow_connection(obj):
+        time.sleep(0.5)
+        connected.set()
+
+    with mock.patch.object(
+        device_manager, "initialize_enabled_device", side_effect=slow_connection
+    ):
+        start = time.time()
+        device_manager._connect_devices([device_manager.devices.samx])
+        assert time.time() - start < 0.4
+        assert not connected.is_set()
+        assert connected.wait(2)
+
+
+def test_reconnect_disabled_devices(device_manager):
+    device_manager.reconnect_interval = 0.05
+    samx = device_manager.devices.samx
+    attempts = []
+
+    def flaky_connection(obj):
+        attempts.append(obj.name)
+        if len(attempts) < 3:
+            raise ConnectionError
+
+    config_reply = BECMessage.RequestResponseMessage(accepted=True, message="")
+    with mock.patch.object(
+        device_manager.config_helper, "wait_for_config_reply", return_value=config_reply
+    ):
+        with mock.patch.object(
+            device_manager, "initialize_enabled_device", side_effect=flaky_connection
+        ):
+            assert device_manager._connect_enabled_device(samx) is False
+            assert samx.enabled is False
+            start = time.time()
+            while not samx.enabled and time.time() - start < 2:
+                time.sleep(0.01)
+    assert samx.enabled is True
+    assert len(attempts) == 3
+    assert "samx" not in device_manager._reconnect_devices
+
+
+def test_reconnect_skips_devices_disabled_by_user(device_manager):
+    device_manager.reconnect_interval = 0.05
+    samx = device_manager.devices.samx
+    attempts = []
+    reconnecting = threading.Event()
+    proceed = threading.Event()
+
+    def blocking_connection(obj):
+        attempts.append(obj.name)
+        if len(attempts) == 1:
+            raise ConnectionError
+        reconnecting.set()
+        proceed.wait(2)
+
+    config_reply = BECMessage.RequestResponseMessage(accepted=True, message="")
+    with mock.patch.object(
+        device_manager.config_helper, "wait_for_config_reply", return_value=config_reply
+    ):
+        with mock.patch.object(
+            device_manager, "initialize_enabled_device", side_effect=blocking_connection
+        ):
+            assert device_manager._connect_enabled_device(samx) is False
+            assert reconnecting.wait(2)
+            # the user disables the device while the reconnect is in progress
+            device_manager.cancel_reconnect("samx")
+            proceed.set()
+            time.sleep(0.2)
+    assert samx.enabled is False
+    assert "samx" not in device_manager._reconnect_devices
+
+
+def test_connect_of_previous_load_is_ignored(device_manager):
+    device_manager.reconnect_interval = 0.05
+    samx = device_manager.devices.samx
+    generation = device_manager._load_generation
+    device_manager._load_generation += 1
+    with mock.patch.object(
+        device_manager, "initialize_enabled_device", side_effect=ConnectionError
+    ):
+        assert device_manager._connect_enabled_device(samx, generation) is False
+    assert samx.enabled is True
+    assert "samx" not in device_manager._reconnect_devices
+
+
+def test_device_info_is_cached(device_manager):
+    samx = device_manager.devices.samx
+    config = samx._config
+    with mock.patch(
+        "device_server.devices.devicemanager.get_device_info", return_value={}
+    ) as get_info:
+        device_manager.publish_device_info(samx.obj, config=config)
+        device_manager.publish_device_info(samx.obj, config=config)
+        assert get_info.call_count == 0
+        changed_config = {**config, "deviceConfig": {**config["deviceConfig"], "tolerance": 1}}
+        device_manager.publish_device_info(samx.obj, config=changed_config)
+        assert get_info.call_count == 1
+        device_manager.publish_device_info(samx.obj)
+        assert get_info.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "value,serializable",
+    [
+        (1, True),
+        (2**64, False),
+        (np.zeros((10, 10)), True),
+        (np.float32(1.5), True),
+        ({"a": [1, "b", np.int64(2)]}, True),
+        (object(), False),
+        ([object()], False),
+    ],
+)
+def test_is_serializable(value, serializable):
+    assert is_serializable(value) is serializable
+
+
 def test_flyer_event_callback():
     device_manager = load_device_manager()
     samx = device_manager.devices.samx
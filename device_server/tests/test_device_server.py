@@ -1,18 +1,25 @@
+import threading
+import time
 import traceback
 from unittest import mock
 from unittest.mock import ANY
 
 import bec_lib.core
+import numpy as np
 import pytest
 from bec_lib.core import Alarms, BECMessage, MessageEndpoints, ServiceConfig
 from bec_lib.core.BECMessage import BECStatus
+from bec_lib.core.frame_buffer import FrameReader, is_frame_descriptor
+from bec_lib.core.redis_connector import MessageObject
 from bec_lib.core.tests.utils import ConnectorMock
 from ophyd import Staged
+from ophyd.status import Status
 from ophyd.utils import errors as ophyd_errors
 from test_device_manager_ds import device_manager, load_device_manager
 
 from device_server import DeviceServer
 from device_server.device_server import InvalidDeviceError
+from device_server.devices.read_cache import ReadCache
 
 # pylint: disable=missing-function-docstring
 # pylint: disable=protected-access
@@ -166,6 +173,112 @@ def test_assert_device_is_enabled(device_server_mock, instr):
             device_server._assert_device_is_enabled(instr)
 
 
+def test_read_device_publishes_one_message_for_read_and_readback(device_server_mock):
+    device_server = device_server_mock
+    instr = BECMessage.DeviceInstructionMessage(
+        device=["samx", "samy"], action="read", parameter={}, metadata={"RID": "test"}
+    )
+    device_server._read_device(instr)
+    for dev in ["samx", "samy"]:
+        msgs = {
+            msg["queue"]: msg["msg"]
+            for msg in device_server.producer.message_sent
+            if msg["queue"]
+            in [MessageEndpoints.device_read(dev), MessageEndpoints.device_readback(dev)]
+        }
+        assert (
+            msgs[MessageEndpoints.device_read(dev)] == msgs[MessageEndpoints.device_readback(dev)]
+        )
+
+
+def test_remove_stale_frame_buffers(device_server_mock, tmp_path):
+    device_server = device_server_mock
+    device_server.shared_frames_config = {"directory": str(tmp_path)}
+    stale = tmp_path / "eiger.image_999999999_0123abcd.frames"
+    stale.write_bytes(b"")
+    device_server._remove_stale_frame_buffers()
+    assert not stale.exists()
+
+
+def test_read_device_writes_large_arrays_to_frame_buffers(device_server_mock, tmp_path):
+    device_server = device_server_mock
+    device_server.shared_frames_config = {"min_bytes": 100, "directory": str(tmp_path)}
+    frame = np.ones((20, 20))
+    signals = {
+        "eiger_image": {"value": frame, "timestamp": 1},
+        "eiger_small": {"value": np.ones(2), "timestamp": 1},
+    }
+    readings = device_server._offload_frames("eiger", signals)
+    assert is_frame_descriptor(readings["eiger_image"]["value"])
+    assert readings["eiger_image"]["timestamp"] == 1
+    assert isinstance(readings["eiger_small"]["value"], np.ndarray)
+    assert np.array_equal(FrameReader().read(readings["eiger_image"]["value"]), frame)
+    # the reading of the device is not modified
+    assert signals["eiger_image"]["value"] is frame
+
+
+def test_read_device_reads_in_parallel(device_server_mock):
+    device_server = device_server_mock
+    devices = device_server.device_manager.devices
+    instr = BECMessage.DeviceInstructionMessage(
+        device=["samx", "samy"], action="read", parameter={}, metadata={"RID": "test"}
+    )
+
+    def slow_read():
+        time.sleep(0.5)
+        return {}
+
+    with mock.patch.object(devices.samx.obj, "read", side_effect=slow_read):
+        with mock.patch.object(devices.samy.obj, "read", side_effect=slow_read):
+            start = time.time()
+            device_server._read_device(instr)
+            assert time.time() - start < 0.9
+
+
+def test_read_device_uses_read_cache(device_server_mock):
+    device_server = device_server_mock
+    device_server.read_cache = ReadCache({"samx": 10})
+    samx = device_server.device_manager.devices.samx.obj
+    with mock.patch.object(samx, "read", wraps=samx.read) as read:
+        first = device_server._read_single_device("samx")
+        second = device_server._read_single_device("samx")
+        read.assert_called_once()
+    assert first == second
+
+
+def test_read_device_timeout_falls_back_to_buffer(device_server_mock):
+    device_server = device_server_mock
+    device_server.read_timeout = 0.1
+    devices = device_server.device_manager.devices
+    old_msg = BECMessage.DeviceMessage(signals={"samx": {"value": 1}}, metadata={})
+    with mock.patch.dict(devices.samx._config, {"onFailure": "buffer"}):
+        with mock.patch.object(devices.samx.obj, "read", side_effect=lambda: time.sleep(1)):
+            with mock.patch.object(device_server.producer, "get", return_value=old_msg.dumps()):
+                readings = device_server._read_devices_parallel(["samx", "samy"])
+    assert readings["samx"] == {"samx": {"value": 1}}
+    assert "samy" in readings
+
+
+def test_read_device_timeout_raises(device_server_mock):
+    device_server = device_server_mock
+    device_server.read_timeout = 0.1
+    devices = device_server.device_manager.devices
+    with mock.patch.dict(devices.samx._config, {"onFailure": "raise"}):
+        with mock.patch.object(devices.samx.obj, "read", side_effect=lambda: time.sleep(1)):
+            with pytest.raises(TimeoutError):
+                device_server._read_devices_parallel(["samx", "samy"])
+
+
+def test_read_single_device_timeout_raises(device_server_mock):
+    device_server = device_server_mock
+    device_server.read_timeout = 0.1
+    devices = device_server.device_manager.devices
+    with mock.patch.dict(devices.samx._config, {"onFailure": "raise"}):
+        with mock.patch.object(devices.samx.obj, "read", side_effect=lambda: time.sleep(1)):
+            with pytest.raises(TimeoutError):
+                device_server._read_devices_parallel(["samx"])
+
+
 @pytest.mark.parametrize(
     "instr",
     [
@@ -595,6 +708,241 @@ def test_stage_device(device_server_mock, instr):
         assert device_server.device_manager.devices[dev].obj._staged == Staged.no
 
 
+def test_complete_device_without_complete_method(device_server_mock):
+    device_server = device_server_mock
+    instr = BECMessage.DeviceInstructionMessage(
+        device="samx",
+        action="complete",
+        parameter={},
+        metadata={"stream": "primary", "DIID": 1, "RID": "complete_without_method"},
+    )
+    samx = device_server.device_manager.devices.samx.obj
+    assert not hasattr(samx, "complete")
+    with mock.patch.object(device_server.producer, "set_and_publish") as set_and_publish:
+        device_server._complete_device(instr)
+        time.sleep(0.1)
+        msgs = [
+            BECMessage.DeviceReqStatusMessage.loads(call.args[1])
+            for call in set_and_publish.call_args_list
+            if call.args[0] == MessageEndpoints.device_req_status("samx")
+        ]
+        assert [
+            msg.content["success"]
+            for msg in msgs
+            if msg.metadata.get("RID") == "complete_without_method"
+        ] == [True]
+
+
+def test_instructions_callback_submits_to_instruction_queue(device_server_mock):
+    device_server = device_server_mock
+    instr = BECMessage.DeviceInstructionMessage(
+        device="samx", action="read", parameter={}, metadata={"RID": "test"}
+    )
+    msg = MessageObject(topic="", value=instr.dumps())
+    with mock.patch.object(device_server.instruction_queue, "submit") as submit:
+        DeviceServer.instructions_callback(msg, parent=device_server)
+        submit.assert_called_once_with(
+            ["samx"], device_server._handle_device_instructions, ANY, msg.value
+        )
+        assert submit.call_args.args[2].content == instr.content
+
+
+def test_instructions_callback_runs_thread_safe_rpc_immediately(device_server_mock):
+    device_server = device_server_mock
+    instr = BECMessage.DeviceInstructionMessage(
+        device="samx",
+        action="rpc",
+        parameter={"func": "velocity.get", "rpc_id": "rpc_id", "args": [], "kwargs": {}},
+        metadata={"RID": "test"},
+    )
+    msg = MessageObject(topic="", value=instr.dumps())
+    samx = device_server.device_manager.devices.samx.obj
+    with mock.patch.object(device_server.instruction_queue, "submit") as submit, mock.patch.object(
+        device_server.executor, "submit"
+    ) as executor_submit:
+        DeviceServer.instructions_callback(msg, parent=device_server)
+        submit.assert_called_once()
+        samx.rpc_thread_safe = True
+        try:
+            DeviceServer.instructions_callback(msg, parent=device_server)
+        finally:
+            del samx.rpc_thread_safe
+        submit.assert_called_once()
+        executor_submit.assert_called_once_with(
+            device_server._handle_device_instructions, ANY, msg.value
+        )
+
+
+def test_stage_devices_concurrently(device_server_mock):
+    device_server = device_server_mock
+    instr = BECMessage.DeviceInstructionMessage(
+        device=["samx", "samy"],
+        action="stage",
+        parameter={},
+        metadata={"stream": "primary", "DIID": 1, "RID": "test"},
+    )
+    devices = device_server.device_manager.devices
+    # both devices have to be staged at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    def _stage():
+        barrier.wait()
+        return []
+
+    with mock.patch.object(devices.samx.obj, "stage", side_effect=_stage), mock.patch.object(
+        devices.samy.obj, "stage", side_effect=_stage
+    ):
+        device_server._stage_device(instr)
+        assert not barrier.broken
+        devices.samx.obj.stage.assert_called_once()
+        devices.samy.obj.stage.assert_called_once()
+
+
+def test_combine_status():
+    statuses = [Status(), Status()]
+    group_status = DeviceServer._combine_status(statuses)
+    statuses[0].set_finished()
+    assert not group_status.done
+    statuses[1].set_finished()
+    group_status.wait(timeout=1)
+    assert group_status.success
+
+
+def test_combine_status_failure():
+    statuses = [Status(), Status()]
+    group_status = DeviceServer._combine_status(statuses)
+    statuses[0].set_exception(RuntimeError("failed"))
+    assert not group_status.done
+    statuses[1].set_finished()
+    with pytest.raises(RuntimeError):
+        group_status.wait(timeout=1)
+
+
+def test_trigger_device_publishes_group_status(device_server_mock):
+    device_server = device_server_mock
+    instr = BECMessage.DeviceInstructionMessage(
+        device=["samx", "samy"],
+        action="trigger",
+        parameter={},
+        metadata={"stream": "primary", "DIID": 1, "RID": "group_status"},
+    )
+    devices = device_server.device_manager.devices
+    statuses = {"samx": Status(), "samy": Status()}
+
+    def _req_status(set_and_publish):
+        # ignore the updates of other devices and requests
+        return [
+            call.args[0]
+            for call in set_and_publish.call_args_list
+            if call.args[0].startswith(MessageEndpoints.device_req_status(""))
+            and BECMessage.DeviceReqStatusMessage.loads(call.args[1]).metadata["RID"]
+            == "group_status"
+        ]
+
+    with mock.patch.object(
+        devices.samx.obj, "trigger", return_value=statuses["samx"]
+    ), mock.patch.object(
+        devices.samy.obj, "trigger", return_value=statuses["samy"]
+    ), mock.patch.object(
+        device_server.producer, "set_and_publish"
+    ) as set_and_publish:
+        device_server._trigger_device(instr)
+        statuses["samx"].set_finished()
+        time.sleep(0.1)
+        assert _req_status(set_and_publish) == []
+        statuses["samy"].set_finished()
+        # status callbacks are executed in a separate thread
+        time.sleep(0.1)
+        assert _req_status(set_and_publish) == [
+            MessageEndpoints.device_req_status("samx"),
+            MessageEndpoints.device_req_status("samy"),
+        ]
+
+
+def test_trigger_device_reports_all_devices_if_one_raises(device_server_mock):
+    device_server = device_server_mock
+    instr = BECMessage.DeviceInstructionMessage(
+        device=["samx", "samy"],
+        action="trigger",
+        parameter={},
+        metadata={"stream": "primary", "DIID": 1, "RID": "group_failure"},
+    )
+    devices = device_server.device_manager.devices
+    samy_status = Status()
+    with mock.patch.object(
+        devices.samx.obj, "trigger", side_effect=RuntimeError("trigger failed")
+    ), mock.patch.object(devices.samy.obj, "trigger", return_value=samy_status), mock.patch.object(
+        device_server.producer, "set_and_publish"
+    ) as set_and_publish:
+        with pytest.raises(RuntimeError, match="trigger failed"):
+            device_server._trigger_device(instr)
+        devices.samy.obj.trigger.assert_called_once()
+        samy_status.set_finished()
+        time.sleep(0.1)
+        req_status = {
+            msg.content["device"]: msg.content["success"]
+            for msg in (
+                BECMessage.DeviceReqStatusMessage.loads(call.args[1])
+                for call in set_and_publish.call_args_list
+                if call.args[0].startswith(MessageEndpoints.device_req_status(""))
+            )
+            if msg.metadata["RID"] == "group_failure"
+        }
+        assert req_status == {"samx": False, "samy": True}
+
+
+def test_stage_device_publishes_staged_state_if_one_raises(device_server_mock):
+    device_server = device_server_mock
+    instr = BECMessage.DeviceInstructionMessage(
+        device=["samx", "samy"],
+        action="stage",
+        parameter={},
+        metadata={"stream": "primary", "DIID": 1, "RID": "group_stage_failure"},
+    )
+    devices = device_server.device_manager.devices
+    with mock.patch.object(
+        devices.samx.obj, "stage", side_effect=RuntimeError("stage failed")
+    ), mock.patch.object(devices.samy.obj, "stage", return_value=[]), mock.patch.object(
+        device_server.producer, "set"
+    ) as producer_set:
+        with pytest.raises(RuntimeError, match="stage failed"):
+            device_server._stage_device(instr)
+        devices.samy.obj.stage.assert_called_once()
+    staged = {
+        call.args[0]: msg.content["status"]
+        for call in producer_set.call_args_list
+        if call.args[0].startswith(MessageEndpoints.device_staged(""))
+        for msg in [BECMessage.DeviceStatusMessage.loads(call.args[1])]
+        if msg.metadata.get("RID") == "group_stage_failure"
+    }
+    assert staged == {
+        MessageEndpoints.device_staged("samx"): 0,
+        MessageEndpoints.device_staged("samy"): 1,
+    }
+
+
+def test_run_rpc(device_server_mock):
+    device_server = device_server_mock
+    instr = BECMessage.DeviceInstructionMessage(
+        device="samx",
+        action="rpc",
+        parameter={"func": "velocity.get", "rpc_id": "rpc_id", "args": [], "kwargs": {}},
+        metadata={"stream": "primary", "DIID": 1, "RID": "test"},
+    )
+    samx = device_server.device_manager.devices.samx.obj
+    with mock.patch.object(device_server.producer, "set") as producer_set:
+        with mock.patch.object(samx.velocity, "get", return_value=5) as get:
+            device_server._run_rpc(instr)
+            get.assert_called_once()
+        producer_set.assert_called_once_with(
+            MessageEndpoints.device_rpc("rpc_id"),
+            BECMessage.DeviceRPCMessage(
+                device="samx", return_val=5, out="return value: 5\n", success=True
+            ).dumps(),
+            expire=1800,
+        )
+
+
 def test_reload_action(device_server_mock):
     device_server = device_server_mock
     dm = device_server.device_manager
@@ -603,3 +951,19 @@ def test_reload_action(device_server_mock):
             dm._reload_action()
             obj_destroy.assert_called_once()
             get_config.assert_called_once()
+
+
+def test_reload_action_clears_read_cache(device_server_mock):
+    device_server = device_server_mock
+    dm = device_server.device_manager
+    with mock.patch("device_server.device_server.DeviceManagerDS") as device_manager_cls:
+        DeviceServer._start_device_manager(device_server)
+        reload_cb = device_manager_cls.call_args.kwargs["reload_cb"]
+    device_server.device_manager = dm
+    assert reload_cb == device_server.read_cache.clear
+    dm._reload_cb = [reload_cb]
+    with mock.patch.object(device_server.read_cache, "_unsubscribe") as unsubscribe:
+        device_server.read_cache._devices["samx"] = {"obj": dm.devices.samx.obj}
+        with mock.patch.object(dm, "_get_config"):
+            dm._reload_action()
+        unsubscribe.assert_called_once()
@@ -0,0 +1,66 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from device_server.instruction_queue import DeviceInstructionQueue
+
+# pylint: disable=missing-function-docstring
+
+
+@pytest.fixture
+def instruction_queue():
+    executor = ThreadPoolExecutor(max_workers=4)
+    yield DeviceInstructionQueue(executor)
+    executor.shutdown()
+
+
+def _wait_for(condition, timeout=2):
+    start = time.time()
+    while not condition():
+        if time.time() - start > timeout:
+            raise TimeoutError()
+        time.sleep(0.01)
+
+
+def test_instruction_queue_keeps_order_per_device(instruction_queue):
+    executed = []
+
+    def _instruction(val):
+        time.sleep(0.01 * (5 - val))
+        executed.append(val)
+
+    for val in range(5):
+        instruction_queue.submit(["samx"], _instruction, val)
+    _wait_for(lambda: len(executed) == 5)
+    assert executed == list(range(5))
+
+
+def test_instruction_queue_runs_disjoint_devices_concurrently(instruction_queue):
+    release = threading.Event()
+    executed = []
+
+    instruction_queue.submit(["samx"], release.wait)
+    instruction_queue.submit(["samy"], executed.append, "samy")
+    _wait_for(lambda: executed == ["samy"])
+    instruction_queue.submit(["samx", "samz"], executed.append, "samx")
+    instruction_queue.submit(["samz"], executed.append, "samz")
+    time.sleep(0.05)
+    # samz waits for the instruction on samx and samz
+    assert executed == ["samy"]
+    release.set()
+    _wait_for(lambda: len(executed) == 3)
+    assert executed == ["samy", "samx", "samz"]
+
+
+def test_instruction_queue_continues_after_errors(instruction_queue):
+    executed = []
+
+    def _fail():
+        raise RuntimeError()
+
+    instruction_queue.submit(["samx"], _fail)
+    instruction_queue.submit(["samx"], executed.append, 1)
+    _wait_for(lambda: executed == [1])
+    assert not instruction_queue._queues
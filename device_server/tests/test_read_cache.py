@@ -0,0 +1,73 @@
+import time
+from unittest import mock
+
+from ophyd import Signal
+from ophyd.sim import SynAxis
+
+from device_server.devices.read_cache import ReadCache
+
+# pylint: disable=missing-function-docstring
+
+
+def test_read_cache_get_validity():
+    cache = ReadCache({"temp*": 10, "*_config": 60})
+    assert cache.get_validity("temp1", "temp1") == 10
+    assert cache.get_validity("samx", "samx_config") == 60
+    assert cache.get_validity("samx", "samx") is None
+
+
+def test_read_cache_serves_monitored_values():
+    cache = ReadCache({"temp*": 10})
+    temp = SynAxis(name="temp")
+    assert cache.get("temp", temp) is None
+    cache.update("temp", temp, temp.read())
+    assert cache.get("temp", temp)["temp"]["value"] == 0
+    temp.set(5)
+    reading = cache.get("temp", temp)
+    assert reading["temp"]["value"] == 5
+    assert reading["temp_setpoint"]["value"] == 5
+
+
+def test_read_cache_expires():
+    cache = ReadCache({"temp*": 0.1})
+    temp = Signal(name="temp", value=1)
+    cache.update("temp", temp, temp.read())
+    assert cache.get("temp", temp) == {"temp": temp.read()["temp"]}
+    time.sleep(0.15)
+    assert cache.get("temp", temp) is None
+
+
+def test_read_cache_ignores_devices_without_validity():
+    cache = ReadCache({"temp*": 10})
+    samx = SynAxis(name="samx")
+    with mock.patch.object(cache, "_subscribe") as subscribe:
+        cache.update("samx", samx, samx.read())
+        subscribe.assert_not_called()
+    assert cache.get("samx", samx) is None
+
+
+def test_read_cache_new_device_object():
+    cache = ReadCache({"temp*": 10})
+    temp = Signal(name="temp", value=1)
+    cache.update("temp", temp, temp.read())
+    assert cache.get("temp", Signal(name="temp", value=2)) is None
+
+
+def test_read_cache_clear_unsubscribes():
+    cache = ReadCache({"temp*": 10})
+    temp = Signal(name="temp", value=1)
+    cache.update("temp", temp, temp.read())
+    assert temp._callbacks[Signal.SUB_VALUE]
+    cache.clear()
+    assert not temp._callbacks[Signal.SUB_VALUE]
+    assert cache.get("temp", temp) is None
+
+
+def test_read_cache_unsubscribes_replaced_device():
+    cache = ReadCache({"temp*": 10})
+    temp = Signal(name="temp", value=1)
+    cache.update("temp", temp, temp.read())
+    new_temp = Signal(name="temp", value=2)
+    cache.update("temp", new_temp, new_temp.read())
+    assert not temp._callbacks[Signal.SUB_VALUE]
+    assert new_temp._callbacks[Signal.SUB_VALUE]
@@ -0,0 +1,81 @@
+import time
+from unittest import mock
+
+import pytest
+from bec_lib.core import MessageEndpoints
+
+from device_server.devices.readback_publisher import ReadbackPublisher
+
+
+@pytest.fixture
+def publisher():
+    publisher = ReadbackPublisher(mock.MagicMock(), max_rate=20)
+    yield publisher
+    publisher.shutdown()
+
+
+def _sent(publisher, name="samx"):
+    return [
+        call.args[1]
+        for call in publisher.producer.set_and_publish.call_args_list
+        if call.args[0] == MessageEndpoints.device_readback(name)
+    ]
+
+
+def test_readback_publisher_publishes_first_update_immediately(publisher):
+    publisher.update("samx", lambda: b"1")
+    assert _sent(publisher) == [b"1"]
+    assert publisher._thread is None
+
+
+def test_readback_publisher_coalesces_updates(publisher):
+    publisher.update("samx", lambda: b"1")
+    for val in range(2, 10):
+        publisher.update("samx", lambda val=val: str(val).encode())
+    assert _sent(publisher) == [b"1"]
+    time.sleep(0.2)
+    assert _sent(publisher) == [b"1", b"9"]
+
+
+def test_readback_publisher_rate_is_per_device(publisher):
+    publisher.update("samx", lambda: b"1")
+    publisher.update("samy", lambda: b"2")
+    assert _sent(publisher, "samx") == [b"1"]
+    assert _sent(publisher, "samy") == [b"2"]
+
+
+def test_readback_publisher_force(publisher):
+    publisher.update("samx", lambda: b"1")
+    publisher.update("samx", lambda: b"2")
+    publisher.update("samx", lambda: b"3", force=True)
+    assert _sent(publisher) == [b"1", b"3"]
+    time.sleep(0.2)
+    # the pending update has been replaced by the forced one
+    assert _sent(publisher) == [b"1", b"3"]
+
+
+def test_readback_publisher_drops_coalesced_update_older_than_forced(publisher):
+    publisher.update("samx", lambda: b"1")
+    publisher.update("samx", lambda: b"2")
+    with publisher._lock:
+        # the background thread has taken the pending update but not published it yet
+        _, seq, get_message = publisher._pending.pop("samx")
+    publisher.update("samx", lambda: b"3", force=True)
+    publisher._publish({"samx": (seq, get_message)})
+    assert _sent(publisher) == [b"1", b"3"]
+
+
+def test_readback_publisher_without_rate_limit():
+    publisher = ReadbackPublisher(mock.MagicMock(), max_rate=0)
+    for val in range(5):
+        publisher.update("samx", lambda val=val: str(val).encode())
+    assert _sent(publisher) == [str(val).encode() for val in range(5)]
+    publisher.shutdown()
+
+
+def test_readback_publisher_skips_failed_readings(publisher):
+    def _fail():
+        raise RuntimeError("read failed")
+
+    publisher.update("samx", _fail)
+    assert _sent(publisher) == []
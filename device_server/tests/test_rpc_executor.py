@@ -0,0 +1,84 @@
+import contextlib
+import threading
+import time
+
+from device_server.rpc_executor import RPCExecutor
+
+# pylint: disable=missing-function-docstring
+
+
+class Signal:
+    def __init__(self) -> None:
+        self.value = 0
+
+    def get(self):
+        return self.value
+
+
+class Device:
+    def __init__(self) -> None:
+        self.readback = Signal()
+        self.velocity = 1
+
+
+def test_rpc_executor_resolve():
+    executor = RPCExecutor()
+    dev = Device()
+    assert executor.resolve("samx", dev, "readback.get")() == 0
+    dev.readback.value = 5
+    assert executor.resolve("samx", dev, "readback.get")() == 5
+    assert executor._attr_cache[("samx", "readback.get")][1] is dev.readback
+
+
+def test_rpc_executor_resolve_does_not_cache_values():
+    executor = RPCExecutor()
+    dev = Device()
+    assert executor.resolve("samx", dev, "velocity") == 1
+    dev.velocity = 2
+    assert executor.resolve("samx", dev, "velocity") == 2
+
+
+def test_rpc_executor_resolve_new_device_object():
+    executor = RPCExecutor()
+    dev = Device()
+    executor.resolve("samx", dev, "readback.get")
+    new_dev = Device()
+    new_dev.readback.value = 3
+    assert executor.resolve("samx", new_dev, "readback.get")() == 3
+
+
+def test_rpc_executor_capture_is_thread_local():
+    executor = RPCExecutor()
+    outputs = {}
+
+    def _run(name):
+        with executor.capture() as output:
+            for _ in range(10):
+                print(name)
+                time.sleep(0.001)
+        outputs[name] = output.getvalue()
+
+    threads = [threading.Thread(target=_run, args=(name,)) for name in ["a", "b"]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert outputs == {"a": "a\n" * 10, "b": "b\n" * 10}
+
+
+def test_rpc_executor_capture_disabled(capsys):
+    executor = RPCExecutor(capture_output=False)
+    with executor.capture() as output:
+        print("test")
+    assert output.getvalue() == ""
+    assert capsys.readouterr().out == "test\n"
+
+
+def test_rpc_executor_device_lock():
+    executor = RPCExecutor()
+    dev = Device()
+    lock = executor.device_lock("samx", dev)
+    assert executor.device_lock("samx", dev) is lock
+    assert executor.device_lock("samy", dev) is not lock
+    dev.rpc_thread_safe = True
+    assert isinstance(executor.device_lock("samx", dev), contextlib.nullcontext)
@@ -0,0 +1,232 @@
+"""
+Benchmark for the file writer.
+
+The benchmark fills a ScanStorage with synthetic scan data and writes it with the
+NexusFileWriter, either at the end of the scan or streamed in batches while the points
+are added. The scan data consists of scalar signals, 1D and 2D array signals and async
+devices with the concat types "extend", "append" or "replace". It reports the time to
+add the data to the scan storage, the time to write the file, the peak memory usage of
+the benchmark process and the size of the output files.
+
+Examples:
+    Write a scan with 100 scalar signals and 10000 points:
+    >>> python benchmark_file_writer.py --scalars 100 --points 10000
+
+    Stream a detector scan with 2D images to disk in batches of 50 points:
+    >>> python benchmark_file_writer.py --arrays-2d 1 --shape-2d 512 512 --points 500 --streaming --batch-size 50
+
+    Compare compression settings of the 1D signals:
+    >>> python benchmark_file_writer.py --arrays-1d 10 --layout '[{"min_ndim": 2, "compression": "lzf"}]'
+
+    Add async devices that extend their data with every reading:
+    >>> python benchmark_file_writer.py --async-devices 4 --async-readings 1000 --async-concat extend
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import numpy as np
+import psutil
+from bec_lib.core import bec_logger
+
+from file_writer import NexusFileWriter
+from file_writer.async_data import AsyncDataBuffer
+from file_writer.file_writer_manager import ScanStorage
+
+logger = bec_logger.logger
+
+
+class MemorySampler(threading.Thread):
+    """Sample the RSS of the current process in the background."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        super().__init__(daemon=True, name="memory_sampler")
+        self.process = psutil.Process()
+        self.interval = interval
+        self.peak_rss = self.process.memory_info().rss
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+            time.sleep(self.interval)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def create_file_writer(args) -> NexusFileWriter:
+    """
+    Create a NexusFileWriter outside of the file writer service. The writer only needs the
+    file writer config and the devices of the device manager.
+    """
+    config = {"plugin": args.plugin, "base_path": args.output_dir}
+    if args.layout:
+        config["layout"] = json.loads(args.layout)
+    if args.device_files:
+        config["device_files"] = {"devices": ["arr*"], "link": args.device_files}
+    manager = SimpleNamespace(file_writer_config=config, device_manager=SimpleNamespace(devices={}))
+    return NexusFileWriter(manager)
+
+
+def create_point(args, pointID: int, rng: np.random.Generator) -> dict:
+    """Create the scan segment of a point."""
+    timestamp = time.time()
+    data = {}
+    for ii in range(args.scalars):
+        name = f"scalar{ii}"
+        data[name] = {name: {"value": float(rng.random()), "timestamp": timestamp}}
+    for ii in range(args.arrays_1d):
+        name = f"arr1d_{ii}"
+        data[name] = {name: {"value": rng.random(args.size_1d), "timestamp": timestamp}}
+    for ii in range(args.arrays_2d):
+        name = f"arr2d_{ii}"
+        value = rng.integers(0, 1000, size=tuple(args.shape_2d), dtype=np.uint32)
+        data[name] = {name: {"value": value, "timestamp": timestamp}}
+    return data
+
+
+def add_async_data(args, storage: ScanStorage, rng: np.random.Generator) -> None:
+    """Add the readings of the async devices to the scan storage."""
+    for ii in range(args.async_devices):
+        name = f"async{ii}"
+        async_buffer = AsyncDataBuffer()
+        for _ in range(args.async_readings):
+            value = rng.random(args.async_size)
+            async_buffer.add({name: value}, args.async_concat)
+        storage.async_data[name] = async_buffer.get_data()
+
+
+def _file_size(file_path: str) -> int:
+    base, ext = os.path.splitext(file_path)
+    return sum(os.path.getsize(path) for path in [file_path, *glob.glob(f"{base}_*{ext}")])
+
+
+def run_benchmark(args) -> dict:
+    """Run the benchmark and return a summary of the results."""
+    os.makedirs(args.output_dir, exist_ok=True)
+    file_path = os.path.join(args.output_dir, f"benchmark_{uuid.uuid4().hex[:8]}.h5")
+    rng = np.random.default_rng(0)
+    file_writer = create_file_writer(args)
+    storage = ScanStorage(1, str(uuid.uuid4()))
+    storage.metadata = {"scan_number": 1, "benchmark": True}
+    storage.baseline = {
+        f"bl{ii}": {f"bl{ii}": {"value": float(ii), "timestamp": time.time()}}
+        for ii in range(args.baseline)
+    }
+
+    sampler = MemorySampler()
+    rss_start = sampler.process.memory_info().rss
+    sampler.start()
+    try:
+        start = time.time()
+        storage.start_time = start
+        if args.streaming:
+            file_writer.open_stream(storage.scanID, file_path, batch_size=args.batch_size)
+        for pointID in range(args.points):
+            storage.append(pointID, create_point(args, pointID, rng))
+            if args.streaming and len(storage.columns) >= args.batch_size:
+                file_writer.append_to_stream(storage.scanID, storage.pop_columns())
+        add_async_data(args, storage, rng)
+        storage.end_time = time.time()
+        storage.num_points = args.points
+        storage.scan_finished = True
+        fill_time = time.time() - start
+
+        start = time.time()
+        file_writer.write(file_path, storage)
+        write_time = time.time() - start
+    finally:
+        sampler.stop()
+        file_writer.shutdown()
+
+    file_size = _file_size(file_path)
+    if not args.keep:
+        base, ext = os.path.splitext(file_path)
+        for path in [file_path, *glob.glob(f"{base}_*{ext}")]:
+            os.remove(path)
+    return {
+        "mode": "streaming" if args.streaming else "memory",
+        "points": args.points,
+        "scalar_signals": args.scalars,
+        "array_1d_signals": args.arrays_1d,
+        "array_2d_signals": args.arrays_2d,
+        "async_devices": args.async_devices,
+        "async_concat": args.async_concat,
+        "fill_time_s": fill_time,
+        "write_time_s": write_time,
+        "total_time_s": fill_time + write_time,
+        "rss_start_mb": rss_start / 1e6,
+        "rss_peak_mb": sampler.peak_rss / 1e6,
+        "file_size_mb": file_size / 1e6,
+        "file_path": file_path if args.keep else None,
+    }
+
+
+def main():
+    """
+    Launch the file writer benchmark.
+    """
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--points", type=int, default=1000, help="number of points")
+    parser.add_argument("--scalars", type=int, default=20, help="number of scalar signals")
+    parser.add_argument("--arrays-1d", type=int, default=0, help="number of 1D array signals")
+    parser.add_argument("--size-1d", type=int, default=1000, help="length of the 1D arrays")
+    parser.add_argument("--arrays-2d", type=int, default=0, help="number of 2D array signals")
+    parser.add_argument(
+        "--shape-2d", type=int, nargs=2, default=[256, 256], help="shape of the 2D arrays"
+    )
+    parser.add_argument("--baseline", type=int, default=50, help="number of baseline devices")
+    parser.add_argument("--async-devices", type=int, default=0, help="number of async devices")
+    parser.add_argument(
+        "--async-readings", type=int, default=100, help="number of readings per async device"
+    )
+    parser.add_argument(
+        "--async-size", type=int, default=100, help="number of values per async reading"
+    )
+    parser.add_argument("--async-concat", choices=["extend", "append", "replace"], default="extend")
+    parser.add_argument(
+        "--streaming", action="store_true", help="stream the points to disk during the scan"
+    )
+    parser.add_argument("--batch-size", type=int, default=100, help="streaming batch size")
+    parser.add_argument("--layout", default=None, help="layout rules of the file writer as json")
+    parser.add_argument(
+        "--device-files",
+        choices=["external", "vds"],
+        default=None,
+        help="write the array signals to separate device files",
+    )
+    parser.add_argument("--plugin", default="default_NeXus_format", help="file writer plugin")
+    parser.add_argument(
+        "--output-dir",
+        default=os.path.join(tempfile.gettempdir(), "bec_file_writer_benchmark"),
+        help="directory of the output files",
+    )
+    parser.add_argument("--keep", action="store_true", help="keep the output files")
+    parser.add_argument("--json", action="store_true", help="print the results as json")
+    clargs = parser.parse_args()
+
+    bec_logger.level = bec_logger.LOGLEVEL.WARNING
+    results = run_benchmark(clargs)
+    if clargs.json:
+        print(json.dumps(results, indent=4))
+        return
+    for key, val in results.items():
+        if isinstance(val, float):
+            print(f"{key:>20}: {val:.2f}")
+        else:
+            print(f"{key:>20}: {val}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from .columns import GrowableArray
+
+
+class AsyncDataBuffer:
+    def __init__(self) -> None:
+        """
+        Accumulate the async readings of a device while the scan is running.
+
+        The concat mode is taken from the first reading ("async_update" in the message
+        metadata) and applied to every reading as soon as it is received:
+        "extend" concatenates the readings along their first axis, "append" collects the
+        readings in a list and "replace" only keeps the last reading.
+        """
+        self.concat_type = None
+        self.num_readings = 0
+        self._first = None
+        self._signals = {}
+
+    def add(self, signals: dict, concat_type: str = None) -> None:
+        """
+        Add a reading.
+
+        Args:
+            signals (dict): Signals of the reading
+            concat_type (str, optional): Concat mode. Only used for the first reading.
+        """
+        if self.concat_type is None:
+            self.concat_type = concat_type or "append"
+        self.num_readings += 1
+        if self.num_readings == 1:
+            self._first = signals
+        for key, value in signals.items():
+            if self.concat_type == "extend":
+                self._signals.setdefault(key, GrowableArray()).extend(value)
+            elif self.concat_type == "append":
+                self._signals.setdefault(key, []).append(value)
+            elif self.concat_type == "replace":
+                self._signals[key] = value
+
+    def get_data(self) -> dict:
+        """
+        Get the accumulated data. A single reading is returned unchanged.
+        """
+        if self.num_readings == 1:
+            return self._first
+        if self.concat_type == "extend":
+            return {key: val.get() for key, val in self._signals.items()}
+        return dict(self._signals)
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+class GrowableArray:
+    def __init__(self, initial_capacity: int = 1024, dtype=None) -> None:
+        """
+        Array that grows along its first axis. The capacity is doubled whenever it is
+        exhausted, so that extending the array costs amortized O(1) per element.
+        The dtype is promoted if values of a wider type are added.
+
+        Args:
+            initial_capacity (int, optional): Initial number of rows. Defaults to 1024.
+            dtype (optional): Initial data type. Defaults to the type of the first values.
+        """
+        self.initial_capacity = initial_capacity
+        self.dtype = dtype
+        self.buffer = None
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, value) -> None:
+        """Append a single row."""
+        value = np.asarray(value, dtype=self.dtype if self.buffer is None else None)
+        self.extend(value.reshape(1, *value.shape))
+
+    def extend(self, values) -> None:
+        """Append rows."""
+        values = np.asarray(values, dtype=self.dtype if self.buffer is None else None)
+        if values.ndim == 0:
+            values = values.reshape(1)
+        if self.buffer is None:
+            capacity = max(self.initial_capacity, len(values))
+            self.buffer = np.empty((capacity, *values.shape[1:]), dtype=values.dtype)
+        elif values.shape[1:] != self.buffer.shape[1:]:
+            raise ValueError(
+                f"Cannot extend data of shape {self.buffer.shape[1:]} with shape {values.shape[1:]}."
+            )
+        required = self.size + len(values)
+        if required > len(self.buffer) or not np.can_cast(values.dtype, self.buffer.dtype):
+            capacity = len(self.buffer)
+            while capacity < required:
+                capacity *= 2
+            dtype = np.result_type(self.buffer.dtype, values.dtype)
+            buffer = np.empty((capacity, *self.buffer.shape[1:]), dtype=dtype)
+            buffer[: self.size] = self.buffer[: self.size]
+            self.buffer = buffer
+        self.buffer[self.size : required] = values
+        self.size = required
+
+    def get(self) -> np.ndarray:
+        """Get the data as a view on the buffer."""
+        if self.buffer is None:
+            return np.empty(0, dtype=self.dtype)
+        return self.buffer[: self.size]
+
+
+class SignalColumn:
+    def __init__(self) -> None:
+        """
+        Values, timestamps and pointIDs of a signal.
+
+        Numeric values (scalars or arrays of constant shape) are stored in typed, growable
+        arrays. All other values (e.g. strings, dicts or arrays of varying shape) are kept in
+        a list.
+        """
+        self.point_ids = GrowableArray(dtype=np.int64)
+        self.timestamps = GrowableArray(dtype=np.float64)
+        self.has_timestamps = False
+        self.values = None
+
+    def __len__(self) -> int:
+        return len(self.point_ids)
+
+    def append(self, pointID: int, value, timestamp=None) -> None:
+        """
+        Append the reading of a point.
+
+        Args:
+            pointID (int): Point ID
+            value: Value of the signal
+            timestamp (float, optional): Timestamp of the reading
+        """
+        if self.values is None:
+            self.values = GrowableArray() if self._is_numeric(value) else []
+        if isinstance(self.values, GrowableArray):
+            if self._is_numeric(value):
+                try:
+                    self.values.append(value)
+                except ValueError:
+                    # the shape has changed
+                    self.values = list(self.values.get()) + [value]
+            else:
+                self.values = list(self.values.get()) + [value]
+        else:
+            self.values.append(value)
+        self.point_ids.append(pointID if pointID is not None else -1)
+        if timestamp is not None:
+            self.has_timestamps = True
+        self.timestamps.append(np.nan if timestamp is None else timestamp)
+
+    @staticmethod
+    def _is_numeric(value) -> bool:
+        if isinstance(value, (bool, int, float, np.number, np.bool_)):
+            return True
+        return isinstance(value, np.ndarray) and value.dtype.kind in "biuf"
+
+    def extend(self, other: SignalColumn) -> None:
+        """Append all readings of another column."""
+        values = other.values.get() if isinstance(other.values, GrowableArray) else other.values
+        timestamps = other.timestamps.get()
+        for ii, pointID in enumerate(other.point_ids.get()):
+            timestamp = timestamps[ii] if other.has_timestamps else None
+            self.append(int(pointID), values[ii], timestamp)
+
+    def _get_order(self):
+        # None if the points are stored in order and without duplicates
+        point_ids = self.point_ids.get()
+        if len(point_ids) < 2 or np.all(point_ids[1:] > point_ids[:-1]):
+            return None
+        order = np.argsort(point_ids, kind="stable")
+        sorted_ids = point_ids[order]
+        # keep the last reading of each point
+        return order[np.append(sorted_ids[1:] != sorted_ids[:-1], True)]
+
+    def get(self) -> tuple:
+        """
+        Get the readings sorted by pointID. Numeric values of points that have been received
+        in order are returned as views on the column buffers.
+
+        Returns:
+            tuple: pointIDs, values and timestamps (None if no timestamps have been received)
+        """
+        order = self._get_order()
+        point_ids = self.point_ids.get()
+        timestamps = self.timestamps.get() if self.has_timestamps else None
+        if isinstance(self.values, GrowableArray):
+            values = self.values.get()
+            if order is not None:
+                values = values[order]
+        else:
+            values = self.values if order is None else [self.values[ii] for ii in order]
+        if order is not None:
+            point_ids = point_ids[order]
+            timestamps = timestamps[order] if timestamps is not None else None
+        return point_ids, values, timestamps
+
+
+class ScanColumns:
+    def __init__(self) -> None:
+        """
+        Columnar store of the scan segments of a scan.
+
+        Each signal is stored in its own SignalColumn. Entries of a scan segment that are not
+        of the form device -> signal -> {value, timestamp} are stored as a column of the
+        device with the signal name None.
+        """
+        self.columns = {}
+        self._point_ids = set()
+
+    @property
+    def num_points(self) -> int:
+        """Number of distinct points"""
+        return len(self._point_ids)
+
+    def __len__(self) -> int:
+        return self.num_points
+
+    def __bool__(self) -> bool:
+        return self.num_points > 0
+
+    @classmethod
+    def from_segments(cls, segments: dict) -> ScanColumns:
+        """
+        Create a columnar store from scan segments.
+
+        Args:
+            segments (dict): Scan segments as pointID -> device -> signal -> {value, timestamp}
+        """
+        columns = cls()
+        for pointID in sorted(segments):
+            columns.append(pointID, segments[pointID])
+        return columns
+
+    def append(self, pointID: int, data: dict) -> None:
+        """
+        Append the data of a point.
+
+        Args:
+            pointID (int): Point ID
+            data (dict): Data as device -> signal -> {value, timestamp}
+        """
+        self._point_ids.add(pointID)
+        for dev, signals in data.items():
+            if not self._is_device_reading(signals):
+                self._get_column(dev, None).append(pointID, signals)
+                continue
+            for signal_name, signal in signals.items():
+                self._get_column(dev, signal_name).append(
+                    pointID, signal.get("value"), signal.get("timestamp")
+                )
+
+    @staticmethod
+    def _is_device_reading(signals) -> bool:
+        if not isinstance(signals, dict) or not signals:
+            return False
+        for signal in signals.values():
+            if not isinstance(signal, dict) or "value" not in signal:
+                return False
+            if not set(signal).issubset({"value", "timestamp"}):
+                return False
+        return True
+
+    def _get_column(self, dev: str, signal_name: str) -> SignalColumn:
+        column = self.columns.get((dev, signal_name))
+        if column is None:
+            column = self.columns[(dev, signal_name)] = SignalColumn()
+        return column
+
+    def extend(self, other: ScanColumns) -> None:
+        """Append all readings of another columnar store."""
+        self._point_ids |= other._point_ids
+        for (dev, signal_name), column in other.columns.items():
+            self._get_column(dev, signal_name).extend(column)
+
+    def get_device_storage(self) -> dict:
+        """
+        Get the signals in the format used by the file writer plugins, i.e.
+        device -> signal -> {value, timestamp}. Entries without a signal name are
+        returned as a list of the raw entries.
+        """
+        device_storage = {}
+        for (dev, signal_name), column in self.columns.items():
+            _, values, timestamps = column.get()
+            if signal_name is None:
+                device_storage[dev] = list(values)
+                continue
+            signal = {"value": values}
+            if timestamps is not None:
+                signal["timestamp"] = timestamps
+            device_storage.setdefault(dev, {})[signal_name] = signal
+        return device_storage
+
+    def to_segments(self) -> dict:
+        """
+        Convert the store back to scan segments (pointID -> device -> signal -> {value, timestamp}).
+        """
+        segments = {}
+        for (dev, signal_name), column in self.columns.items():
+            point_ids, values, timestamps = column.get()
+            for ii, pointID in enumerate(point_ids.tolist()):
+                if signal_name is None:
+                    segments.setdefault(pointID, {})[dev] = values[ii]
+                    continue
+                value = values[ii]
+                signal = {"value": value.item() if isinstance(value, np.generic) else value}
+                if timestamps is not None and not np.isnan(timestamps[ii]):
+                    signal["timestamp"] = float(timestamps[ii])
+                segments.setdefault(pointID, {}).setdefault(dev, {})[signal_name] = signal
+        return segments
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import fnmatch
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import h5py
+import numpy as np
+from bec_lib.core import bec_logger
+
+from .layout import LayoutPolicy
+
+logger = bec_logger.logger
+
+BEC_COLLECTION = "entry/collection/bec"
+
+# numeric arrays of at least this size are passed to the worker processes through
+# shared memory instead of being pickled
+SHARED_MEMORY_MIN_BYTES = 1024**2
+
+
+class SharedArray:
+    """Reference to a numpy array that has been copied to a shared memory block."""
+
+    __slots__ = ("name", "shape", "dtype")
+
+    def __init__(self, name: str, shape: tuple, dtype: str) -> None:
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+
+def share_arrays(data, blocks: list):
+    """
+    Copy the large numeric arrays of the device data to shared memory blocks.
+
+    Args:
+        data: Device data
+        blocks (list): List the created shared memory blocks are appended to
+
+    Returns:
+        Device data with the arrays replaced by SharedArrays
+    """
+    if isinstance(data, dict):
+        return {key: share_arrays(val, blocks) for key, val in data.items()}
+    if (
+        isinstance(data, np.ndarray)
+        and data.dtype.kind in "biufc"
+        and data.nbytes >= SHARED_MEMORY_MIN_BYTES
+    ):
+        block = shared_memory.SharedMemory(create=True, size=data.nbytes)
+        blocks.append(block)
+        np.ndarray(data.shape, dtype=data.dtype, buffer=block.buf)[...] = data
+        return SharedArray(block.name, data.shape, data.dtype.str)
+    return data
+
+
+def attach_arrays(data, blocks: list):
+    """
+    Map the SharedArrays of the device data to numpy arrays.
+
+    Args:
+        data: Device data as returned by share_arrays
+        blocks (list): List the attached shared memory blocks are appended to
+
+    Returns:
+        Device data with numpy arrays backed by the shared memory blocks
+    """
+    if isinstance(data, dict):
+        return {key: attach_arrays(val, blocks) for key, val in data.items()}
+    if isinstance(data, SharedArray):
+        block = shared_memory.SharedMemory(name=data.name)
+        blocks.append(block)
+        return np.ndarray(data.shape, dtype=np.dtype(data.dtype), buffer=block.buf)
+    return data
+
+
+def release_blocks(blocks: list, unlink: bool = False) -> None:
+    """Close and optionally unlink shared memory blocks."""
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            logger.warning(f"Shared memory block {block.name} is still in use.")
+        if unlink:
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def write_device_file(
+    file_path: str, dev: str, data: dict, layout_policy: LayoutPolicy = None, device_class=None
+) -> dict:
+    """
+    Write the data of a single device to its own HDF5 file. The data is stored in
+    /entry/collection/bec/<device>, i.e. at the same location as in the master file.
+    This function is executed in a worker process.
+
+    Args:
+        file_path (str): Path of the device file
+        dev (str): Device name
+        data (dict): Device data as signal -> {value, timestamp}. Large arrays may be
+            given as SharedArrays.
+        layout_policy (LayoutPolicy, optional): Layout policy of the file writer
+        device_class (str, optional): Device class of the device
+
+    Returns:
+        dict: Shape and dtype (None for non-numeric data) of each dataset, keyed by its path
+            relative to the device group
+    """
+    # pylint: disable=import-outside-toplevel,cyclic-import
+    from .file_writer import HDF5Storage, HDF5StorageWriter
+
+    storage = HDF5Storage()
+    entry = storage.create_group("entry")
+    entry.attrs["NX_class"] = "NXentry"
+    collection = entry.create_group("collection")
+    collection.attrs["NX_class"] = "NXcollection"
+    collection.create_group("bec")
+    blocks = []
+    try:
+        with h5py.File(file_path, "w") as file:
+            HDF5StorageWriter.write_to_file(
+                storage._storage,
+                {dev: attach_arrays(data, blocks)},
+                file,
+                layout_policy=layout_policy,
+                device_classes={dev: device_class},
+            )
+            datasets = {}
+
+            def _collect(name, obj):
+                if isinstance(obj, h5py.Dataset):
+                    # only numeric datasets can be mapped to virtual datasets
+                    numeric = obj.dtype.kind in "biuf"
+                    datasets[name] = (obj.shape, obj.dtype.str if numeric else None)
+
+            file[f"{BEC_COLLECTION}/{dev}"].visititems(_collect)
+    finally:
+        # the blocks are unlinked by the file writer once the file has been written
+        release_blocks(blocks)
+    return datasets
+
+
+class DeviceFileWriter:
+    def __init__(self, config: dict = None, layout_policy: LayoutPolicy = None) -> None:
+        """
+        Write the data of selected devices to separate HDF5 files in worker processes.
+        Large numeric arrays are passed to the workers through shared memory, so that they
+        are not pickled. The master file links to the device files, either with external
+        links to the device groups ("external") or with virtual datasets ("vds").
+
+        Args:
+            config (dict, optional): Configuration with the keys "devices" (glob patterns of
+                device names or device classes), "num_workers" (default: 2) and "link"
+                ("external" or "vds", default: "external").
+            layout_policy (LayoutPolicy, optional): Layout policy of the file writer
+        """
+        config = config or {}
+        self.patterns = config.get("devices", [])
+        self.num_workers = config.get("num_workers", 2)
+        self.link = config.get("link", "external")
+        if self.link not in ["external", "vds"]:
+            raise ValueError(f"Unsupported link type {self.link} for device files.")
+        self.layout_policy = layout_policy
+        self._executor = None
+
+    @property
+    def enabled(self) -> bool:
+        """True if devices are configured to be written to separate files"""
+        return bool(self.patterns)
+
+    def select_devices(self, device_storage: dict, device_classes: dict) -> list:
+        """
+        Get the devices of the scan that are written to separate files. Only device readings,
+        i.e. signal -> {value, timestamp} dictionaries, are split off.
+
+        Args:
+            device_storage (dict): Device storage of the scan
+            device_classes (dict): Device classes by device name
+
+        Returns:
+            list: Device names
+        """
+        devices = []
+        for dev, data in device_storage.items():
+            if not isinstance(data, dict) or not data:
+                continue
+            if not all(isinstance(signal, dict) and "value" in signal for signal in data.values()):
+                continue
+            names = [dev, device_classes.get(dev) or ""]
+            if any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns for name in names):
+                devices.append(dev)
+        return devices
+
+    @staticmethod
+    def get_file_path(file_path: str, dev: str) -> str:
+        """
+        Get the path of the file of a device, e.g. S00001_eiger.h5 for the master file S00001.h5.
+        """
+        base, ext = os.path.splitext(file_path)
+        return f"{base}_{dev}{ext}"
+
+    def submit(self, file_path: str, dev: str, data: dict, device_class: str = None) -> Future:
+        """
+        Write the file of a device in a worker process. Large numeric arrays are copied to
+        shared memory before this method returns; all other data is pickled and must not be
+        modified until the future is done.
+
+        Args:
+            file_path (str): Path of the master file
+            dev (str): Device name
+            data (dict): Device data as signal -> {value, timestamp}
+            device_class (str, optional): Device class of the device
+
+        Returns:
+            Future: Future returning the datasets of the device file
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.num_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        blocks = []
+        try:
+            future = self._executor.submit(
+                write_device_file,
+                self.get_file_path(file_path, dev),
+                dev,
+                share_arrays(data, blocks),
+                self.layout_policy,
+                device_class,
+            )
+        except Exception:
+            release_blocks(blocks, unlink=True)
+            raise
+        future.add_done_callback(lambda _: release_blocks(blocks, unlink=True))
+        return future
+
+    def link_external(self, file: h5py.File, file_path: str, dev: str) -> None:
+        """
+        Link the device group of a device file to the master file.
+
+        Args:
+            file (h5py.File): Master file
+            file_path (str): Path of the master file
+            dev (str): Device name
+        """
+        target = os.path.basename(self.get_file_path(file_path, dev))
+        file.require_group(BEC_COLLECTION)[dev] = h5py.ExternalLink(
+            target, f"/{BEC_COLLECTION}/{dev}"
+        )
+
+    def link_virtual(self, file: h5py.File, file_path: str, dev: str, datasets: dict) -> None:
+        """
+        Map the datasets of a device file to virtual datasets of the master file.
+        Non-numeric datasets are linked as external links.
+
+        Args:
+            file (h5py.File): Master file
+            file_path (str): Path of the master file
+            dev (str): Device name
+            datasets (dict): Shape and dtype of the datasets as returned by write_device_file
+        """
+        target = os.path.basename(self.get_file_path(file_path, dev))
+        group = file.require_group(BEC_COLLECTION).require_group(dev)
+        for name, (shape, dtype) in datasets.items():
+            path = f"/{BEC_COLLECTION}/{dev}/{name}"
+            parent = group.require_group(os.path.dirname(name)) if "/" in name else group
+            if dtype is None:
+                parent[os.path.basename(name)] = h5py.ExternalLink(target, path)
+                continue
+            layout = h5py.VirtualLayout(shape=shape, dtype=np.dtype(dtype))
+            layout[...] = h5py.VirtualSource(target, path, shape=shape)
+            parent.create_virtual_dataset(os.path.basename(name), layout)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -8,20 +8,20 @@ import traceback
 import typing
 
 import h5py
-import xmltodict
+import numpy as np
 from bec_lib.core import bec_logger
 
 import file_writer_plugins as fwp
 
+from .columns import ScanColumns
+from .device_files import DeviceFileWriter
+from .layout import DatasetLayout, LayoutPolicy
+from .layout_template import LayoutNode, get_type, load_layout_template, resolve_value
 from .merged_dicts import merge_dicts
 
 logger = bec_logger.logger
 
 
-class NeXusLayoutError(Exception):
-    pass
-
-
 class FileWriter(abc.ABC):
     def __init__(self, file_writer_manager):
         self.file_writer_manager = file_writer_manager
@@ -33,119 +33,93 @@ class FileWriter(abc.ABC):
     def write(self, file_path: str, data):
         ...
 
+    def shutdown(self):
+        ...
+
     @staticmethod
-    def _create_device_data_storage(data):
+    def _create_device_data_storage(data, scan_segments: dict = None):
         device_storage = {}
         if data.baseline:
             device_storage.update(data.baseline)
         if data.async_data:
             device_storage.update(data.async_data)
-        keys = list(data.scan_segments.keys())
+        if scan_segments is None:
+            device_storage.update(data.columns.get_device_storage())
+            return device_storage
+        keys = list(scan_segments.keys())
         keys.sort()
         for point in keys:
-            for dev in data.scan_segments[point]:
+            for dev in scan_segments[point]:
                 if dev not in device_storage:
-                    device_storage[dev] = [data.scan_segments[point][dev]]
+                    device_storage[dev] = [scan_segments[point][dev]]
                     continue
-                device_storage[dev].append(data.scan_segments[point][dev])
+                device_storage[dev].append(scan_segments[point][dev])
         return device_storage
 
 
 class XMLWriter:
     @staticmethod
     def get_type(type_string: str):
-        if type_string == "float":
-            return float
-        if type_string == "string":
-            return str
-        if type_string == "int":
-            return int
-        raise NeXusLayoutError(f"Unsupported data type {type_string}.")
-
-    def get_value(self, value, entry, source, data_type):
-        if source == "constant":
-            if data_type:
-                return self.get_type(data_type)(value)
-            return value
-        return entry
-
-    def add_group(self, container, val):
-        name = val.pop("@name")
-        group = container.create_group(name)
-        self.add_content(group, val)
-
-    def add_dataset(self, container, val):
-        name = val.pop("@name")
-        source = val.pop("@source")
-        value = val.pop("@value", None)
-        data_type = val.pop("@type", None)
-        entry = val.pop("@entry", None)
-
-        data = self.get_value(value=value, entry=entry, source=source, data_type=data_type)
+        return get_type(type_string)
+
+    def get_value(self, node: LayoutNode):
+        if node.source == "constant":
+            return node.value
+        return node.entry
+
+    def add_group(self, container, node: LayoutNode):
+        group = container.create_group(node.name)
+        self.add_content(group, node.children)
+
+    def add_dataset(self, container, node: LayoutNode):
+        data = self.get_value(node)
         if data is None:
             return
-        dataset = container.create_dataset(name, data=data)
-        self.add_content(dataset, val)
+        dataset = container.create_dataset(node.name, data=data)
+        self.add_content(dataset, node.children)
         return
 
-    def add_attribute(self, container, val):
-        name = val.pop("@name")
-        source = val.pop("@source")
-        value = val.pop("@value", None)
-        data_type = val.pop("@type", None)
-        entry = val.pop("@entry", None)
-
-        data = self.get_value(value=value, entry=entry, source=source, data_type=data_type)
-        setattr(container.attrs, name, data)
+    def add_attribute(self, container, node: LayoutNode):
+        data = self.get_value(node)
+        if data is None:
+            return
+        container.attrs[node.name] = data
 
-    def add_hardlink(self, container, val):
+    def add_hardlink(self, container, node: LayoutNode):
         pass
 
-    def add_softlink(self, container, val):
+    def add_softlink(self, container, node: LayoutNode):
         pass
 
-    def add_content(self, container, layout):
-        for key, values in layout.items():
-            if not isinstance(values, list):
-                values = [values]
-            for val in values:
-                if key == "group":
-                    self.add_group(container, val)
-                elif key == "hdf5_layout":
-                    self.add_base_entry(container, val)
-                elif key == "attribute":
-                    self.add_attribute(container, val)
-                elif key == "dataset":
-                    self.add_dataset(container, val)
-                elif key == "hardlink":
-                    self.add_hardlink(container, val)
-                elif key == "softlink":
-                    self.add_softlink(container, val)
-                else:
-                    pass
-                    # raise NeXusLayoutError()
-
-    def add_base_entry(self, container, val):
-        self.add_group(container, val["group"])
+    def add_content(self, container, nodes: tuple):
+        for node in nodes:
+            if node.node_type == "group":
+                self.add_group(container, node)
+            elif node.node_type == "attribute":
+                self.add_attribute(container, node)
+            elif node.node_type == "dataset":
+                self.add_dataset(container, node)
+            elif node.node_type == "hardlink":
+                self.add_hardlink(container, node)
+            elif node.node_type == "softlink":
+                self.add_softlink(container, node)
 
 
 class NeXusFileXMLWriter(FileWriter, XMLWriter):
     def configure(self, layout_file, **kwargs):
         self.layout_file = layout_file
-        with open(self.layout_file, "br") as f:
-            self.layout = xmltodict.parse(f)
-
-    def get_value(self, value, entry, source, data_type):
-        if source == "constant":
-            if data_type:
-                return self.get_type(data_type)(value)
-            return value
-        if source == "bec":
-            return self.data.get(entry)
-        return entry
+        # the layout is compiled once and reused for all files
+        self.layout = load_layout_template(self.layout_file)
+
+    def get_value(self, node: LayoutNode):
+        if node.source == "constant":
+            return node.value
+        if node.source == "bec":
+            return self.data.get(node.entry)
+        return node.entry
 
     def write(self, file_path: str, data):
-        print(f"writing file to {file_path}")
+        logger.info(f"writing file to {file_path}")
         self.data = self._create_device_data_storage(data)
 
         with h5py.File(file_path, "w") as file:
@@ -162,6 +136,7 @@ class HDF5Storage:
         self._storage_type = storage_type
         self.attrs = {}
         self._data = data
+        self.layout = None
 
     def create_group(self, name: str) -> HDF5Storage:
         """
@@ -176,18 +151,23 @@ class HDF5Storage:
         self._storage[name] = HDF5Storage(storage_type="group")
         return self._storage[name]
 
-    def create_dataset(self, name: str, data: typing.Any) -> HDF5Storage:
+    def create_dataset(
+        self, name: str, data: typing.Any, layout: DatasetLayout = None
+    ) -> HDF5Storage:
         """
         Create a dataset in the HDF5 storage.
 
         Args:
             name (str): Dataset name
             data (typing.Any): Dataset data
+            layout (DatasetLayout, optional): Chunking, compression and dtype of the dataset.
+                If not given, the layout policy of the file writer is used.
 
         Returns:
             HDF5Storage: Dataset storage
         """
         self._storage[name] = HDF5Storage(storage_type="dataset", data=data)
+        self._storage[name].layout = layout
         return self._storage[name]
 
     def create_soft_link(self, name: str, target: str) -> HDF5Storage:
@@ -223,9 +203,15 @@ class HDF5Storage:
 
 class HDF5StorageWriter:
     device_storage = None
+    data = None
+    file_references = None
+    layout_policy = None
+    device_classes = {}
+    _bec_device = None
 
     def add_group(self, name: str, container: typing.Any, val: HDF5Storage):
-        group = container.create_group(name)
+        # groups may already exist if the scan data has been streamed to the file
+        group = container.require_group(name)
         self.add_attribute(group, val.attrs)
         self.add_content(group, val._storage)
 
@@ -233,30 +219,51 @@ class HDF5StorageWriter:
             for key, value in self.device_storage.items():
                 if value is None:
                     continue
+                self._bec_device = key
                 if isinstance(value, dict):
                     sub_storage = HDF5Storage(key)
                     dict_to_storage(sub_storage, value)
                     self.add_group(key, group, sub_storage)
                     # self.add_content(group, sub_storage._storage)
+                    self._bec_device = None
                     continue
                 if isinstance(value, list) and isinstance(value[0], dict):
                     merged_dict = merge_dicts(value)
                     sub_storage = HDF5Storage(key)
                     dict_to_storage(sub_storage, merged_dict)
                     self.add_group(key, group, sub_storage)
+                    self._bec_device = None
                     continue
+                self._bec_device = None
 
                 group.create_dataset(name=key, data=value)
 
     def add_dataset(self, name: str, container: typing.Any, val: HDF5Storage):
         try:
-            data = val._data
+            data = resolve_value(val._data, self.data, self.file_references)
             if data is None:
                 return
+            if isinstance(data, h5py.Dataset) and name in container and container[name] == data:
+                # the dataset has already been written by the stream writer
+                return
             if isinstance(data, list):
                 if data and isinstance(data[0], dict):
                     data = json.dumps(data)
-            dataset = container.create_dataset(name, data=data)
+            kwargs = {}
+            layout = val.layout
+            if layout is None and self.layout_policy is not None:
+                if self._bec_device is None:
+                    layout = self.layout_policy.get_layout(name, data)
+                else:
+                    # device data is stored as <device>/<signal>/{value,timestamp}
+                    layout = self.layout_policy.get_layout(
+                        container.name.split("/")[-1],
+                        data,
+                        self.device_classes.get(self._bec_device),
+                    )
+            if layout is not None:
+                data, kwargs = layout.apply(data)
+            dataset = container.create_dataset(name, data=data, **kwargs)
             self.add_attribute(dataset, val.attrs)
             self.add_content(dataset, val._storage)
         except Exception as exc:
@@ -266,6 +273,7 @@ class HDF5StorageWriter:
 
     def add_attribute(self, container: typing.Any, attributes: dict):
         for name, value in attributes.items():
+            value = resolve_value(value, self.data, self.file_references)
             if value is not None:
                 container.attrs[name] = value
 
@@ -273,10 +281,11 @@ class HDF5StorageWriter:
         pass
 
     def add_softlink(self, name, container, val):
-        container[name] = h5py.SoftLink(val._data)
+        container[name] = h5py.SoftLink(resolve_value(val._data, self.data, self.file_references))
 
     def add_external_link(self, name, container, val):
-        container[name] = h5py.ExternalLink(val._data.get("file"), val._data.get("entry"))
+        target = resolve_value(val._data.get("file"), self.data, self.file_references)
+        container[name] = h5py.ExternalLink(target, val._data.get("entry"))
 
     def add_content(self, container, storage):
         for name, val in storage.items():
@@ -294,15 +303,373 @@ class HDF5StorageWriter:
                 pass
 
     @classmethod
-    def write_to_file(cls, writer_storage, device_storage, file):
+    def write_to_file(
+        cls,
+        writer_storage,
+        device_storage,
+        file,
+        layout_policy: LayoutPolicy = None,
+        device_classes: dict = None,
+        data: dict = None,
+        file_references: dict = None,
+    ):
+        """
+        Write the storage of a plugin to a file.
+
+        Args:
+            writer_storage (dict): Content of the plugin storage
+            device_storage (dict): Device data written to /entry/collection/bec
+            file (h5py.File): Target file
+            layout_policy (LayoutPolicy, optional): Layout policy of the datasets
+            device_classes (dict, optional): Device classes used by the layout policy
+            data (dict, optional): Scan data used to resolve the DataBindings of compiled
+                plugin layouts. Defaults to device_storage.
+            file_references (dict, optional): File references used to resolve the
+                DataBindings of compiled plugin layouts
+        """
         writer = cls()
         writer.device_storage = device_storage
+        writer.data = device_storage if data is None else data
+        writer.file_references = file_references or {}
+        writer.layout_policy = layout_policy
+        writer.device_classes = device_classes or {}
         writer.add_content(file, writer_storage)
 
 
+class HDF5StreamWriter:
+    """
+    Write scan segments incrementally to an HDF5 file.
+
+    Numeric and string signals are appended to resizable, chunked datasets in
+    /entry/collection/bec/<device>/<signal>/{value,timestamp}, indexed by pointID.
+    Signals that cannot be stored in such a dataset (e.g. dicts or arrays of varying shape)
+    as well as signals that appear after SWMR mode has been enabled are kept in memory
+    and are written together with the metadata at the end of the scan.
+    """
+
+    chunk_bytes = 1024**2
+
+    def __init__(
+        self,
+        file_path: str,
+        batch_size: int = 100,
+        swmr: bool = False,
+        layout_policy: LayoutPolicy = None,
+        device_classes: dict = None,
+    ) -> None:
+        self.file_path = file_path
+        self.batch_size = batch_size
+        self.swmr = swmr
+        self.layout_policy = layout_policy
+        self.device_classes = device_classes or {}
+        self.file = None
+        self.collection = None
+        self.datasets = {}
+        self.residual = {}
+        self._written_points = {}
+        self._residual_signals = set()
+        self._obsolete_groups = []
+
+    def open(self) -> None:
+        """Create the file and the base groups."""
+        self.file = h5py.File(self.file_path, "w", libver="latest")
+        entry = self.file.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        collection = entry.create_group("collection")
+        collection.attrs["NX_class"] = "NXcollection"
+        self.collection = collection.create_group("bec")
+
+    def append(self, columns: typing.Union[ScanColumns, dict]) -> None:
+        """
+        Append scan data to the file.
+
+        Args:
+            columns (ScanColumns | dict): Scan data as ScanColumns or as scan segments
+                (pointID -> device -> signal -> {value, timestamp})
+        """
+        if isinstance(columns, dict):
+            columns = ScanColumns.from_segments(columns)
+        if not columns:
+            return
+        for key, column in columns.columns.items():
+            point_ids, values, timestamps = column.get()
+            if key[1] is None:
+                # entries that are not device readings are written at the end of the scan
+                for ii, pointID in enumerate(point_ids.tolist()):
+                    self.residual.setdefault(pointID, {})[key[0]] = values[ii]
+                continue
+            datasets = self.datasets.get(key)
+            if datasets is None and key not in self._residual_signals:
+                datasets = self._create_datasets(*key, values[0])
+            if datasets is not None:
+                try:
+                    self._write_column(datasets, point_ids, values, timestamps)
+                    self._written_points.setdefault(key, set()).update(point_ids.tolist())
+                    continue
+                except (TypeError, ValueError) as exc:
+                    logger.warning(
+                        f"Failed to stream signal {key[1]} of device {key[0]}: {exc}. The signal"
+                        " will be written at the end of the scan."
+                    )
+                    self._demote(key)
+            self._residual_signals.add(key)
+            for ii, pointID in enumerate(point_ids.tolist()):
+                signal = {"value": values[ii]}
+                if timestamps is not None:
+                    signal["timestamp"] = timestamps[ii]
+                self.residual.setdefault(pointID, {}).setdefault(key[0], {})[key[1]] = signal
+
+        if self.swmr and not self.file.swmr_mode:
+            self.file.swmr_mode = True
+        self.file.flush()
+
+    def _create_datasets(self, dev: str, signal_name: str, value) -> tuple:
+        if self.file.swmr_mode:
+            logger.warning(
+                f"Signal {signal_name} of device {dev} appeared after the file was switched to SWMR"
+                " mode and will be written at the end of the scan."
+            )
+            return None
+        if isinstance(value, str):
+            dtype = h5py.string_dtype()
+            shape = ()
+        else:
+            value = np.asarray(value)
+            if value.dtype.kind not in "biuf":
+                return None
+            # scalars may change between int and float during a scan
+            dtype = np.float64 if value.ndim == 0 else value.dtype
+            shape = value.shape
+        kwargs = {}
+        layout = None
+        if self.layout_policy is not None and dtype != h5py.string_dtype():
+            layout = self.layout_policy.get_layout(
+                signal_name,
+                np.broadcast_to(np.zeros((), dtype=dtype), (self.batch_size, *shape)),
+                self.device_classes.get(dev),
+            )
+        if layout is not None:
+            if layout.dtype is not None:
+                dtype = np.dtype(layout.dtype)
+            kwargs = {
+                key: val
+                for key, val in layout.apply(np.zeros((1, *shape), dtype=dtype))[1].items()
+                if key != "chunks"
+            }
+        row_size = np.dtype(dtype).itemsize * int(np.prod(shape))
+        rows = max(1, min(self.batch_size, self.chunk_bytes // max(1, row_size)))
+        group = self.collection.require_group(dev).require_group(signal_name)
+        value_dataset = group.create_dataset(
+            "value",
+            shape=(0, *shape),
+            maxshape=(None, *shape),
+            dtype=dtype,
+            chunks=(rows, *shape),
+            **kwargs,
+        )
+        timestamp_dataset = group.create_dataset(
+            "timestamp", shape=(0,), maxshape=(None,), dtype=np.float64, chunks=(rows,)
+        )
+        self.datasets[(dev, signal_name)] = (value_dataset, timestamp_dataset)
+        return value_dataset, timestamp_dataset
+
+    @staticmethod
+    def _write_column(datasets: tuple, point_ids: np.ndarray, values, timestamps) -> None:
+        value_dataset, timestamp_dataset = datasets
+        if not isinstance(values, np.ndarray):
+            values = np.asarray(values)
+        if values.shape[1:] != value_dataset.shape[1:]:
+            raise ValueError(f"Expected shape {value_dataset.shape[1:]}, got {values.shape[1:]}.")
+        if timestamps is None:
+            timestamps = np.full(len(point_ids), np.nan)
+        size = max(int(point_ids[-1]) + 1, value_dataset.shape[0])
+        if size > value_dataset.shape[0]:
+            value_dataset.resize(size, axis=0)
+            timestamp_dataset.resize(size, axis=0)
+        start = int(point_ids[0])
+        if point_ids[-1] - start + 1 == len(point_ids):
+            # consecutive pointIDs are written in a single operation
+            value_dataset[start : start + len(point_ids)] = values
+            timestamp_dataset[start : start + len(point_ids)] = timestamps
+            return
+        # h5py supports fancy indexing with increasing indices
+        value_dataset[point_ids] = values
+        timestamp_dataset[point_ids] = timestamps
+
+    def _demote(self, key: tuple) -> None:
+        # move the data that has already been streamed back to memory
+        value_dataset, timestamp_dataset = self.datasets.pop(key)
+        self._obsolete_groups.append(value_dataset.parent.name)
+        point_ids = sorted(self._written_points.pop(key, ()))
+        if not point_ids:
+            return
+        # rows of points that have not been written are zero-filled and must not be copied
+        values = value_dataset[: point_ids[-1] + 1]
+        timestamps = timestamp_dataset[: point_ids[-1] + 1]
+        for pointID in point_ids:
+            self.residual.setdefault(pointID, {}).setdefault(key[0], {})[key[1]] = {
+                "value": values[pointID],
+                "timestamp": timestamps[pointID],
+            }
+
+    def get_device_storage(self, file: h5py.File) -> dict:
+        """
+        Get the streamed signals in the format used by the file writer plugins, i.e.
+        device -> signal -> {value, timestamp}. The values are h5py datasets of the given file.
+
+        Args:
+            file (h5py.File): The file the scan segments have been streamed to
+        """
+        device_storage = {}
+        for dev, signal_name in self.datasets:
+            group = file[f"entry/collection/bec/{dev}/{signal_name}"]
+            device_storage.setdefault(dev, {})[signal_name] = {
+                "value": group["value"],
+                "timestamp": group["timestamp"],
+            }
+        return device_storage
+
+    def close(self) -> None:
+        """Close the file. Partial datasets of signals that could not be streamed are removed."""
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        if not self._obsolete_groups:
+            return
+        with h5py.File(self.file_path, "r+") as file:
+            for name in self._obsolete_groups:
+                del file[name]
+        self._obsolete_groups = []
+
+
 class NexusFileWriter(FileWriter):
+    def __init__(self, file_writer_manager):
+        super().__init__(file_writer_manager)
+        self.streams = {}
+        config = self.file_writer_manager.file_writer_config or {}
+        self.layout_policy = LayoutPolicy(config.get("layout"))
+        self.device_files = DeviceFileWriter(config.get("device_files"), self.layout_policy)
+
+    def open_stream(self, scanID: str, file_path: str, batch_size: int = 100, swmr=False):
+        """
+        Create the file of a scan and stream its scan segments to disk while the scan is running.
+
+        Args:
+            scanID (str): Scan ID
+            file_path (str): File path
+            batch_size (int, optional): Number of points per batch. Defaults to 100.
+            swmr (bool, optional): Switch the file to SWMR mode after the first batch. Defaults to False.
+        """
+        stream = HDF5StreamWriter(
+            file_path,
+            batch_size=batch_size,
+            swmr=swmr,
+            layout_policy=self.layout_policy,
+            device_classes=self._get_device_classes(),
+        )
+        stream.open()
+        self.streams[scanID] = stream
+
+    def append_to_stream(self, scanID: str, columns: typing.Union[ScanColumns, dict]) -> None:
+        """
+        Append scan data to the file of a scan.
+
+        Args:
+            scanID (str): Scan ID
+            columns (ScanColumns | dict): Scan data as ScanColumns or as scan segments
+        """
+        self.streams[scanID].append(columns)
+
+    def close_stream(self, scanID: str) -> None:
+        """
+        Close the file of a scan without finalizing it.
+
+        Args:
+            scanID (str): Scan ID
+        """
+        stream = self.streams.pop(scanID, None)
+        if stream is not None:
+            stream.close()
+
     def write(self, file_path: str, data):
+        stream = self.streams.pop(data.scanID, None)
+        if stream is not None and stream.file_path != file_path:
+            stream.close()
+            stream = None
+        if stream is None:
+            self._write_file(file_path, data)
+            return
+
+        try:
+            stream.append(data.columns)
+        finally:
+            stream.close()
+        device_storage = self._create_device_data_storage(data, scan_segments=stream.residual)
+        with h5py.File(file_path, "r+") as file:
+            # make the streamed signals available to the plugins
+            for dev, streamed in stream.get_device_storage(file).items():
+                if isinstance(device_storage.get(dev), list):
+                    streamed.update(merge_dicts(device_storage[dev]))
+                device_storage[dev] = streamed
+            writer_storage = self._prepare_storage(file_path, data, device_storage)
+            HDF5StorageWriter.write_to_file(
+                writer_storage._storage,
+                device_storage,
+                file,
+                layout_policy=self.layout_policy,
+                device_classes=self._get_device_classes(),
+                file_references=data.file_references,
+            )
+
+    def _write_file(self, file_path: str, data) -> None:
         device_storage = self._create_device_data_storage(data)
+        device_classes = self._get_device_classes()
+        device_files = {}
+        if self.device_files.enabled:
+            # the device files are written in parallel to the master file; the write is
+            # complete once all device files have been written
+            for dev in self.device_files.select_devices(device_storage, device_classes):
+                device_files[dev] = self.device_files.submit(
+                    file_path, dev, device_storage[dev], device_classes.get(dev)
+                )
+        writer_storage = self._prepare_storage(file_path, data, device_storage)
+        # devices with a value of None are skipped in /entry/collection/bec
+        master_storage = {
+            key: (None if key in device_files else val) for key, val in device_storage.items()
+        }
+        with h5py.File(file_path, "w") as file:
+            HDF5StorageWriter.write_to_file(
+                writer_storage._storage,
+                master_storage,
+                file,
+                layout_policy=self.layout_policy,
+                device_classes=device_classes,
+                data=device_storage,
+                file_references=data.file_references,
+            )
+            for dev, future in device_files.items():
+                if self.device_files.link == "external":
+                    self.device_files.link_external(file, file_path, dev)
+                else:
+                    self.device_files.link_virtual(file, file_path, dev, future.result())
+        for dev, future in device_files.items():
+            exc = future.exception()
+            if exc is not None:
+                raise RuntimeError(f"Failed to write the file of device {dev}.") from exc
+
+    def shutdown(self):
+        self.device_files.shutdown()
+
+    def _get_device_classes(self) -> dict:
+        if not self.layout_policy.rules and not self.device_files.enabled:
+            return {}
+        return {
+            name: dev._config.get("deviceClass")
+            for name, dev in self.file_writer_manager.device_manager.devices.items()
+        }
+
+    def _prepare_storage(self, file_path: str, data, device_storage: dict) -> HDF5Storage:
         device_storage["metadata"] = data.metadata
 
         # NeXus needs start_time and end_time in ISO8601 format, so we have to convert it
@@ -317,16 +684,13 @@ class NexusFileWriter(FileWriter):
             rel_path = os.path.relpath(file_ref["path"], os.path.dirname(file_path))
             file_ref["path"] = rel_path
 
-        writer_storage = writer_format(
+        return writer_format(
             storage=HDF5Storage(),
             data=device_storage,
             file_references=data.file_references,
             device_manager=self.file_writer_manager.device_manager,
         )
 
-        with h5py.File(file_path, "w") as file:
-            HDF5StorageWriter.write_to_file(writer_storage._storage, device_storage, file)
-
 
 def dict_to_storage(storage, data):
     for key, val in data.items():
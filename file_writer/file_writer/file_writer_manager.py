@@ -14,9 +14,14 @@ from bec_lib.core import (
     threadlocked,
 )
 from bec_lib.core.file_utils import FileWriterMixin
+from bec_lib.core.frame_buffer import FrameReader, FrameUnavailableError, is_frame_descriptor
 from bec_lib.core.redis_connector import Alarms, MessageObject, RedisConnector
 
+from file_writer.async_data import AsyncDataBuffer
+from file_writer.columns import ScanColumns
+from file_writer.journal import RecordType, RecoveryJournal
 from file_writer.file_writer import NexusFileWriter
+from file_writer.writer_pipeline import WriterPipeline
 
 logger = bec_logger.logger
 
@@ -32,7 +37,7 @@ class ScanStorage:
         """
         self.scan_number = scan_number
         self.scanID = scanID
-        self.scan_segments = {}
+        self.columns = ScanColumns()
         self.scan_finished = False
         self.num_points = None
         self.baseline = {}
@@ -42,6 +47,16 @@ class ScanStorage:
         self.start_time = None
         self.end_time = None
         self.enforce_sync = True
+        self.streamed_points = 0
+        self.stream_file_path = None
+        self.received_points = 0
+        self.lost_frames = 0
+        self._received = bytearray()
+        self.write_requested = threading.Event()
+        self.async_buffers = {}
+        self.async_cursors = {}
+        self.async_lock = threading.Lock()
+        self._lock = threading.Lock()
 
     def append(self, pointID, data):
         """
@@ -51,16 +66,77 @@ class ScanStorage:
             pointID (int): Point ID
             data (dict): Data to be stored
         """
-        self.scan_segments[pointID] = data
+        with self._lock:
+            if not self._is_received(pointID):
+                self.received_points += 1
+            self.columns.append(pointID, data)
+
+    def has_point(self, pointID) -> bool:
+        """
+        Check if a point has been received.
+
+        Args:
+            pointID (int): Point ID
+        """
+        with self._lock:
+            if not isinstance(pointID, int) or pointID < 0:
+                return False
+            index, bit = divmod(pointID, 8)
+            return index < len(self._received) and bool(self._received[index] & (1 << bit))
+
+    def _is_received(self, pointID) -> bool:
+        # bitmap of the received pointIDs to count repeated points only once
+        if not isinstance(pointID, int) or pointID < 0:
+            return False
+        index, bit = divmod(pointID, 8)
+        if index >= len(self._received):
+            self._received.extend(bytes(max(index + 1 - len(self._received), 1024)))
+        received = self._received[index] & (1 << bit)
+        self._received[index] |= 1 << bit
+        return bool(received)
+
+    def pop_columns(self) -> ScanColumns:
+        """
+        Remove and return all scan data that is currently stored.
+        """
+        with self._lock:
+            columns = self.columns
+            self.columns = ScanColumns()
+            self.streamed_points += len(columns)
+        return columns
+
+    def restore_columns(self, columns: ScanColumns) -> None:
+        """
+        Add previously removed scan data back to the scan storage.
+
+        Args:
+            columns (ScanColumns): Scan data as returned by pop_columns
+        """
+        with self._lock:
+            self.columns.extend(columns)
+            self.streamed_points -= len(columns)
 
     def ready_to_write(self) -> bool:
         """
         Check if the scan is ready to be written to file.
         """
         if self.enforce_sync:
-            return self.scan_finished and (self.num_points == len(self.scan_segments))
+            return self.scan_finished and (self.num_points == self.received_points)
         return self.scan_finished
 
+    def request_write(self) -> bool:
+        """
+        Mark the scan storage for writing.
+
+        Returns:
+            bool: True if the scan is ready to be written and has not been marked before
+        """
+        with self._lock:
+            if self.write_requested.is_set() or not self.ready_to_write():
+                return False
+            self.write_requested.set()
+            return True
+
 
 class FileWriterManager(BECService):
     def __init__(self, config: ServiceConfig, connector_cls: RedisConnector) -> None:
@@ -74,18 +150,66 @@ class FileWriterManager(BECService):
         super().__init__(config, connector_cls, unique_service=True)
         self._lock = threading.RLock()
         self.file_writer_config = self._service_config.service_config.get("file_writer")
+        self.streaming = (self.file_writer_config or {}).get("streaming", False)
+        self.streaming_batch_size = (self.file_writer_config or {}).get("streaming_batch_size", 100)
         self.writer_mixin = FileWriterMixin(self.file_writer_config)
+        self.async_data_poll_interval = (self.file_writer_config or {}).get(
+            "async_data_poll_interval", 1
+        )
+        self.async_data_read_count = (self.file_writer_config or {}).get(
+            "async_data_read_count", 1000
+        )
+        self._async_data_poller = None
+        self._async_data_poller_event = threading.Event()
+        self.writer_pipeline = WriterPipeline(
+            num_workers=(self.file_writer_config or {}).get("num_writers", 1),
+            queue_size=(self.file_writer_config or {}).get("write_queue_size", 10),
+        )
         self.producer = self.connector.producer()
         self._start_device_manager()
-        self._start_scan_segment_consumer()
-        self._start_scan_status_consumer()
         self.scan_storage = {}
+        self.frame_reader = FrameReader()
         self.file_writer = NexusFileWriter(self)
+        journal_path = (self.file_writer_config or {}).get("journal_path")
+        self.journal = RecoveryJournal(journal_path) if journal_path else None
+        self.journal_max_age = (self.file_writer_config or {}).get("journal_max_age", 604800)
+        recovered_scans = []
+        if self.journal:
+            # the journals are replayed before new data is received and appended to them
+            recovered_scans = self.recover_scans()
+        self._start_scan_segment_consumer()
+        self._start_scan_status_consumer()
+        if self.journal:
+            # data published while the file writer was down is not redelivered by pub/sub
+            self.fetch_missed_data(recovered_scans)
+            self.remove_expired_journals()
+        self._start_async_data_poller()
 
     def _start_device_manager(self):
         self.device_manager = DeviceManagerBase(self.connector)
         self.device_manager.initialize([self.bootstrap_server])
 
+    def _start_async_data_poller(self):
+        if not self.async_data_poll_interval:
+            return
+        self._async_data_poller = threading.Thread(
+            target=self._poll_async_data, daemon=True, name="async_data_poller"
+        )
+        self._async_data_poller.start()
+
+    def _poll_async_data(self):
+        while not self._async_data_poller_event.wait(self.async_data_poll_interval):
+            for scanID, storage in list(self.scan_storage.items()):
+                # only running scans are polled; completed scans are read once more before writing
+                if storage.start_time is None or storage.write_requested.is_set():
+                    continue
+                try:
+                    self.update_async_data(scanID)
+                # pylint: disable=broad-except
+                except Exception:
+                    content = traceback.format_exc()
+                    logger.error(f"Failed to read async data of scan {scanID}. Error: {content}")
+
     def _start_scan_segment_consumer(self):
         self._scan_segment_consumer = self.connector.consumer(
             pattern=MessageEndpoints.scan_segment(),
@@ -113,6 +237,108 @@ class FileWriterManager(BECService):
         msg = BECMessage.ScanStatusMessage.loads(msg.value)
         parent.update_scan_storage_with_status(msg)
 
+    def recover_scans(self) -> list:
+        """
+        Rebuild the scan storage of all scans with a journal, e.g. after a crash of the
+        file writer. Scans that are complete are written; all other scans continue to
+        receive data. Async streams are read from the recorded cursors onwards.
+
+        Returns:
+            list: IDs of the recovered scans
+        """
+        recovered = []
+        for scanID in self.journal.pending_scans():
+            logger.info(f"Recovering scan {scanID} from the journal.")
+            try:
+                self._replay_journal(scanID)
+            # pylint: disable=broad-except
+            except Exception:
+                content = traceback.format_exc()
+                logger.error(f"Failed to recover scan {scanID}. Error: {content}")
+                self.journal.close_scan(scanID)
+                continue
+            recovered.append(scanID)
+        return recovered
+
+    def fetch_missed_data(self, scanIDs: list) -> None:
+        """
+        Fetch the scan segments and the scan status of recovered scans from the public
+        endpoints. Data that has been published while the file writer was down is not
+        redelivered, so scans that were closed in the meantime are written only once the
+        missing data has been fetched. The public endpoints expire 30 minutes after the
+        scan has finished.
+
+        Args:
+            scanIDs (list): IDs of the recovered scans
+        """
+        for scanID in scanIDs:
+            try:
+                self._fetch_missed_data(scanID)
+            # pylint: disable=broad-except
+            except Exception:
+                content = traceback.format_exc()
+                logger.error(f"Failed to fetch the missed data of scan {scanID}. Error: {content}")
+                self.journal.close_scan(scanID)
+
+    def _fetch_missed_data(self, scanID: str) -> None:
+        storage = self.scan_storage.get(scanID)
+        if storage is None or storage.write_requested.is_set():
+            return
+        keys = self.producer.keys(MessageEndpoints.public_scan_segment(scanID, "*")) or []
+        # extract the pointID from 'public/<scanID>/scan_segment/<pointID>:val'
+        pointIDs = sorted(int(key.decode().split(":val")[0].split("/")[-1]) for key in keys)
+        missed = [pointID for pointID in pointIDs if not storage.has_point(pointID)]
+        for pointID in missed:
+            msg = BECMessage.ScanMessage.loads(
+                self.producer.get(MessageEndpoints.public_scan_segment(scanID, pointID))
+            )
+            if msg is None or storage.write_requested.is_set():
+                continue
+            self.insert_to_scan_storage(msg)
+        if missed:
+            logger.info(f"Fetched {len(missed)} missed points of scan {scanID}.")
+        status_msg = BECMessage.ScanStatusMessage.loads(
+            self.producer.get(MessageEndpoints.public_scan_info(scanID))
+        )
+        if status_msg is not None and not storage.write_requested.is_set():
+            self.update_scan_storage_with_status(status_msg)
+
+    def remove_expired_journals(self) -> None:
+        """
+        Remove the journals of scans that have not received any data for more than
+        journal_max_age seconds, e.g. scans that have never been closed. The data of such
+        scans is discarded.
+        """
+        for scanID in self.journal.expired_scans(self.journal_max_age):
+            with self._lock:
+                storage = self.scan_storage.get(scanID)
+                if storage is not None and storage.write_requested.is_set():
+                    # the journal is removed once the file has been written
+                    continue
+                self.scan_storage.pop(scanID, None)
+            logger.warning(
+                f"The file of scan {scanID} has never been written and the scan has not received"
+                f" any data for more than {self.journal_max_age} s. Its journal and data are"
+                " discarded."
+            )
+            self.journal.remove(scanID)
+
+    def _replay_journal(self, scanID: str) -> None:
+        status_msg = None
+        for record_type, payload in self.journal.read(scanID):
+            if record_type == RecordType.STATUS:
+                status_msg = BECMessage.ScanStatusMessage.loads(payload)
+                self._update_scan_storage_with_status(status_msg, check_status=False)
+            elif record_type == RecordType.POINT:
+                self._insert_to_scan_storage(BECMessage.ScanMessage.loads(payload))
+            elif record_type == RecordType.ASYNC:
+                storage = self.scan_storage[scanID]
+                msgs = [(payload["cursor"], {b"data": data}) for data in payload["data"]]
+                self._process_async_data(msgs, scanID, payload["device"])
+                storage.async_cursors[payload["key"]] = payload["cursor"]
+        if status_msg is not None:
+            self.check_storage_status(scanID=scanID)
+
     def update_scan_storage_with_status(self, msg: BECMessage.ScanStatusMessage) -> None:
         """
         Update the scan storage with the scan status.
@@ -120,27 +346,44 @@ class FileWriterManager(BECService):
         Args:
             msg (BECMessage.ScanStatusMessage): Scan status message
         """
+        if self.journal:
+            self.journal.append(msg.content.get("scanID"), RecordType.STATUS, msg.dumps())
+            if msg.content.get("status") == "open":
+                self.remove_expired_journals()
+        self._update_scan_storage_with_status(msg)
+
+    def _update_scan_storage_with_status(
+        self, msg: BECMessage.ScanStatusMessage, check_status: bool = True
+    ) -> None:
         scanID = msg.content.get("scanID")
-        if not self.scan_storage.get(scanID):
-            self.scan_storage[scanID] = ScanStorage(
-                scan_number=msg.content["info"].get("scan_number"), scanID=scanID
-            )
+        scan_storage = self._get_scan_storage(scanID, msg.content["info"].get("scan_number"))
         metadata = msg.content.get("info").copy()
         metadata.pop("DIID", None)
         metadata.pop("stream", None)
 
-        scan_storage = self.scan_storage[scanID]
         scan_storage.metadata.update(metadata)
         if msg.content.get("status") == "open" and not scan_storage.start_time:
             scan_storage.start_time = msg.content.get("timestamp")
+            if self.streaming:
+                self.open_stream(scanID)
 
         if msg.content.get("status") == "closed":
             if not scan_storage.end_time:
                 scan_storage.end_time = msg.content.get("timestamp")
-            scan_storage.scan_finished = True
             scan_storage.num_points = msg.content["info"]["num_points"]
             scan_storage.enforce_sync = msg.content["info"]["enforce_sync"]
-            self.check_storage_status(scanID=scanID)
+            scan_storage.scan_finished = True
+            if check_status:
+                self.check_storage_status(scanID=scanID)
+
+    def _get_scan_storage(self, scanID: str, scan_number: int) -> ScanStorage:
+        scan_storage = self.scan_storage.get(scanID)
+        if scan_storage is not None:
+            return scan_storage
+        with self._lock:
+            if scanID not in self.scan_storage:
+                self.scan_storage[scanID] = ScanStorage(scan_number=scan_number, scanID=scanID)
+            return self.scan_storage[scanID]
 
     def insert_to_scan_storage(self, msg: BECMessage.ScanMessage) -> None:
         """
@@ -152,16 +395,100 @@ class FileWriterManager(BECService):
         scanID = msg.content.get("scanID")
         if scanID is None:
             return
-        if not self.scan_storage.get(scanID):
-            self.scan_storage[scanID] = ScanStorage(
-                scan_number=msg.metadata.get("scan_number"), scanID=scanID
-            )
-        self.scan_storage[scanID].append(
-            pointID=msg.content.get("point_id"), data=msg.content.get("data")
-        )
+        self._resolve_frames(msg)
+        if self.journal:
+            # the frames are journaled as data, as the frame buffers do not survive a restart
+            self.journal.append(scanID, RecordType.POINT, msg.dumps())
+        self._insert_to_scan_storage(msg)
         logger.debug(msg.content.get("point_id"))
         self.check_storage_status(scanID=scanID)
 
+    def _insert_to_scan_storage(self, msg: BECMessage.ScanMessage) -> None:
+        scanID = msg.content.get("scanID")
+        scan_storage = self._get_scan_storage(scanID, msg.metadata.get("scan_number"))
+        scan_storage.lost_frames += msg.metadata.get("lost_frames", 0)
+        scan_storage.append(pointID=msg.content.get("point_id"), data=msg.content.get("data"))
+        if self.streaming and len(scan_storage.columns) >= self.streaming_batch_size:
+            self.flush_to_stream(scanID)
+
+    def _resolve_frames(self, msg: BECMessage.ScanMessage) -> None:
+        # frames that the device server has written to shared frame buffers
+        lost_frames = 0
+        for dev, signals in msg.content.get("data").items():
+            if not isinstance(signals, dict):
+                continue
+            try:
+                self.frame_reader.resolve(signals)
+            except FrameUnavailableError as exc:
+                logger.error(
+                    f"Lost frames of device {dev} at point {msg.content.get('point_id')} of scan"
+                    f" {msg.content.get('scanID')}: {exc}"
+                )
+                for signal in signals.values():
+                    if isinstance(signal, dict) and is_frame_descriptor(signal.get("value")):
+                        signal["value"] = None
+                        lost_frames += 1
+        if lost_frames:
+            # recorded in the message, so that the loss is also known after a recovery
+            msg.metadata["lost_frames"] = lost_frames
+
+    @threadlocked
+    def open_stream(self, scanID: str) -> None:
+        """
+        Create the file of a scan and prepare it for streaming the scan segments.
+        The file is created by the writer pipeline.
+
+        Args:
+            scanID (str): Scan ID
+        """
+        storage = self.scan_storage[scanID]
+        if storage.scan_number is None or storage.stream_file_path:
+            return
+        file_path = self.writer_mixin.compile_full_filename(storage.scan_number, "master.h5")
+        storage.stream_file_path = file_path
+        self.writer_pipeline.submit(scanID, self._open_stream, scanID, file_path)
+
+    def _open_stream(self, scanID: str, file_path: str) -> None:
+        try:
+            self.file_writer.open_stream(
+                scanID,
+                file_path,
+                batch_size=self.streaming_batch_size,
+                swmr=self.file_writer_config.get("swmr", False),
+            )
+        # pylint: disable=broad-except
+        except Exception:
+            content = traceback.format_exc()
+            logger.error(f"Failed to open file {file_path} for streaming. Error: {content}")
+            return
+        self._publish_file_status(scanID, file_path, "streaming")
+
+    def flush_to_stream(self, scanID: str) -> None:
+        """
+        Hand the scan segments of a scan over to the writer pipeline to append them to
+        the file. The scan segments are removed from the scan storage.
+
+        Args:
+            scanID (str): Scan ID
+        """
+        storage = self.scan_storage.get(scanID)
+        if storage is None or not storage.stream_file_path:
+            return
+        columns = storage.pop_columns()
+        self.writer_pipeline.submit(scanID, self._append_to_stream, scanID, storage, columns)
+
+    def _append_to_stream(self, scanID: str, storage: ScanStorage, columns: ScanColumns) -> None:
+        try:
+            self.file_writer.append_to_stream(scanID, columns)
+        # pylint: disable=broad-except
+        except Exception:
+            content = traceback.format_exc()
+            logger.error(
+                f"Failed to stream data of scan {scanID}. The data is kept in memory and written"
+                f" with the next batch. Error: {content}"
+            )
+            storage.restore_columns(columns)
+
     def update_baseline_reading(self, scanID: str) -> None:
         """
         Update the baseline reading for the scan.
@@ -197,6 +524,9 @@ class FileWriterManager(BECService):
 
         # extract name from 'public/<scanID>/file/<name>:val'
         names = [msg.decode().split(":val")[0].split("/")[-1] for msg in msgs]
+        # the master file is published by the file writer itself and is not a file reference
+        msgs = [msg for name, msg in zip(names, msgs) if name != "master"]
+        names = [name for name in names if name != "master"]
         file_msgs = [self.producer.get(msg.decode()) for msg in msgs]
         if not file_msgs:
             return
@@ -214,82 +544,102 @@ class FileWriterManager(BECService):
         """
         Update the async data for the scan.
         All async data is sent to the endpoint MessageEndpoints.device_async_readback(scanID, device_name)
-        before the scan finishes. This function retrieves the async data and adds them to the scan storage.
+        before the scan finishes. This function reads the entries that have been added since
+        the last update and adds them to the scan storage. It is called periodically while
+        the scan is running and once more before the file is written.
 
         Args:
             scanID (str): Scan ID
         """
-
-        if not self.scan_storage.get(scanID):
+        storage = self.scan_storage.get(scanID)
+        if not storage:
             return
-        # get all async devices
-        async_device_keys = self.producer.keys(MessageEndpoints.device_async_readback(scanID, "*"))
-        if not async_device_keys:
-            return
-        for device_key in async_device_keys:
-            key = device_key.decode()
-            device_name = key.split(MessageEndpoints.device_async_readback(scanID, ""))[-1].split(
-                ":"
-            )[0]
-            msgs = self.producer.xrange(key, min="-", max="+")
+        with storage.async_lock:
+            # get all async devices
+            async_device_keys = self.producer.keys(
+                MessageEndpoints.device_async_readback(scanID, "*")
+            )
+            if not async_device_keys:
+                return
+            for device_key in async_device_keys:
+                key = device_key.decode()
+                device_name = key.split(MessageEndpoints.device_async_readback(scanID, ""))[
+                    -1
+                ].split(":")[0]
+                self._read_async_stream(storage, key, device_name)
+
+    def _read_async_stream(self, storage: ScanStorage, key: str, device_name: str) -> None:
+        count = self.async_data_read_count
+        while True:
+            cursor = storage.async_cursors.get(key)
+            # xrange includes the entry with the cursor ID, so one more entry is requested
+            msgs = self.producer.xrange(
+                key, min=cursor or "-", max="+", count=count + 1 if cursor else count
+            )
             if not msgs:
-                continue
-            self._process_async_data(msgs, scanID, device_name)
+                return
+            num_msgs = len(msgs)
+            if cursor is not None and msgs[0][0] == cursor:
+                msgs = msgs[1:]
+            if not msgs:
+                return
+            storage.async_cursors[key] = msgs[-1][0]
+            self._process_async_data(msgs, storage.scanID, device_name)
+            if self.journal:
+                self.journal.record_async(storage.scanID, key, device_name, msgs)
+            if num_msgs < (count + 1 if cursor else count):
+                return
 
     def _process_async_data(self, msgs: list, scanID: str, device_name: str):
         """
-        Process the async data for the scan and add it to the scan storage. If needed, concatenate the data.
+        Process the async data for the scan and add it to the scan storage. The data is
+        concatenated with the data that has been received before.
 
         Args:
             msgs (list): List of async data messages
             scanID (str): Scan ID
             device_name (str): Device name
         """
-        concat_type = None
-        data = []
+        storage = self.scan_storage[scanID]
+        async_buffer = storage.async_buffers.setdefault(device_name, AsyncDataBuffer())
         for msg in msgs:
             msg = BECMessage.DeviceMessage.loads(msg[1][b"data"])
-            if not concat_type:
-                concat_type = msg.metadata.get("async_update", "append")
-            data.append(msg.content["signals"])
-        if len(data) == 1:
-            self.scan_storage[scanID].async_data[device_name] = data[0]
-            return
-        if concat_type == "extend":
-            # concatenate the dictionaries
-            self.scan_storage[scanID].async_data[device_name] = {}
-            for key in data[0].keys():
-                self.scan_storage[scanID].async_data[device_name][key] = np.concatenate(
-                    [d[key] for d in data]
-                )
-        elif concat_type == "append":
-            # concatenate the lists
-            self.scan_storage[scanID].async_data[device_name] = {}
-            for key in data[0].keys():
-                self.scan_storage[scanID].async_data[device_name][key] = []
-                for d in data:
-                    self.scan_storage[scanID].async_data[device_name][key].append(d[key])
-        elif concat_type == "replace":
-            # replace the dictionaries
-            self.scan_storage[scanID].async_data[device_name] = {}
-            for key in data[0].keys():
-                self.scan_storage[scanID].async_data[device_name][key] = data[-1][key]
+            try:
+                async_buffer.add(msg.content["signals"], msg.metadata.get("async_update", "append"))
+            except ValueError as exc:
+                logger.error(f"Skipping async reading of device {device_name}: {exc}")
+        storage.async_data[device_name] = async_buffer.get_data()
 
-    @threadlocked
     def check_storage_status(self, scanID: str) -> None:
         """
-        Check if the scan storage is ready to be written to file and write it if it is.
+        Check if the scan storage is ready to be written to file and queue the write if it is.
+        The check only compares counters; baseline readings, file references and async data
+        are retrieved once the scan is complete. The write is queued exactly once per scan.
 
         Args:
             scanID (str): Scan ID
         """
-        if not self.scan_storage.get(scanID):
+        storage = self.scan_storage.get(scanID)
+        if storage is None or not storage.request_write():
             return
         self.update_baseline_reading(scanID)
         self.update_file_references(scanID)
-        if self.scan_storage[scanID].ready_to_write():
-            self.update_async_data(scanID)
-            self.write_file(scanID)
+        self.update_async_data(scanID)
+        self.submit_write(scanID)
+
+    def submit_write(self, scanID: str) -> None:
+        """
+        Remove the scan storage from the manager and queue the file writing.
+        The status of the file is published to the public file endpoint once the job has
+        been queued, once writing starts and once it has finished.
+
+        Args:
+            scanID (str): Scan ID
+        """
+        storage = self.scan_storage.pop(scanID)
+        file_path = self.writer_mixin.compile_full_filename(storage.scan_number, "master.h5")
+        self._publish_file_status(scanID, file_path, "queued")
+        self.writer_pipeline.submit(scanID, self._write_storage, scanID, storage, file_path)
 
     def write_file(self, scanID: str) -> None:
         """
@@ -298,13 +648,14 @@ class FileWriterManager(BECService):
         Args:
             scanID (str): Scan ID
         """
-        storage = self.scan_storage[scanID]
-        scan = storage.scan_number
-        file_path = self.writer_mixin.compile_full_filename(scan, "master.h5")
-        self.producer.set_and_publish(
-            MessageEndpoints.public_file(scanID, "master"),
-            BECMessage.FileMessage(file_path=file_path, done=False).dumps(),
-        )
+        storage = self.scan_storage.pop(scanID)
+        file_path = self.writer_mixin.compile_full_filename(storage.scan_number, "master.h5")
+        self._write_storage(scanID, storage, file_path)
+
+    def _write_storage(self, scanID: str, storage: ScanStorage, file_path: str) -> None:
+        # the frames of the scan have been read; buffers of the next scans are mapped again
+        self.frame_reader.clear()
+        self._publish_file_status(scanID, file_path, "writing")
         successful = True
         try:
             logger.info(f"Starting writing to file {file_path}.")
@@ -319,14 +670,57 @@ class FileWriterManager(BECService):
                 alarm_type="FileWriterError",
                 source="file_writer_manager",
                 content=f"Failed to write to file {file_path}. Error: {content}",
-                metadata=self.scan_storage[scanID].metadata,
+                metadata=storage.metadata,
             )
             successful = False
-        self.scan_storage.pop(scanID)
-        self.producer.set_and_publish(
-            MessageEndpoints.public_file(scanID, "master"),
-            BECMessage.FileMessage(file_path=file_path, successful=successful).dumps(),
+        if successful and storage.lost_frames:
+            content = (
+                f"{storage.lost_frames} frames of scan {storage.scan_number} were overwritten in"
+                f" the shared frame buffers before they could be read. The file {file_path} is"
+                " incomplete."
+            )
+            logger.error(content)
+            self.connector.raise_alarm(
+                severity=Alarms.MINOR,
+                alarm_type="FileWriterError",
+                source="file_writer_manager",
+                content=content,
+                metadata=storage.metadata,
+            )
+            # the file has been written; the data cannot be recovered from the journal either
+            if self.journal:
+                self.journal.remove(scanID)
+            self._publish_file_status(scanID, file_path, "failed", successful=False)
+            return
+        self._publish_file_status(
+            scanID, file_path, "finished" if successful else "failed", successful=successful
         )
         if successful:
+            if self.journal:
+                self.journal.remove(scanID)
             logger.success(f"Finished writing file {file_path}.")
             return
+        if self.journal:
+            # the journal is kept to retry writing the file after a restart
+            self.journal.close_scan(scanID)
+
+    def _publish_file_status(
+        self, scanID: str, file_path: str, status: str, successful: bool = True
+    ) -> None:
+        done = status in ["finished", "failed"]
+        self.producer.set_and_publish(
+            MessageEndpoints.public_file(scanID, "master"),
+            BECMessage.FileMessage(
+                file_path=file_path, done=done, successful=successful, metadata={"status": status}
+            ).dumps(),
+        )
+
+    def shutdown(self):
+        self._async_data_poller_event.set()
+        if self._async_data_poller:
+            self._async_data_poller.join()
+        self.writer_pipeline.shutdown()
+        self.file_writer.shutdown()
+        if self.journal:
+            self.journal.close()
+        super().shutdown()
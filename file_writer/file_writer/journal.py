@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import glob
+import os
+import struct
+import threading
+import time
+from typing import Iterator
+
+import msgpack
+from bec_lib.core import bec_logger
+
+logger = bec_logger.logger
+
+
+class RecordType:
+    STATUS = b"S"
+    POINT = b"P"
+    ASYNC = b"A"
+
+
+class RecoveryJournal:
+    """
+    Append-only journal of the data received by the file writer.
+
+    Each scan has its own journal file <scanID>.journal in the journal directory. A journal
+    file is a sequence of records, each consisting of a record type, the length of the payload
+    and the payload itself, i.e. the serialized message as it was received. Async data is
+    recorded together with the stream cursor of the last entry, so that reading the async
+    stream can be resumed after a restart. The journal of a scan is removed once its file
+    has been written.
+    """
+
+    header = struct.Struct("<cI")
+    suffix = ".journal"
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._files = {}
+
+    def _get_path(self, scanID: str) -> str:
+        return os.path.join(self.directory, f"{scanID}{self.suffix}")
+
+    def append(self, scanID: str, record_type: bytes, payload: bytes) -> None:
+        """
+        Append a record to the journal of a scan.
+
+        Args:
+            scanID (str): Scan ID
+            record_type (bytes): Record type, see RecordType
+            payload (bytes): Serialized message
+        """
+        with self._lock:
+            file = self._files.get(scanID)
+            if file is None:
+                file = self._files[scanID] = open(self._get_path(scanID), "ab")
+            file.write(self.header.pack(record_type, len(payload)) + payload)
+            # flush to the OS, so that the record survives a crash of the file writer
+            file.flush()
+
+    def record_async(self, scanID: str, key: str, device_name: str, msgs: list) -> None:
+        """
+        Record async readings read from the stream of a device.
+
+        Args:
+            scanID (str): Scan ID
+            key (str): Stream key
+            device_name (str): Device name
+            msgs (list): Stream entries as returned by xrange
+        """
+        cursor = msgs[-1][0]
+        payload = msgpack.dumps(
+            {
+                "key": key,
+                "device": device_name,
+                "cursor": cursor,
+                "data": [msg[1][b"data"] for msg in msgs],
+            }
+        )
+        self.append(scanID, RecordType.ASYNC, payload)
+
+    def remove(self, scanID: str) -> None:
+        """
+        Remove the journal of a scan.
+
+        Args:
+            scanID (str): Scan ID
+        """
+        with self._lock:
+            file = self._files.pop(scanID, None)
+            if file is not None:
+                file.close()
+            path = self._get_path(scanID)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close_scan(self, scanID: str) -> None:
+        """
+        Close the journal file of a scan without removing it, e.g. if the file of the scan
+        could not be written. Records appended later reopen the file.
+
+        Args:
+            scanID (str): Scan ID
+        """
+        with self._lock:
+            file = self._files.pop(scanID, None)
+            if file is not None:
+                file.close()
+
+    def pending_scans(self) -> list:
+        """
+        Get the scans with a journal, sorted by the time of their last record.
+        """
+        paths = sorted(
+            glob.glob(os.path.join(self.directory, f"*{self.suffix}")), key=os.path.getmtime
+        )
+        return [os.path.basename(path)[: -len(self.suffix)] for path in paths]
+
+    def expired_scans(self, max_age: float) -> list:
+        """
+        Get the scans whose journal has not received a record for more than max_age seconds.
+
+        Args:
+            max_age (float): Maximum age of the last record in seconds
+        """
+        now = time.time()
+        expired = []
+        for path in glob.glob(os.path.join(self.directory, f"*{self.suffix}")):
+            try:
+                if now - os.path.getmtime(path) > max_age:
+                    expired.append(os.path.basename(path)[: -len(self.suffix)])
+            except FileNotFoundError:
+                continue
+        return expired
+
+    def read(self, scanID: str) -> Iterator[tuple]:
+        """
+        Read the records of a scan. A record that has only been written partially, e.g. because
+        the file writer crashed while writing it, ends the journal and is removed from the file.
+
+        Args:
+            scanID (str): Scan ID
+
+        Yields:
+            tuple: record type and payload. Async records are decoded to a dictionary.
+        """
+        path = self._get_path(scanID)
+        end = 0
+        with open(path, "rb") as file:
+            while True:
+                header = file.read(self.header.size)
+                if not header:
+                    return
+                if len(header) < self.header.size:
+                    break
+                record_type, length = self.header.unpack(header)
+                payload = file.read(length)
+                if len(payload) < length:
+                    break
+                end = file.tell()
+                if record_type == RecordType.ASYNC:
+                    payload = msgpack.loads(payload, raw=False)
+                yield record_type, payload
+        logger.warning(f"Removing truncated record from the journal of scan {scanID}.")
+        # new records must not be appended to the partial record
+        os.truncate(path, end)
+
+    def close(self) -> None:
+        """Close all journal files."""
+        with self._lock:
+            for file in self._files.values():
+                file.close()
+            self._files.clear()
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import fnmatch
+import typing
+
+import h5py
+import numpy as np
+from bec_lib.core import bec_logger
+
+logger = bec_logger.logger
+
+
+class DatasetLayout:
+    def __init__(
+        self,
+        chunks: typing.Union[bool, tuple, None] = None,
+        compression: str = None,
+        compression_opts: int = None,
+        shuffle: bool = False,
+        fillvalue: typing.Any = None,
+        dtype: str = None,
+    ) -> None:
+        """
+        Storage layout of an HDF5 dataset.
+
+        Args:
+            chunks (bool | tuple, optional): Chunk shape. True lets h5py guess the chunk shape.
+                A tuple shorter than the data's rank is padded with the full extent of the
+                remaining dimensions, e.g. (1,) stores each image of a 3D stack in its own chunk.
+            compression (str, optional): Compression filter, e.g. "gzip" or "lzf".
+            compression_opts (int, optional): Compression level for gzip (0-9).
+            shuffle (bool, optional): Enable the shuffle filter. Defaults to False.
+            fillvalue (Any, optional): Fill value for unwritten parts of the dataset.
+            dtype (str, optional): Data type the data is converted to, e.g. "float32".
+        """
+        self.chunks = tuple(chunks) if isinstance(chunks, list) else chunks
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.shuffle = shuffle
+        self.fillvalue = fillvalue
+        self.dtype = dtype
+
+    def __repr__(self) -> str:
+        params = ", ".join(f"{key}={val!r}" for key, val in vars(self).items() if val)
+        return f"DatasetLayout({params})"
+
+    def apply(self, data: typing.Any) -> tuple:
+        """
+        Prepare data and h5py.Group.create_dataset keyword arguments according to the layout.
+        Filters and chunking are only applied to numeric data with at least one dimension.
+
+        Args:
+            data (Any): Dataset data
+
+        Returns:
+            tuple: converted data and keyword arguments
+        """
+        if isinstance(data, (str, bytes, dict)) or data is None:
+            return data, {}
+        if isinstance(data, h5py.Dataset):
+            data = data[()]
+        array = np.asarray(data)
+        if array.dtype.kind not in "biuf":
+            return data, {}
+        if self.dtype is not None:
+            array = array.astype(self.dtype, copy=False)
+        if array.ndim == 0:
+            return array, {}
+        kwargs = {}
+        if self.chunks is not None:
+            chunks = self.chunks
+            if isinstance(chunks, tuple):
+                chunks = chunks + array.shape[len(chunks) :]
+                chunks = tuple(max(1, min(chunk, size)) for chunk, size in zip(chunks, array.shape))
+            kwargs["chunks"] = chunks
+        if self.compression is not None:
+            kwargs["compression"] = self.compression
+            if self.compression_opts is not None:
+                kwargs["compression_opts"] = self.compression_opts
+        if self.shuffle:
+            kwargs["shuffle"] = True
+        if self.fillvalue is not None:
+            kwargs["fillvalue"] = self.fillvalue
+        return array, kwargs
+
+
+class LayoutPolicy:
+    def __init__(self, rules: list = None) -> None:
+        """
+        Select dataset layouts by device class, signal name and data shape.
+
+        Each rule is a dictionary with optional selectors and the layout parameters of
+        DatasetLayout. The first matching rule determines the layout of a dataset. Supported
+        selectors are "device_class" (glob pattern of the device class), "signal" (glob
+        pattern of the signal or dataset name), "min_ndim" (minimum number of dimensions of
+        the data) and "min_size" (minimum number of elements of the data).
+
+        Args:
+            rules (list, optional): Layout rules
+
+        Examples:
+            >>> policy = LayoutPolicy(
+            ...     [
+            ...         {"min_ndim": 3, "chunks": [1], "compression": "gzip", "compression_opts": 4},
+            ...         {"device_class": "*Eiger*", "compression": "lzf", "shuffle": True},
+            ...         {"min_size": 1000, "chunks": True, "dtype": "float32"},
+            ...     ]
+            ... )
+        """
+        self.rules = []
+        for rule in rules or []:
+            rule = dict(rule)
+            selectors = {
+                key: rule.pop(key)
+                for key in ["device_class", "signal", "min_ndim", "min_size"]
+                if key in rule
+            }
+            try:
+                self.rules.append((selectors, DatasetLayout(**rule)))
+            except TypeError as exc:
+                logger.error(f"Ignoring invalid file writer layout rule {rule}: {exc}")
+
+    def get_layout(
+        self, name: str = None, data: typing.Any = None, device_class: str = None
+    ) -> typing.Optional[DatasetLayout]:
+        """
+        Get the layout of a dataset.
+
+        Args:
+            name (str, optional): Signal or dataset name
+            data (Any, optional): Dataset data
+            device_class (str, optional): Device class of the device the data belongs to
+
+        Returns:
+            DatasetLayout: Layout of the first matching rule or None
+        """
+        if not self.rules:
+            return None
+        try:
+            shape = np.shape(data) if not isinstance(data, (str, bytes, dict)) else ()
+        except ValueError:
+            # ragged data
+            shape = ()
+        for selectors, layout in self.rules:
+            if "device_class" in selectors and not fnmatch.fnmatch(
+                device_class or "", selectors["device_class"]
+            ):
+                continue
+            if "signal" in selectors and not fnmatch.fnmatch(name or "", selectors["signal"]):
+                continue
+            if len(shape) < selectors.get("min_ndim", 0):
+                continue
+            if int(np.prod(shape)) < selectors.get("min_size", 0):
+                continue
+            return layout
+        return None
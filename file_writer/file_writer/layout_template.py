@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import functools
+import os
+import threading
+from typing import Any, Callable
+
+import xmltodict
+
+NODE_TYPES = ["group", "attribute", "dataset", "hardlink", "softlink"]
+
+
+class NeXusLayoutError(Exception):
+    pass
+
+
+def get_type(type_string: str):
+    if type_string == "float":
+        return float
+    if type_string == "string":
+        return str
+    if type_string == "int":
+        return int
+    raise NeXusLayoutError(f"Unsupported data type {type_string}.")
+
+
+class LayoutNode:
+    """
+    Node of a precompiled NeXus layout template.
+
+    Constant values are converted to their data type when the template is compiled, so
+    that writing a file only requires to walk the tree and to look up the scan data.
+    """
+
+    __slots__ = ("node_type", "name", "source", "value", "entry", "children")
+
+    def __init__(
+        self,
+        node_type: str,
+        name: str = None,
+        source: str = None,
+        value=None,
+        entry: str = None,
+        children: tuple = (),
+    ) -> None:
+        self.node_type = node_type
+        self.name = name
+        self.source = source
+        self.value = value
+        self.entry = entry
+        self.children = children
+
+    def __repr__(self) -> str:
+        return f"LayoutNode({self.node_type}, {self.name}, children={len(self.children)})"
+
+
+def compile_layout(layout: dict) -> tuple:
+    """
+    Compile the content of a layout parsed by xmltodict into a tree of LayoutNodes.
+
+    Args:
+        layout (dict): Layout as returned by xmltodict
+
+    Returns:
+        tuple: LayoutNodes of the top level
+    """
+    nodes = []
+    for key, values in layout.items():
+        if key == "hdf5_layout":
+            nodes.extend(compile_layout({"group": values["group"]}))
+            continue
+        if key not in NODE_TYPES:
+            continue
+        if not isinstance(values, list):
+            values = [values]
+        for val in values:
+            nodes.append(_compile_node(key, val or {}))
+    return tuple(nodes)
+
+
+def _compile_node(node_type: str, val: dict) -> LayoutNode:
+    source = val.get("@source")
+    value = val.get("@value")
+    data_type = val.get("@type")
+    if source == "constant" and data_type:
+        value = get_type(data_type)(value)
+    return LayoutNode(
+        node_type,
+        name=val.get("@name"),
+        source=source,
+        value=value,
+        entry=val.get("@entry"),
+        children=compile_layout(val),
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _load_layout_template(layout_file: str, mtime: float) -> tuple:
+    # the modification time is part of the cache key to pick up changes of the layout file
+    with open(layout_file, "br") as file:
+        return compile_layout(xmltodict.parse(file))
+
+
+def load_layout_template(layout_file: str) -> tuple:
+    """
+    Load and compile a NeXus layout file. Compiled layouts are cached until the file changes.
+
+    Args:
+        layout_file (str): Path to the XML layout file
+
+    Returns:
+        tuple: LayoutNodes of the top level
+    """
+    layout_file = os.path.abspath(layout_file)
+    return _load_layout_template(layout_file, os.path.getmtime(layout_file))
+
+
+class DataBinding:
+    """
+    Value of a compiled plugin layout that depends on the scan.
+
+    The binding is resolved with the scan data and the file references of the scan
+    whenever a file is written.
+    """
+
+    __slots__ = ("func",)
+
+    def __init__(self, func: Callable[[dict, dict], Any]) -> None:
+        self.func = func
+
+    def resolve(self, data: dict, file_references: dict) -> Any:
+        """
+        Resolve the binding.
+
+        Args:
+            data (dict): Scan data
+            file_references (dict): File references of the scan
+
+        Returns:
+            Any: Value of the binding
+        """
+        return self.func(data, file_references)
+
+
+def resolve_value(value, data: dict, file_references: dict) -> Any:
+    """Resolve value if it is a DataBinding, otherwise return it unchanged."""
+    if isinstance(value, DataBinding):
+        return value.resolve(data, file_references)
+    return value
+
+
+class PluginLayout:
+    """
+    File writer plugin whose layout is built once and reused for all files.
+
+    The layout function builds the HDF5Storage tree of the plugin from the device
+    configuration and the names of the file references. All values that depend on the
+    scan are given as DataBindings, so the tree can be shared by all files that are
+    written with the same device configuration. The plugin is called like a plugin
+    function and returns the cached tree; the bindings are resolved by the
+    HDF5StorageWriter.
+    """
+
+    def __init__(self, layout_func: Callable, max_layouts: int = 16) -> None:
+        self.layout_func = layout_func
+        self.max_layouts = max_layouts
+        self._layouts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_key(file_references: dict, device_manager) -> tuple:
+        devices = device_manager.devices
+        enabled = tuple(name for name, dev in devices.items() if dev.enabled)
+        return tuple(devices), enabled, frozenset(file_references)
+
+    def __call__(self, storage, data: dict, file_references: dict, device_manager):
+        key = self._get_key(file_references, device_manager)
+        with self._lock:
+            layout = self._layouts.get(key)
+            if layout is None:
+                if len(self._layouts) >= self.max_layouts:
+                    self._layouts.clear()
+                layout = self._layouts[key] = self.layout_func(
+                    storage, file_references, device_manager
+                )
+        return layout
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+from bec_lib.core import bec_logger
+
+logger = bec_logger.logger
+
+
+class WriterPipeline:
+    """
+    Execute file writing jobs outside of the consumer threads.
+
+    Each scan is assigned to one worker thread for as long as it has pending jobs, so that
+    the jobs of a scan (e.g. streaming batches followed by the final write) are executed in
+    the order of submission. Jobs of different scans may run in parallel if more than one
+    worker is configured. Submitting never blocks, so that the consumer threads are not
+    stalled by slow file writing; a warning is logged whenever the number of pending jobs of
+    a worker exceeds the queue size.
+    """
+
+    def __init__(self, num_workers: int = 1, queue_size: int = 10) -> None:
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._queues = [queue.Queue() for _ in range(num_workers)]
+        self._pending = [0] * num_workers
+        self._scan_workers = {}
+        self._scan_jobs = {}
+        self._workers = [
+            threading.Thread(
+                target=self._run, args=(ii,), daemon=True, name=f"file_writer_worker_{ii}"
+            )
+            for ii in range(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, scanID: str, func: Callable, *args, **kwargs) -> Future:
+        """
+        Submit a job for the given scan.
+
+        Args:
+            scanID (str): Scan ID
+            func (Callable): Function to execute
+
+        Returns:
+            Future: Future of the job
+        """
+        future = Future()
+        with self._lock:
+            worker = self._scan_workers.get(scanID)
+            if worker is None:
+                worker = min(range(len(self._queues)), key=lambda ii: self._pending[ii])
+                self._scan_workers[scanID] = worker
+            self._scan_jobs[scanID] = self._scan_jobs.get(scanID, 0) + 1
+            self._pending[worker] += 1
+            overflow = self._pending[worker] == self.queue_size + 1
+        if overflow:
+            logger.warning(
+                f"File writer worker {worker} has more than {self.queue_size} pending jobs. The"
+                f" file writing of scan {scanID} is falling behind the incoming data."
+            )
+        self._queues[worker].put_nowait((scanID, future, func, args, kwargs))
+        return future
+
+    @property
+    def pending_jobs(self) -> int:
+        """Number of jobs that are queued or running"""
+        with self._lock:
+            return sum(self._pending)
+
+    def shutdown(self) -> None:
+        """Finish all pending jobs and stop the workers."""
+        for job_queue in self._queues:
+            job_queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def _run(self, worker: int) -> None:
+        job_queue = self._queues[worker]
+        while True:
+            job = job_queue.get()
+            if job is None:
+                return
+            scanID, future, func, args, kwargs = job
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(*args, **kwargs))
+                except Exception as exc:  # pylint: disable=broad-except
+                    logger.error(f"Failed to run file writer job for scanID {scanID}: {exc}")
+                    future.set_exception(exc)
+            with self._lock:
+                self._pending[worker] -= 1
+                self._scan_jobs[scanID] -= 1
+                if not self._scan_jobs[scanID]:
+                    # the scan may be assigned to a different worker next time
+                    self._scan_jobs.pop(scanID)
+                    self._scan_workers.pop(scanID)
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Callable
 
 import numpy as np
 
+from file_writer.layout_template import DataBinding, PluginLayout
+
 if TYPE_CHECKING:
     from bec_lib.core import DeviceManagerBase
 
@@ -25,18 +27,53 @@ def get_entry(data: dict, name: str, default=None) -> Any:
     return data.get(name, {}).get(name, {}).get("value", default)
 
 
-def NeXus_format(
+def bind_entry(name: str, default=None, transform: Callable = None) -> DataBinding:
+    """
+    Bind a dataset to an entry of the scan data (see get_entry).
+
+    Args:
+        name (str): Entry name
+        default (Any, optional): Default value. Defaults to None.
+        transform (Callable, optional): Function applied to the entry. Defaults to None.
+    """
+
+    def _resolve(data, _file_references):
+        val = get_entry(data, name, default)
+        return transform(val) if transform is not None else val
+
+    return DataBinding(_resolve)
+
+
+def bind_value(name: str) -> DataBinding:
+    """Bind a dataset or attribute to a top-level entry of the scan data."""
+    return DataBinding(lambda data, _file_references: data.get(name))
+
+
+def bind_file_reference(name: str) -> DataBinding:
+    """Bind an external link to the path of a file reference."""
+    return DataBinding(lambda _data, file_references: file_references[name]["path"])
+
+
+def _mokev(data: dict) -> Any:
+    mokev = data.get("mokev", {})
+    if not mokev:
+        return None
+    if isinstance(mokev, list):
+        mokev = mokev[0]
+    return mokev.get("mokev").get("value")
+
+
+def NeXus_layout(
     storage: HDF5Storage,
-    data: dict,
     file_references: dict,
     device_manager: DeviceManagerBase,
 ) -> HDF5Storage:
     """
-    Prepare the NeXus file format.
+    Prepare the NeXus file format. The layout is built once per device configuration
+    and reused for all files; values that depend on the scan are DataBindings.
 
     Args:
         storage (HDF5Storage): HDF5 storage. Pseudo hdf5 file container that will be written to disk later.
-        data (dict): scan data
         file_references (dict): File references. Can be used to add external files to the HDF5 file. The path is given relative to the HDF5 file.
         device_manager (DeviceManagerBase): Device manager. Can be used to check if devices are available.
 
@@ -47,8 +84,8 @@ def NeXus_format(
     entry = storage.create_group("entry")
     entry.attrs["NX_class"] = "NXentry"
     entry.attrs["definition"] = "NXsas"
-    entry.attrs["start_time"] = data.get("start_time")
-    entry.attrs["end_time"] = data.get("end_time")
+    entry.attrs["start_time"] = bind_value("start_time")
+    entry.attrs["end_time"] = bind_value("end_time")
     entry.attrs["version"] = 1.0
 
     # /entry/collection
@@ -60,7 +97,7 @@ def NeXus_format(
     control = entry.create_group("control")
     control.attrs["NX_class"] = "NXmonitor"
     control.create_dataset(name="mode", data="monitor")
-    control.create_dataset(name="integral", data=get_entry(data, "bpm4i"))
+    control.create_dataset(name="integral", data=bind_entry("bpm4i"))
 
     # /entry/data
     main_data = entry.create_group("data")
@@ -75,13 +112,13 @@ def NeXus_format(
     # /entry/sample
     control = entry.create_group("sample")
     control.attrs["NX_class"] = "NXsample"
-    control.create_dataset(name="name", data=get_entry(data, "samplename"))
-    control.create_dataset(name="description", data=data.get("sample_description"))
-    x_translation = control.create_dataset(name="x_translation", data=get_entry(data, "samx"))
+    control.create_dataset(name="name", data=bind_entry("samplename"))
+    control.create_dataset(name="description", data=bind_value("sample_description"))
+    x_translation = control.create_dataset(name="x_translation", data=bind_entry("samx"))
     x_translation.attrs["units"] = "mm"
-    y_translation = control.create_dataset(name="y_translation", data=get_entry(data, "samy"))
+    y_translation = control.create_dataset(name="y_translation", data=bind_entry("samy"))
     y_translation.attrs["units"] = "mm"
-    temperature_log = control.create_dataset(name="temperature_log", data=get_entry(data, "temp"))
+    temperature_log = control.create_dataset(name="temperature_log", data=bind_entry("temp"))
     temperature_log.attrs["units"] = "K"
 
     # /entry/instrument
@@ -95,7 +132,7 @@ def NeXus_format(
     source.create_dataset(name="name", data="Swiss Light Source")
     source.create_dataset(name="probe", data="x-ray")
     distance = source.create_dataset(
-        name="distance", data=-33800 - np.asarray(get_entry(data, "samz", 0))
+        name="distance", data=bind_entry("samz", 0, lambda samz: -33800 - np.asarray(samz))
     )
     distance.attrs["units"] = "mm"
     sigma_x = source.create_dataset(name="sigma_x", data=0.202)
@@ -106,13 +143,13 @@ def NeXus_format(
     divergence_x.attrs["units"] = "radians"
     divergence_y = source.create_dataset(name="divergence_y", data=0.000025)
     divergence_y.attrs["units"] = "radians"
-    current = source.create_dataset(name="current", data=get_entry(data, "curr"))
+    current = source.create_dataset(name="current", data=bind_entry("curr"))
     current.attrs["units"] = "mA"
 
     insertion_device = instrument.create_group("insertion_device")
     insertion_device.attrs["NX_class"] = "NXinsertion_device"
     source.create_dataset(name="type", data="undulator")
-    gap = source.create_dataset(name="gap", data=get_entry(data, "idgap"))
+    gap = source.create_dataset(name="gap", data=bind_entry("idgap"))
     gap.attrs["units"] = "mm"
     k = source.create_dataset(name="k", data=2.46)
     k.attrs["units"] = "NX_DIMENSIONLESS"
@@ -123,12 +160,12 @@ def NeXus_format(
     slit_0.attrs["NX_class"] = "NXslit"
     source.create_dataset(name="material", data="OFHC Cu")
     source.create_dataset(name="description", data="Horizontal secondary source slit")
-    x_gap = source.create_dataset(name="x_gap", data=get_entry(data, "sl0wh"))
+    x_gap = source.create_dataset(name="x_gap", data=bind_entry("sl0wh"))
     x_gap.attrs["units"] = "mm"
-    x_translation = source.create_dataset(name="x_translation", data=get_entry(data, "sl0ch"))
+    x_translation = source.create_dataset(name="x_translation", data=bind_entry("sl0ch"))
     x_translation.attrs["units"] = "mm"
     distance = source.create_dataset(
-        name="distance", data=-21700 - np.asarray(get_entry(data, "samz", 0))
+        name="distance", data=bind_entry("samz", 0, lambda samz: -21700 - np.asarray(samz))
     )
     distance.attrs["units"] = "mm"
 
@@ -136,35 +173,34 @@ def NeXus_format(
     slit_1.attrs["NX_class"] = "NXslit"
     source.create_dataset(name="material", data="OFHC Cu")
     source.create_dataset(name="description", data="Horizontal secondary source slit")
-    x_gap = source.create_dataset(name="x_gap", data=get_entry(data, "sl1wh"))
+    x_gap = source.create_dataset(name="x_gap", data=bind_entry("sl1wh"))
     x_gap.attrs["units"] = "mm"
-    y_gap = source.create_dataset(name="y_gap", data=get_entry(data, "sl1wv"))
+    y_gap = source.create_dataset(name="y_gap", data=bind_entry("sl1wv"))
     y_gap.attrs["units"] = "mm"
-    x_translation = source.create_dataset(name="x_translation", data=get_entry(data, "sl1ch"))
+    x_translation = source.create_dataset(name="x_translation", data=bind_entry("sl1ch"))
     x_translation.attrs["units"] = "mm"
-    height = source.create_dataset(name="x_translation", data=get_entry(data, "sl1ch"))
+    height = source.create_dataset(name="x_translation", data=bind_entry("sl1ch"))
     height.attrs["units"] = "mm"
     distance = source.create_dataset(
-        name="distance", data=-7800 - np.asarray(get_entry(data, "samz", 0))
+        name="distance", data=bind_entry("samz", 0, lambda samz: -7800 - np.asarray(samz))
     )
     distance.attrs["units"] = "mm"
 
     mono = instrument.create_group("monochromator")
     mono.attrs["NX_class"] = "NXmonochromator"
-    mokev = data.get("mokev", {})
-    if mokev:
-        if isinstance(mokev, list):
-            mokev = mokev[0]
-        wavelength = mono.create_dataset(
-            name="wavelength",
-            data=12.3984193 / (mokev.get("mokev").get("value") + 1e-9),
-        )
-        wavelength.attrs["units"] = "Angstrom"
-        energy = mono.create_dataset(name="energy", data=mokev.get("mokev").get("value"))
-        energy.attrs["units"] = "keV"
+    # the datasets are skipped if mokev is not part of the scan data
+    wavelength = mono.create_dataset(
+        name="wavelength",
+        data=DataBinding(
+            lambda data, _: None if _mokev(data) is None else 12.3984193 / (_mokev(data) + 1e-9)
+        ),
+    )
+    wavelength.attrs["units"] = "Angstrom"
+    energy = mono.create_dataset(name="energy", data=DataBinding(lambda data, _: _mokev(data)))
+    energy.attrs["units"] = "keV"
     mono.create_dataset(name="type", data="Double crystal fixed exit monochromator.")
     distance = mono.create_dataset(
-        name="distance", data=-5220 - np.asarray(get_entry(data, "samz", 0))
+        name="distance", data=bind_entry("samz", 0, lambda samz: -5220 - np.asarray(samz))
     )
     distance.attrs["units"] = "mm"
 
@@ -173,7 +209,7 @@ def NeXus_format(
     crystal_1.create_dataset(name="usage", data="Bragg")
     crystal_1.create_dataset(name="order_no", data="1")
     crystal_1.create_dataset(name="reflection", data="[1 1 1]")
-    bragg_angle = crystal_1.create_dataset(name="bragg_angle", data=get_entry(data, "moth1"))
+    bragg_angle = crystal_1.create_dataset(name="bragg_angle", data=bind_entry("moth1"))
     bragg_angle.attrs["units"] = "degrees"
 
     crystal_2 = mono.create_group("crystal_2")
@@ -181,33 +217,33 @@ def NeXus_format(
     crystal_2.create_dataset(name="usage", data="Bragg")
     crystal_2.create_dataset(name="order_no", data="2")
     crystal_2.create_dataset(name="reflection", data="[1 1 1]")
-    bragg_angle = crystal_2.create_dataset(name="bragg_angle", data=get_entry(data, "moth1"))
+    bragg_angle = crystal_2.create_dataset(name="bragg_angle", data=bind_entry("moth1"))
     bragg_angle.attrs["units"] = "degrees"
-    bend_x = crystal_2.create_dataset(name="bend_x", data=get_entry(data, "mobd"))
+    bend_x = crystal_2.create_dataset(name="bend_x", data=bind_entry("mobd"))
     bend_x.attrs["units"] = "degrees"
 
     xbpm4 = instrument.create_group("XBPM4")
     xbpm4.attrs["NX_class"] = "NXdetector"
     xbpm4_sum = xbpm4.create_group("XBPM4_sum")
-    xbpm4_sum_data = xbpm4_sum.create_dataset(name="data", data=get_entry(data, "bpm4s"))
+    xbpm4_sum_data = xbpm4_sum.create_dataset(name="data", data=bind_entry("bpm4s"))
     xbpm4_sum_data.attrs["units"] = "NX_DIMENSIONLESS"
     xbpm4_sum.create_dataset(name="description", data="Sum of counts for the four quadrants.")
     xbpm4_x = xbpm4.create_group("XBPM4_x")
-    xbpm4_x_data = xbpm4_x.create_dataset(name="data", data=get_entry(data, "bpm4x"))
+    xbpm4_x_data = xbpm4_x.create_dataset(name="data", data=bind_entry("bpm4x"))
     xbpm4_x_data.attrs["units"] = "NX_DIMENSIONLESS"
     xbpm4_x.create_dataset(
         name="description",
         data="Normalized difference of counts between left and right quadrants.",
     )
     xbpm4_y = xbpm4.create_group("XBPM4_y")
-    xbpm4_y_data = xbpm4_y.create_dataset(name="data", data=get_entry(data, "bpm4y"))
+    xbpm4_y_data = xbpm4_y.create_dataset(name="data", data=bind_entry("bpm4y"))
     xbpm4_y_data.attrs["units"] = "NX_DIMENSIONLESS"
     xbpm4_y.create_dataset(
         name="description",
         data="Normalized difference of counts between high and low quadrants.",
     )
     xbpm4_skew = xbpm4.create_group("XBPM4_skew")
-    xbpm4_skew_data = xbpm4_skew.create_dataset(name="data", data=get_entry(data, "bpm4z"))
+    xbpm4_skew_data = xbpm4_skew.create_dataset(name="data", data=bind_entry("bpm4z"))
     xbpm4_skew_data.attrs["units"] = "NX_DIMENSIONLESS"
     xbpm4_skew.create_dataset(
         name="description",
@@ -221,7 +257,7 @@ def NeXus_format(
         name="description",
         data="Grazing incidence mirror to reject high-harmonic wavelengths from the monochromator. There are three coating options available that are used depending on the X-ray energy, no coating (SiO2), rhodium (Rh) or platinum (Pt).",
     )
-    incident_angle = mirror.create_dataset(name="incident_angle", data=get_entry(data, "mith"))
+    incident_angle = mirror.create_dataset(name="incident_angle", data=bind_entry("mith"))
     incident_angle.attrs["units"] = "degrees"
     substrate_material = mirror.create_dataset(name="substrate_material", data="SiO2")
     substrate_material.attrs["units"] = "NX_CHAR"
@@ -230,32 +266,32 @@ def NeXus_format(
     bend_y = mirror.create_dataset(name="bend_y", data="mibd")
     bend_y.attrs["units"] = "NX_DIMENSIONLESS"
     distance = mirror.create_dataset(
-        name="distance", data=-4370 - np.asarray(get_entry(data, "samz", 0))
+        name="distance", data=bind_entry("samz", 0, lambda samz: -4370 - np.asarray(samz))
     )
     distance.attrs["units"] = "mm"
 
     xbpm5 = instrument.create_group("XBPM5")
     xbpm5.attrs["NX_class"] = "NXdetector"
     xbpm5_sum = xbpm5.create_group("XBPM5_sum")
-    xbpm5_sum_data = xbpm5_sum.create_dataset(name="data", data=get_entry(data, "bpm5s"))
+    xbpm5_sum_data = xbpm5_sum.create_dataset(name="data", data=bind_entry("bpm5s"))
     xbpm5_sum_data.attrs["units"] = "NX_DIMENSIONLESS"
     xbpm5_sum.create_dataset(name="description", data="Sum of counts for the four quadrants.")
     xbpm5_x = xbpm5.create_group("XBPM5_x")
-    xbpm5_x_data = xbpm5_x.create_dataset(name="data", data=get_entry(data, "bpm5x"))
+    xbpm5_x_data = xbpm5_x.create_dataset(name="data", data=bind_entry("bpm5x"))
     xbpm5_x_data.attrs["units"] = "NX_DIMENSIONLESS"
     xbpm5_x.create_dataset(
         name="description",
         data="Normalized difference of counts between left and right quadrants.",
     )
     xbpm5_y = xbpm5.create_group("XBPM5_y")
-    xbpm5_y_data = xbpm5_y.create_dataset(name="data", data=get_entry(data, "bpm5y"))
+    xbpm5_y_data = xbpm5_y.create_dataset(name="data", data=bind_entry("bpm5y"))
     xbpm5_y_data.attrs["units"] = "NX_DIMENSIONLESS"
     xbpm5_y.create_dataset(
         name="description",
         data="Normalized difference of counts between high and low quadrants.",
     )
     xbpm5_skew = xbpm5.create_group("XBPM5_skew")
-    xbpm5_skew_data = xbpm5_skew.create_dataset(name="data", data=get_entry(data, "bpm5z"))
+    xbpm5_skew_data = xbpm5_skew.create_dataset(name="data", data=bind_entry("bpm5z"))
     xbpm5_skew_data.attrs["units"] = "NX_DIMENSIONLESS"
     xbpm5_skew.create_dataset(
         name="description",
@@ -266,16 +302,16 @@ def NeXus_format(
     slit_2.attrs["NX_class"] = "NXslit"
     source.create_dataset(name="material", data="Ag")
     source.create_dataset(name="description", data="Slit 2, optics hutch")
-    x_gap = source.create_dataset(name="x_gap", data=get_entry(data, "sl2wh"))
+    x_gap = source.create_dataset(name="x_gap", data=bind_entry("sl2wh"))
     x_gap.attrs["units"] = "mm"
-    y_gap = source.create_dataset(name="y_gap", data=get_entry(data, "sl2wv"))
+    y_gap = source.create_dataset(name="y_gap", data=bind_entry("sl2wv"))
     y_gap.attrs["units"] = "mm"
-    x_translation = source.create_dataset(name="x_translation", data=get_entry(data, "sl2ch"))
+    x_translation = source.create_dataset(name="x_translation", data=bind_entry("sl2ch"))
     x_translation.attrs["units"] = "mm"
-    height = source.create_dataset(name="x_translation", data=get_entry(data, "sl2cv"))
+    height = source.create_dataset(name="x_translation", data=bind_entry("sl2cv"))
     height.attrs["units"] = "mm"
     distance = source.create_dataset(
-        name="distance", data=-3140 - np.asarray(get_entry(data, "samz", 0))
+        name="distance", data=bind_entry("samz", 0, lambda samz: -3140 - np.asarray(samz))
     )
     distance.attrs["units"] = "mm"
 
@@ -283,13 +319,13 @@ def NeXus_format(
     slit_3.attrs["NX_class"] = "NXslit"
     source.create_dataset(name="material", data="Si")
     source.create_dataset(name="description", data="Slit 3, experimental hutch, exposure box")
-    x_gap = source.create_dataset(name="x_gap", data=get_entry(data, "sl3wh"))
+    x_gap = source.create_dataset(name="x_gap", data=bind_entry("sl3wh"))
     x_gap.attrs["units"] = "mm"
-    y_gap = source.create_dataset(name="y_gap", data=get_entry(data, "sl3wv"))
+    y_gap = source.create_dataset(name="y_gap", data=bind_entry("sl3wv"))
     y_gap.attrs["units"] = "mm"
-    x_translation = source.create_dataset(name="x_translation", data=get_entry(data, "sl3ch"))
+    x_translation = source.create_dataset(name="x_translation", data=bind_entry("sl3ch"))
     x_translation.attrs["units"] = "mm"
-    height = source.create_dataset(name="x_translation", data=get_entry(data, "sl3cv"))
+    height = source.create_dataset(name="x_translation", data=bind_entry("sl3cv"))
     height.attrs["units"] = "mm"
     # distance = source.create_dataset(name="distance", data=-3140 - get_entry(data, "samz", 0))
     # distance.attrs["units"] = "mm"
@@ -302,7 +338,7 @@ def NeXus_format(
         data="The filter set consists of 4 linear stages, each with five filter positions. Additionally, each one allows for an out position to allow 'no filtering'.",
     )
     attenuator_transmission = filter_set.create_dataset(
-        name="attenuator_transmission", data=10 ** get_entry(data, "ftrans", 0)
+        name="attenuator_transmission", data=bind_entry("ftrans", 0, lambda ftrans: 10**ftrans)
     )
     attenuator_transmission.attrs["units"] = "NX_DIMENSIONLESS"
 
@@ -310,13 +346,13 @@ def NeXus_format(
     slit_4.attrs["NX_class"] = "NXslit"
     source.create_dataset(name="material", data="Si")
     source.create_dataset(name="description", data="Slit 4, experimental hutch, exposure box")
-    x_gap = source.create_dataset(name="x_gap", data=get_entry(data, "sl4wh"))
+    x_gap = source.create_dataset(name="x_gap", data=bind_entry("sl4wh"))
     x_gap.attrs["units"] = "mm"
-    y_gap = source.create_dataset(name="y_gap", data=get_entry(data, "sl4wv"))
+    y_gap = source.create_dataset(name="y_gap", data=bind_entry("sl4wv"))
     y_gap.attrs["units"] = "mm"
-    x_translation = source.create_dataset(name="x_translation", data=get_entry(data, "sl4ch"))
+    x_translation = source.create_dataset(name="x_translation", data=bind_entry("sl4ch"))
     x_translation.attrs["units"] = "mm"
-    height = source.create_dataset(name="x_translation", data=get_entry(data, "sl4cv"))
+    height = source.create_dataset(name="x_translation", data=bind_entry("sl4cv"))
     height.attrs["units"] = "mm"
     # distance = source.create_dataset(name="distance", data=-3140 - get_entry(data, "samz", 0))
     # distance.attrs["units"] = "mm"
@@ -325,13 +361,13 @@ def NeXus_format(
     slit_5.attrs["NX_class"] = "NXslit"
     source.create_dataset(name="material", data="Si")
     source.create_dataset(name="description", data="Slit 5, experimental hutch, exposure box")
-    x_gap = source.create_dataset(name="x_gap", data=get_entry(data, "sl5wh"))
+    x_gap = source.create_dataset(name="x_gap", data=bind_entry("sl5wh"))
     x_gap.attrs["units"] = "mm"
-    y_gap = source.create_dataset(name="y_gap", data=get_entry(data, "sl5wv"))
+    y_gap = source.create_dataset(name="y_gap", data=bind_entry("sl5wv"))
     y_gap.attrs["units"] = "mm"
-    x_translation = source.create_dataset(name="x_translation", data=get_entry(data, "sl5ch"))
+    x_translation = source.create_dataset(name="x_translation", data=bind_entry("sl5ch"))
     x_translation.attrs["units"] = "mm"
-    height = source.create_dataset(name="x_translation", data=get_entry(data, "sl5cv"))
+    height = source.create_dataset(name="x_translation", data=bind_entry("sl5cv"))
     height.attrs["units"] = "mm"
     # distance = source.create_dataset(name="distance", data=-3140 - get_entry(data, "samz", 0))
     # distance.attrs["units"] = "mm"
@@ -341,9 +377,9 @@ def NeXus_format(
     beam_stop_1.create_dataset(name="description", data="circular")
     bms1_size = beam_stop_1.create_dataset(name="size", data=3)
     bms1_size.attrs["units"] = "mm"
-    bms1_x = beam_stop_1.create_dataset(name="size", data=get_entry(data, "bs1x"))
+    bms1_x = beam_stop_1.create_dataset(name="size", data=bind_entry("bs1x"))
     bms1_x.attrs["units"] = "mm"
-    bms1_y = beam_stop_1.create_dataset(name="size", data=get_entry(data, "bs1y"))
+    bms1_y = beam_stop_1.create_dataset(name="size", data=bind_entry("bs1y"))
     bms1_y.attrs["units"] = "mm"
 
     beam_stop_2 = instrument.create_group("beam_stop_2")
@@ -353,11 +389,11 @@ def NeXus_format(
     bms2_size_x.attrs["units"] = "mm"
     bms2_size_y = beam_stop_2.create_dataset(name="size_y", data=2.25)
     bms2_size_y.attrs["units"] = "mm"
-    bms2_x = beam_stop_2.create_dataset(name="size", data=get_entry(data, "bs2x"))
+    bms2_x = beam_stop_2.create_dataset(name="size", data=bind_entry("bs2x"))
     bms2_x.attrs["units"] = "mm"
-    bms2_y = beam_stop_2.create_dataset(name="size", data=get_entry(data, "bs2y"))
+    bms2_y = beam_stop_2.create_dataset(name="size", data=bind_entry("bs2y"))
     bms2_y.attrs["units"] = "mm"
-    bms2_data = beam_stop_2.create_dataset(name="data", data=get_entry(data, "diode"))
+    bms2_data = beam_stop_2.create_dataset(name="data", data=bind_entry("diode"))
     bms2_data.attrs["units"] = "NX_DIMENSIONLESS"
 
     if "eiger1p5m" in device_manager.devices and device_manager.devices.eiger1p5m.enabled:
@@ -411,10 +447,8 @@ def NeXus_format(
         ] = "Orientation defines the number of counterclockwise rotations by 90 deg followed by a transposition to reach the 'cameraman orientation', that is looking towards the beam."
         orientation.create_dataset(name="transpose", data=1)
         orientation.create_dataset(name="rot90", data=3)
-        data = eiger9m.create_ext_link("data", file_references["eiger9m"]["path"], "EG9M/data")
-        status = eiger9m.create_ext_link(
-            "status", file_references["eiger9m"]["path"], "EG9M/status"
-        )
+        data = eiger9m.create_ext_link("data", bind_file_reference("eiger9m"), "EG9M/data")
+        status = eiger9m.create_ext_link("status", bind_file_reference("eiger9m"), "EG9M/status")
 
     if (
         "pilatus_2" in device_manager.devices
@@ -444,8 +478,11 @@ def NeXus_format(
         orientation.create_dataset(name="rot90", data=2)
         data = pilatus_2.create_ext_link(
             "data",
-            file_references["pilatus_2"]["path"],
+            bind_file_reference("pilatus_2"),
             "entry/instrument/pilatus_2/data",
         )
 
     return storage
+
+
+NeXus_format = PluginLayout(NeXus_layout)
@@ -2,24 +2,30 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from file_writer.layout_template import DataBinding, PluginLayout
+
 if TYPE_CHECKING:
     from bec_lib.core import DeviceManagerBase
 
     from file_writer.file_writer import HDF5Storage
 
 
-def NeXus_format(
+def bind_value(name: str) -> DataBinding:
+    """Bind a dataset or attribute to an entry of the scan data."""
+    return DataBinding(lambda data, _file_references: data.get(name))
+
+
+def NeXus_layout(
     storage: HDF5Storage,
-    data: dict,
     file_references: dict,
     device_manager: DeviceManagerBase,
 ) -> HDF5Storage:
     """
-    Prepare the NeXus file format.
+    Prepare the NeXus file format. The layout is built once per device configuration
+    and reused for all files; values that depend on the scan are DataBindings.
 
     Args:
         storage (HDF5Storage): HDF5 storage. Pseudo hdf5 file container that will be written to disk later.
-        data (dict): scan data
         file_references (dict): File references. Can be used to add external files to the HDF5 file.
         device_manager (DeviceManagerBase): Device manager. Can be used to check if devices are available.
 
@@ -32,8 +38,8 @@ def NeXus_format(
     entry.attrs["version"] = 1.0
 
     # entry.attrs["definition"] = "NXsas"
-    entry.attrs["start_time"] = data.get("start_time")
-    entry.attrs["end_time"] = data.get("end_time")
+    entry.attrs["start_time"] = bind_value("start_time")
+    entry.attrs["end_time"] = bind_value("end_time")
 
     # /entry/collection
     collection = entry.create_group("collection")
@@ -52,8 +58,8 @@ def NeXus_format(
     # /entry/sample
     control = entry.create_group("sample")
     control.attrs["NX_class"] = "NXsample"
-    control.create_dataset(name="name", data=data.get("samplename"))
-    control.create_dataset(name="description", data=data.get("sample_description"))
+    control.create_dataset(name="name", data=bind_value("samplename"))
+    control.create_dataset(name="description", data=bind_value("sample_description"))
 
     # /entry/instrument
     instrument = entry.create_group("instrument")
@@ -79,3 +85,6 @@ def NeXus_format(
     # current.attrs["units"] = "mA"
 
     return storage
+
+
+NeXus_format = PluginLayout(NeXus_layout)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from file_writer.async_data import AsyncDataBuffer
+
+# pylint: disable=missing-function-docstring
+
+
+def test_async_data_buffer_single_reading():
+    async_buffer = AsyncDataBuffer()
+    async_buffer.add({"data": 1}, "append")
+    assert async_buffer.get_data() == {"data": 1}
+
+
+def test_async_data_buffer_extend_grows():
+    async_buffer = AsyncDataBuffer()
+    for ii in range(3000):
+        async_buffer.add({"data": np.full((2, 4), ii)}, "extend")
+    data = async_buffer.get_data()["data"]
+    assert data.shape == (6000, 4)
+    assert data[-1, 0] == 2999
+    assert len(async_buffer._signals["data"].buffer) == 8192
+
+
+def test_async_data_buffer_extend_promotes_dtype():
+    async_buffer = AsyncDataBuffer()
+    async_buffer.add({"data": np.arange(3)}, "extend")
+    async_buffer.add({"data": np.array([0.5])}, "extend")
+    assert np.allclose(async_buffer.get_data()["data"], [0, 1, 2, 0.5])
+
+
+def test_async_data_buffer_extend_rejects_shape_change():
+    async_buffer = AsyncDataBuffer()
+    async_buffer.add({"data": np.zeros((1, 4))}, "extend")
+    with pytest.raises(ValueError):
+        async_buffer.add({"data": np.zeros((1, 5))}, "extend")
+
+
+def test_async_data_buffer_append_and_replace():
+    append_buffer = AsyncDataBuffer()
+    replace_buffer = AsyncDataBuffer()
+    for ii in range(3):
+        append_buffer.add({"data": ii}, "append")
+        replace_buffer.add({"data": ii}, "replace")
+    assert append_buffer.get_data() == {"data": [0, 1, 2]}
+    assert replace_buffer.get_data() == {"data": 2}
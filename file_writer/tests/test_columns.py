@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from file_writer.columns import GrowableArray, ScanColumns, SignalColumn
+
+# pylint: disable=missing-function-docstring
+
+
+def test_growable_array_grows_and_promotes_dtype():
+    array = GrowableArray(initial_capacity=2)
+    array.append(1)
+    array.extend([2, 3])
+    assert array.get().tolist() == [1, 2, 3]
+    array.append(4.5)
+    assert array.get().dtype == np.float64
+    assert array.get().tolist() == [1, 2, 3, 4.5]
+
+
+def test_growable_array_rejects_shape_change():
+    array = GrowableArray()
+    array.append(np.zeros(2))
+    with pytest.raises(ValueError):
+        array.append(np.zeros(3))
+
+
+def test_signal_column_returns_views_for_points_in_order():
+    column = SignalColumn()
+    for pointID in range(3):
+        column.append(pointID, float(pointID), 10 + pointID)
+    point_ids, values, timestamps = column.get()
+    assert point_ids.tolist() == [0, 1, 2]
+    assert values.tolist() == [0, 1, 2]
+    assert timestamps.tolist() == [10, 11, 12]
+    assert values.base is column.values.buffer
+
+
+def test_signal_column_sorts_points_and_keeps_last_duplicate():
+    column = SignalColumn()
+    column.append(1, 1.0)
+    column.append(0, 0.0)
+    column.append(1, 2.0)
+    point_ids, values, timestamps = column.get()
+    assert point_ids.tolist() == [0, 1]
+    assert values.tolist() == [0.0, 2.0]
+    assert timestamps is None
+
+
+def test_signal_column_falls_back_to_list():
+    column = SignalColumn()
+    column.append(0, np.zeros(2))
+    column.append(1, np.zeros(3))
+    column.append(2, "text")
+    _, values, _ = column.get()
+    assert isinstance(values, list)
+    assert values[2] == "text"
+
+
+def test_scan_columns_roundtrip():
+    segments = {
+        0: {"samx": {"samx": {"value": 0.1, "timestamp": 1.0}}, "mon": {"data": [1, 2]}},
+        1: {"samx": {"samx": {"value": 0.2, "timestamp": 2.0}}, "mon": {"data": [3, 4]}},
+    }
+    columns = ScanColumns.from_segments(segments)
+    assert len(columns) == 2
+    assert columns.to_segments() == segments
+    device_storage = columns.get_device_storage()
+    assert device_storage["samx"]["samx"]["value"].tolist() == [0.1, 0.2]
+    assert device_storage["samx"]["samx"]["timestamp"].tolist() == [1.0, 2.0]
+    assert device_storage["mon"] == [{"data": [1, 2]}, {"data": [3, 4]}]
+
+
+def test_scan_columns_extend():
+    columns = ScanColumns.from_segments({2: {"samx": {"samx": {"value": 2}}}})
+    columns.extend(ScanColumns.from_segments({0: {"samx": {"samx": {"value": 0}}}}))
+    assert len(columns) == 2
+    assert columns.get_device_storage()["samx"]["samx"]["value"].tolist() == [0, 2]
+
+
+def test_scan_columns_counts_repeated_points_once():
+    columns = ScanColumns()
+    columns.append(0, {"samx": {"samx": {"value": 0}}})
+    columns.append(0, {"samx": {"samx": {"value": 1}}})
+    columns.extend(ScanColumns.from_segments({0: {"samy": {"samy": {"value": 2}}}}))
+    assert len(columns) == 1
+    assert columns.to_segments()[0]["samx"]["samx"]["value"] == 1
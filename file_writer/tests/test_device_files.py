@@ -0,0 +1,99 @@
+from multiprocessing import shared_memory
+
+import h5py
+import numpy as np
+import pytest
+from test_file_writer_manager import load_FileWriter
+
+from file_writer import NexusFileWriter
+from file_writer import device_files
+from file_writer.columns import ScanColumns
+from file_writer.device_files import DeviceFileWriter
+from file_writer.file_writer_manager import ScanStorage
+
+# pylint: disable=missing-function-docstring
+
+
+def test_device_file_writer_selects_devices():
+    writer = DeviceFileWriter({"devices": ["eiger*", "*Pilatus*"]})
+    device_storage = {
+        "eiger_4": {"eiger_4": {"value": [0, 1]}},
+        "pil": {"pil": {"value": [0, 1]}},
+        "eiger_raw": [{"data": 1}],
+        "samx": {"samx": {"value": [0, 1]}},
+    }
+    devices = writer.select_devices(device_storage, {"pil": "PilatusDetector"})
+    assert devices == ["eiger_4", "pil"]
+
+
+def test_device_file_writer_rejects_unknown_link():
+    with pytest.raises(ValueError):
+        DeviceFileWriter({"devices": ["*"], "link": "copy"})
+
+
+def test_device_file_path():
+    assert DeviceFileWriter.get_file_path("/data/S00001.h5", "eiger") == "/data/S00001_eiger.h5"
+
+
+@pytest.mark.parametrize("link", ["external", "vds"])
+def test_nexus_file_writer_writes_device_files(tmp_path, link):
+    file_path = str(tmp_path / "S00002.h5")
+    file_manager = load_FileWriter()
+    file_manager.file_writer_config = {
+        **file_manager.file_writer_config,
+        "device_files": {"devices": ["cam"], "num_workers": 1, "link": link},
+    }
+    file_writer = NexusFileWriter(file_manager)
+    storage = ScanStorage("2", "scanID-string")
+    storage.columns = ScanColumns.from_segments(
+        {
+            ii: {
+                "cam": {"cam": {"value": np.full((4, 4), ii)}, "cam_state": {"value": "ok"}},
+                "samx": {"samx": {"value": 0.1 * ii}},
+            }
+            for ii in range(3)
+        }
+    )
+    try:
+        file_writer.write(file_path, storage)
+    finally:
+        file_writer.shutdown()
+
+    with h5py.File(str(tmp_path / "S00002_cam.h5"), "r") as device_file:
+        assert device_file["entry/collection/bec/cam/cam/value"].shape == (3, 4, 4)
+    with h5py.File(file_path, "r") as test_file:
+        bec = test_file["entry/collection/bec"]
+        assert np.allclose(bec["samx/samx/value"][()], [0, 0.1, 0.2])
+        assert bec["cam/cam/value"][2, 0, 0] == 2
+        assert [val.decode() for val in bec["cam/cam_state/value"][()]] == ["ok"] * 3
+        if link == "external":
+            assert isinstance(bec.get("cam", getlink=True), h5py.ExternalLink)
+        else:
+            assert bec["cam/cam/value"].is_virtual
+
+
+def test_device_file_writer_passes_arrays_through_shared_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(device_files, "SHARED_MEMORY_MIN_BYTES", 0)
+    release_blocks = device_files.release_blocks
+    released = []
+
+    def _release_blocks(blocks, unlink=False):
+        released.extend(block.name for block in blocks)
+        release_blocks(blocks, unlink=unlink)
+
+    monkeypatch.setattr(device_files, "release_blocks", _release_blocks)
+    writer = DeviceFileWriter({"devices": ["cam"], "num_workers": 1})
+    data = {"cam": {"value": np.arange(12.0).reshape(3, 4), "timestamp": np.arange(3.0)}}
+    try:
+        datasets = writer.submit(str(tmp_path / "S00002.h5"), "cam", data).result(timeout=60)
+    finally:
+        writer.shutdown()
+    assert datasets["cam/value"][0] == (3, 4)
+    with h5py.File(str(tmp_path / "S00002_cam.h5"), "r") as device_file:
+        value = device_file["entry/collection/bec/cam/cam/value"][()]
+        assert np.array_equal(value, data["cam"]["value"])
+    # the shared memory blocks are removed once the file has been written
+    assert len(released) == 2
+    for name in released:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
@@ -9,7 +9,9 @@ from test_file_writer_manager import load_FileWriter
 
 import file_writer
 from file_writer import NexusFileWriter, NeXusFileXMLWriter
-from file_writer.file_writer import HDF5Storage
+from file_writer.columns import ScanColumns
+from file_writer.file_writer import HDF5Storage, HDF5StreamWriter
+from file_writer.layout import LayoutPolicy
 from file_writer.file_writer_manager import ScanStorage
 from file_writer_plugins.cSAXS import NeXus_format as cSAXS_Nexus_format
 
@@ -30,18 +32,16 @@ def test_nexus_file_xml_writer():
 
 def test_csaxs_nexus_format():
     file_manager = load_FileWriter()
+    data = {"samx": {"samx": {"value": [0, 1, 2]}}, "mokev": {"mokev": {"value": 12.456}}}
     writer_storage = cSAXS_Nexus_format(
         storage=HDF5Storage(),
-        data={"samx": {"samx": {"value": [0, 1, 2]}}, "mokev": {"mokev": {"value": 12.456}}},
+        data=data,
         file_references={},
         device_manager=file_manager.device_manager,
     )
     assert writer_storage._storage["entry"].attrs["definition"] == "NXsas"
-    assert writer_storage._storage["entry"]._storage["sample"]._storage["x_translation"]._data == [
-        0,
-        1,
-        2,
-    ]
+    x_translation = writer_storage._storage["entry"]._storage["sample"]._storage["x_translation"]
+    assert x_translation._data.resolve(data, {}) == [0, 1, 2]
 
 
 def test_nexus_file_writer():
@@ -65,16 +65,17 @@ def test_create_device_data_storage():
     file_writer = NexusFileWriter(file_manager)
     storage = ScanStorage("2", "scanID-string")
     storage.num_points = 2
-    storage.scan_segments = {
-        0: {"samx": {"samx": {"value": 0.1}}, "samy": {"samy": {"value": 1.1}}},
-        1: {"samx": {"samx": {"value": 0.2}}, "samy": {"samy": {"value": 1.2}}},
-    }
+    storage.columns = ScanColumns.from_segments(
+        {
+            0: {"samx": {"samx": {"value": 0.1}}, "samy": {"samy": {"value": 1.1}}},
+            1: {"samx": {"samx": {"value": 0.2}}, "samy": {"samy": {"value": 1.2}}},
+        }
+    )
     storage.baseline = {}
     device_storage = file_writer._create_device_data_storage(storage)
     assert len(device_storage.keys()) == 2
-    assert len(device_storage["samx"]) == 2
-    assert device_storage["samx"][0]["samx"]["value"] == 0.1
-    assert device_storage["samx"][1]["samx"]["value"] == 0.2
+    assert device_storage["samx"]["samx"]["value"].tolist() == [0.1, 0.2]
+    assert device_storage["samy"]["samy"]["value"].tolist() == [1.1, 1.2]
 
 
 @pytest.mark.parametrize(
@@ -135,7 +136,7 @@ def test_write_data_storage(segments, baseline, metadata):
     file_writer = NexusFileWriter(file_manager)
     storage = ScanStorage("2", "scanID-string")
     storage.num_points = 2
-    storage.scan_segments = segments
+    storage.columns = ScanColumns.from_segments(segments)
     storage.baseline = baseline
     storage.metadata = metadata
     storage.start_time = 1679226971.564235
@@ -154,3 +155,107 @@ def test_write_data_storage(segments, baseline, metadata):
             test_file["entry"].attrs["end_time"]
             == datetime.datetime.fromtimestamp(1679226971.580867).isoformat()
         )
+
+
+def test_stream_writer_appends_batches(tmp_path):
+    file_path = str(tmp_path / "stream.h5")
+    stream = HDF5StreamWriter(file_path, batch_size=2)
+    stream.open()
+    stream.append(
+        {
+            0: {"samx": {"samx": {"value": 1, "timestamp": 10}}},
+            1: {"samx": {"samx": {"value": 2.5, "timestamp": 11}}},
+        }
+    )
+    stream.append(
+        {
+            3: {"samx": {"samx": {"value": 4, "timestamp": 13}}},
+            2: {"samx": {"samx": {"value": 3, "timestamp": 12}}},
+        }
+    )
+    stream.close()
+    with h5py.File(file_path, "r") as test_file:
+        value = test_file["entry/collection/bec/samx/samx/value"]
+        assert value.maxshape == (None,)
+        assert value.chunks == (2,)
+        assert list(value[()]) == [1, 2.5, 3, 4]
+        assert list(test_file["entry/collection/bec/samx/samx/timestamp"][()]) == [10, 11, 12, 13]
+
+
+def test_stream_writer_keeps_unsupported_signals_in_memory(tmp_path):
+    stream = HDF5StreamWriter(str(tmp_path / "stream.h5"))
+    stream.open()
+    stream.append(
+        {
+            0: {"roi": {"roi": {"value": np.zeros(3)}, "info": {"value": {"a": 1}}}},
+            1: {"roi": {"roi": {"value": np.zeros(4)}, "info": {"value": {"a": 2}}}},
+        }
+    )
+    stream.close()
+    assert not stream.datasets
+    assert stream.residual[1]["roi"]["info"] == {"value": {"a": 2}}
+    assert stream.residual[1]["roi"]["roi"]["value"].shape == (4,)
+    with h5py.File(stream.file_path, "r") as test_file:
+        assert "roi" not in test_file["entry/collection/bec/roi"]
+
+
+def test_stream_writer_demotes_only_written_points(tmp_path):
+    stream = HDF5StreamWriter(str(tmp_path / "stream.h5"))
+    stream.open()
+    stream.append(
+        {
+            0: {"roi": {"roi": {"value": np.zeros(3), "timestamp": 10}}},
+            2: {"roi": {"roi": {"value": np.ones(3), "timestamp": 12}}},
+        }
+    )
+    stream.append({3: {"roi": {"roi": {"value": np.zeros(4), "timestamp": 13}}}})
+    stream.close()
+    assert not stream.datasets
+    assert sorted(stream.residual) == [0, 2, 3]
+    assert np.array_equal(stream.residual[2]["roi"]["roi"]["value"], np.ones(3))
+    assert stream.residual[3]["roi"]["roi"]["value"].shape == (4,)
+
+
+def test_nexus_file_writer_finalizes_stream(tmp_path):
+    file_path = str(tmp_path / "stream.h5")
+    file_manager = load_FileWriter()
+    file_writer = NexusFileWriter(file_manager)
+    storage = ScanStorage("2", "scanID-string")
+    storage.metadata = {"scan_number": 2}
+    file_writer.open_stream("scanID-string", file_path, batch_size=2)
+    file_writer.append_to_stream(
+        "scanID-string",
+        {
+            0: {"samx": {"samx": {"value": 0.1}, "samx_state": {"value": "ok"}}},
+            1: {"samx": {"samx": {"value": 0.2}, "samx_state": {"value": "ok"}}},
+        },
+    )
+    storage.columns = ScanColumns.from_segments(
+        {2: {"samx": {"samx": {"value": 0.3}, "samx_state": {"value": "ok"}}}}
+    )
+    storage.baseline = {"samy": {"samy": {"value": 1.0}}}
+
+    file_writer.write(file_path, storage)
+
+    assert "scanID-string" not in file_writer.streams
+    with h5py.File(file_path, "r") as test_file:
+        bec = test_file["entry/collection/bec"]
+        assert np.allclose(bec["samx/samx/value"][()], [0.1, 0.2, 0.3])
+        assert [val.decode() for val in bec["samx/samx_state/value"][()]] == ["ok"] * 3
+        assert bec["samy/samy/value"][()] == 1.0
+        assert "metadata" in bec
+
+
+def test_stream_writer_applies_layout_policy(tmp_path):
+    policy = LayoutPolicy([{"min_ndim": 3, "compression": "gzip", "dtype": "float32"}])
+    stream = HDF5StreamWriter(
+        str(tmp_path / "stream.h5"), layout_policy=policy, device_classes={"cam": "SimCamera"}
+    )
+    stream.open()
+    stream.append({ii: {"cam": {"cam": {"value": np.ones((4, 4))}}} for ii in range(3)})
+    stream.close()
+    with h5py.File(stream.file_path, "r") as test_file:
+        value = test_file["entry/collection/bec/cam/cam/value"]
+        assert value.compression == "gzip"
+        assert value.dtype == np.float32
+        assert value.shape == (3, 4, 4)
@@ -7,10 +7,12 @@ import pytest
 import yaml
 from bec_lib.core import BECMessage, DeviceManagerBase, MessageEndpoints, ServiceConfig
 from bec_lib.core.bec_errors import ServiceConfigError
+from bec_lib.core.frame_buffer import FrameRingBuffer
 from bec_lib.core.redis_connector import MessageObject
 from bec_lib.core.tests.utils import ConnectorMock, create_session_from_config
 
 from file_writer import FileWriterManager
+from file_writer.columns import ScanColumns
 from file_writer.file_writer import FileWriter
 from file_writer.file_writer_manager import ScanStorage
 
@@ -20,22 +22,28 @@ from file_writer.file_writer_manager import ScanStorage
 dir_path = os.path.dirname(bec_lib.core.__file__)
 
 
-def load_FileWriter():
+def load_FileWriter(file_writer_config: dict = None):
     connector = ConnectorMock("")
     device_manager = DeviceManagerBase(connector, "")
     device_manager.producer = connector.producer()
     with open(f"{dir_path}/tests/test_config.yaml", "r") as session_file:
         device_manager._session = create_session_from_config(yaml.safe_load(session_file))
     device_manager._load_session()
-    return FileWriterManagerMock(device_manager, connector)
+    return FileWriterManagerMock(device_manager, connector, file_writer_config)
 
 
 class FileWriterManagerMock(FileWriterManager):
-    def __init__(self, device_manager, connector) -> None:
+    def __init__(self, device_manager, connector, file_writer_config: dict = None) -> None:
         self.device_manager = device_manager
         config = ServiceConfig(
             redis={"host": "dummy", "port": 6379},
-            config={"file_writer": {"plugin": "default_NeXus_format", "base_path": "./"}},
+            config={
+                "file_writer": {
+                    "plugin": "default_NeXus_format",
+                    "base_path": "./",
+                    **(file_writer_config or {}),
+                }
+            },
         )
         super().__init__(config=config, connector_cls=ConnectorMock)
 
@@ -56,7 +64,7 @@ def test_scan_segment_callback():
     msg_raw = MessageObject(value=msg_bundle.dumps(), topic="scan_segment")
 
     file_manager._scan_segment_callback(msg_raw, parent=file_manager)
-    assert file_manager.scan_storage["scanID"].scan_segments[1] == {"data": "data"}
+    assert file_manager.scan_storage["scanID"].columns.to_segments()[1] == {"data": "data"}
 
 
 def test_scan_status_callback():
@@ -137,7 +145,7 @@ def test_update_baseline_reading():
 def test_scan_storage_append():
     storage = ScanStorage(10, "scanID")
     storage.append(1, {"data": "data"})
-    assert storage.scan_segments[1] == {"data": "data"}
+    assert storage.columns.to_segments()[1] == {"data": "data"}
     assert storage.scan_finished is False
 
 
@@ -164,6 +172,21 @@ def test_update_file_references_gets_keys():
         mock_producer.keys.assert_called_once_with(MessageEndpoints.public_file("scanID", "*"))
 
 
+def test_update_file_references_skips_master_file():
+    file_manager = load_FileWriter()
+    file_manager.scan_storage["scanID"] = ScanStorage(10, "scanID")
+    file_msg = BECMessage.FileMessage(file_path="/path/to/eiger.h5", done=True, successful=True)
+    with mock.patch.object(file_manager, "producer") as mock_producer:
+        mock_producer.keys.return_value = [
+            f"{MessageEndpoints.public_file('scanID', 'master')}:val".encode(),
+            f"{MessageEndpoints.public_file('scanID', 'eiger')}:val".encode(),
+        ]
+        mock_producer.get.return_value = file_msg.dumps()
+        file_manager.update_file_references("scanID")
+        mock_producer.get.assert_called_once()
+        assert list(file_manager.scan_storage["scanID"].file_references) == ["eiger"]
+
+
 def test_update_async_data():
     file_manager = load_FileWriter()
     file_manager.scan_storage["scanID"] = ScanStorage(10, "scanID")
@@ -178,8 +201,39 @@ def test_update_async_data():
             ]
             mock_producer.xrange.return_value = data
             file_manager.update_async_data("scanID")
-            mock_producer.xrange.assert_called_once_with(key, min="-", max="+")
+            mock_producer.xrange.assert_called_once_with(key, min="-", max="+", count=1000)
             mock_process.assert_called_once_with(data, "scanID", "dev1")
+            assert file_manager.scan_storage["scanID"].async_cursors[key] == b"0-0"
+
+
+def _async_entry(entry_id, data, concat_type="extend"):
+    msg = BECMessage.DeviceMessage(signals={"data": data}, metadata={"async_update": concat_type})
+    return (entry_id, {b"data": msg.dumps()})
+
+
+def test_update_async_data_reads_incrementally():
+    file_manager = load_FileWriter()
+    file_manager.async_data_read_count = 2
+    file_manager.scan_storage["scanID"] = ScanStorage(10, "scanID")
+    key = f"{MessageEndpoints.device_async_readback('scanID', 'dev1')}:stream"
+    with mock.patch.object(file_manager, "producer") as mock_producer:
+        mock_producer.keys.return_value = [key.encode()]
+        mock_producer.xrange.side_effect = [
+            [_async_entry(b"1-0", np.zeros(3)), _async_entry(b"2-0", np.ones(3))],
+            [_async_entry(b"2-0", np.ones(3))],
+        ]
+        file_manager.update_async_data("scanID")
+        mock_producer.xrange.side_effect = [
+            [_async_entry(b"2-0", np.ones(3)), _async_entry(b"3-0", np.ones(2))],
+        ]
+        file_manager.update_async_data("scanID")
+        assert mock_producer.xrange.mock_calls == [
+            mock.call(key, min="-", max="+", count=2),
+            mock.call(key, min=b"2-0", max="+", count=3),
+            mock.call(key, min=b"2-0", max="+", count=3),
+        ]
+    data = file_manager.scan_storage["scanID"].async_data["dev1"]["data"]
+    assert np.allclose(data, [0, 0, 0, 1, 1, 1, 1, 1])
 
 
 def test_process_async_data_single_entry():
@@ -246,3 +300,167 @@ def test_process_async_data_replace():
     ]
     file_manager._process_async_data(data, "scanID", "dev1")
     assert file_manager.scan_storage["scanID"].async_data["dev1"]["data"].shape == (10, 10)
+
+
+def test_scan_storage_ready_to_write_with_streamed_points():
+    storage = ScanStorage(10, "scanID")
+    storage.num_points = 3
+    storage.scan_finished = True
+    storage.append(0, {"data": "data"})
+    storage.append(1, {"data": "data"})
+    assert storage.pop_columns().to_segments() == {0: {"data": "data"}, 1: {"data": "data"}}
+    assert storage.ready_to_write() is False
+    storage.append(2, {"data": "data"})
+    assert storage.ready_to_write() is True
+
+
+def test_scan_storage_counts_duplicate_points_once():
+    storage = ScanStorage(10, "scanID")
+    storage.num_points = 2
+    storage.scan_finished = True
+    storage.append(0, {"data": "data"})
+    storage.append(0, {"data": "data"})
+    assert storage.ready_to_write() is False
+    storage.append(1, {"data": "data"})
+    assert storage.ready_to_write() is True
+
+
+def test_scan_storage_request_write_once():
+    storage = ScanStorage(10, "scanID")
+    storage.num_points = 1
+    assert storage.request_write() is False
+    storage.scan_finished = True
+    storage.append(0, {"data": "data"})
+    assert storage.request_write() is True
+    assert storage.request_write() is False
+    assert storage.write_requested.is_set()
+
+
+def test_check_storage_status_writes_once():
+    file_manager = load_FileWriter()
+    with mock.patch.object(file_manager, "submit_write") as mock_submit:
+        with mock.patch.object(file_manager, "update_baseline_reading") as mock_baseline:
+            with mock.patch.object(file_manager, "update_file_references"):
+                with mock.patch.object(file_manager, "update_async_data"):
+                    for pointID in range(2):
+                        msg = BECMessage.ScanMessage(
+                            point_id=pointID, scanID="scanID", data={}, metadata={}
+                        )
+                        file_manager.insert_to_scan_storage(msg)
+                    mock_baseline.assert_not_called()
+                    msg = BECMessage.ScanStatusMessage(
+                        scanID="scanID",
+                        status="closed",
+                        info={"scan_number": 1, "num_points": 3, "enforce_sync": True},
+                    )
+                    file_manager.update_scan_storage_with_status(msg)
+                    mock_submit.assert_not_called()
+                    msg = BECMessage.ScanMessage(point_id=2, scanID="scanID", data={}, metadata={})
+                    file_manager.insert_to_scan_storage(msg)
+                    file_manager.check_storage_status("scanID")
+                    mock_submit.assert_called_once_with("scanID")
+                    mock_baseline.assert_called_once_with("scanID")
+
+
+def test_streaming_flushes_batches():
+    file_manager = load_FileWriter()
+    file_manager.streaming = True
+    file_manager.streaming_batch_size = 2
+    file_manager.scan_storage["scanID"] = ScanStorage(10, "scanID")
+    file_manager.scan_storage["scanID"].stream_file_path = "path"
+    with mock.patch.object(file_manager, "check_storage_status"):
+        with mock.patch.object(file_manager.writer_pipeline, "submit") as mock_submit:
+            for pointID in range(3):
+                msg = BECMessage.ScanMessage(
+                    point_id=pointID, scanID="scanID", data={"samx": {}}, metadata={}
+                )
+                file_manager.insert_to_scan_storage(msg)
+    storage = file_manager.scan_storage["scanID"]
+    assert storage.streamed_points == 2
+    assert list(storage.columns.to_segments()) == [2]
+    mock_submit.assert_called_once()
+    args = mock_submit.call_args.args
+    assert args[:4] == ("scanID", file_manager._append_to_stream, "scanID", storage)
+    assert args[4].to_segments() == {0: {"samx": {}}, 1: {"samx": {}}}
+
+
+def test_streaming_keeps_segments_on_error():
+    file_manager = load_FileWriter()
+    storage = ScanStorage(10, "scanID")
+    storage.streamed_points = 1
+    file_manager.file_writer.streams["scanID"] = mock.MagicMock()
+    file_manager.file_writer.streams["scanID"].append.side_effect = OSError("disk full")
+    file_manager._append_to_stream("scanID", storage, ScanColumns.from_segments({0: {"samx": {}}}))
+    assert storage.streamed_points == 0
+    assert storage.columns.to_segments() == {0: {"samx": {}}}
+
+
+def test_open_stream_on_scan_status_open():
+    file_manager = load_FileWriter()
+    file_manager.streaming = True
+    msg = BECMessage.ScanStatusMessage(
+        scanID="scanID", status="open", info={"scan_number": 5}, timestamp=10
+    )
+    with mock.patch.object(file_manager.writer_mixin, "compile_full_filename") as mock_path:
+        mock_path.return_value = "path"
+        with mock.patch.object(file_manager.writer_pipeline, "submit") as mock_submit:
+            file_manager.update_scan_storage_with_status(msg)
+            mock_submit.assert_called_once_with(
+                "scanID", file_manager._open_stream, "scanID", "path"
+            )
+    assert file_manager.scan_storage["scanID"].stream_file_path == "path"
+
+
+def test_submit_write_publishes_status():
+    file_manager = load_FileWriter()
+    file_manager.scan_storage["scanID"] = ScanStorage(10, "scanID")
+    file_manager.file_writer = MockWriter(file_manager)
+    with mock.patch.object(file_manager.writer_mixin, "compile_full_filename") as mock_path:
+        mock_path.return_value = "path"
+        with mock.patch.object(file_manager, "producer") as mock_producer:
+            file_manager.submit_write("scanID")
+            file_manager.writer_pipeline.submit("scanID", lambda: None).result(timeout=5)
+    assert "scanID" not in file_manager.scan_storage
+    assert file_manager.file_writer.write_called is True
+    status = [
+        BECMessage.FileMessage.loads(call.args[1])
+        for call in mock_producer.set_and_publish.mock_calls
+    ]
+    assert [msg.metadata["status"] for msg in status] == ["queued", "writing", "finished"]
+    assert [msg.content["done"] for msg in status] == [False, False, True]
+
+
+def test_insert_to_scan_storage_resolves_frames(tmp_path):
+    file_manager = load_FileWriter()
+    file_manager.scan_storage["scanID"] = ScanStorage(10, "scanID")
+    frame_buffer = FrameRingBuffer("eiger.image", directory=str(tmp_path))
+    frame = np.arange(16).reshape(4, 4)
+    data = {"eiger": {"eiger_image": {"value": frame_buffer.write(frame), "timestamp": 1}}}
+    msg = BECMessage.ScanMessage(point_id=0, scanID="scanID", data=data, metadata={})
+    with mock.patch.object(file_manager, "check_storage_status"):
+        file_manager.insert_to_scan_storage(msg)
+    frame_buffer.close()
+    segment = file_manager.scan_storage["scanID"].columns.to_segments()[0]
+    assert np.array_equal(segment["eiger"]["eiger_image"]["value"], frame)
+
+
+def test_overwritten_frames_mark_file_unsuccessful(tmp_path):
+    file_manager = load_FileWriter()
+    file_manager.scan_storage["scanID"] = ScanStorage(10, "scanID")
+    frame_buffer = FrameRingBuffer("eiger.image", directory=str(tmp_path), num_slots=2)
+    descriptors = [frame_buffer.write(np.full((4, 4), ii)) for ii in range(3)]
+    for pointID, descriptor in enumerate(descriptors):
+        data = {"eiger": {"eiger_image": {"value": descriptor, "timestamp": 1}}}
+        msg = BECMessage.ScanMessage(point_id=pointID, scanID="scanID", data=data, metadata={})
+        with mock.patch.object(file_manager, "check_storage_status"):
+            file_manager.insert_to_scan_storage(msg)
+    frame_buffer.close()
+    storage = file_manager.scan_storage["scanID"]
+    assert storage.lost_frames == 1
+    assert storage.columns.to_segments()[0]["eiger"]["eiger_image"]["value"] is None
+    with mock.patch.object(file_manager, "file_writer"), mock.patch.object(
+        file_manager, "connector"
+    ) as mock_connector, mock.patch.object(file_manager, "_publish_file_status") as mock_publish:
+        file_manager._write_storage("scanID", storage, "path")
+        mock_connector.raise_alarm.assert_called_once()
+        mock_publish.assert_called_with("scanID", "path", "failed", successful=False)
@@ -0,0 +1,224 @@
+import os
+import time
+from unittest import mock
+
+import numpy as np
+from bec_lib.core import BECMessage, MessageEndpoints
+from bec_lib.core.frame_buffer import FrameRingBuffer
+from test_file_writer_manager import FileWriterManagerMock, _async_entry, load_FileWriter
+
+from file_writer.journal import RecordType, RecoveryJournal
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=protected-access
+
+
+def test_journal_roundtrip(tmp_path):
+    journal = RecoveryJournal(str(tmp_path))
+    journal.append("scanID", RecordType.POINT, b"point")
+    journal.record_async(
+        "scanID", "key", "dev1", [(b"1-0", {b"data": b"a"}), (b"2-0", {b"data": b"b"})]
+    )
+    journal.close()
+    assert journal.pending_scans() == ["scanID"]
+    records = list(journal.read("scanID"))
+    assert records[0] == (RecordType.POINT, b"point")
+    assert records[1] == (
+        RecordType.ASYNC,
+        {"key": "key", "device": "dev1", "cursor": b"2-0", "data": [b"a", b"b"]},
+    )
+    journal.remove("scanID")
+    assert journal.pending_scans() == []
+
+
+def test_journal_drops_truncated_record(tmp_path):
+    journal = RecoveryJournal(str(tmp_path))
+    journal.append("scanID", RecordType.POINT, b"point")
+    journal.close()
+    with open(tmp_path / "scanID.journal", "ab") as file:
+        file.write(journal.header.pack(RecordType.POINT, 100) + b"partial")
+    assert list(journal.read("scanID")) == [(RecordType.POINT, b"point")]
+    journal.append("scanID", RecordType.POINT, b"next")
+    journal.close()
+    assert [payload for _, payload in journal.read("scanID")] == [b"point", b"next"]
+
+
+def test_file_writer_recovers_scans_from_journal(tmp_path):
+    file_manager = load_FileWriter()
+    file_manager.journal = RecoveryJournal(str(tmp_path))
+    key = f"{MessageEndpoints.device_async_readback('scanID', 'dev1')}:stream"
+    with mock.patch.object(file_manager, "producer") as mock_producer:
+        mock_producer.keys.return_value = [key.encode()]
+        mock_producer.xrange.return_value = [_async_entry(b"1-0", np.zeros(3))]
+        file_manager.update_scan_storage_with_status(
+            BECMessage.ScanStatusMessage(
+                scanID="scanID", status="open", info={"scan_number": 5}, timestamp=10
+            )
+        )
+        for pointID in range(2):
+            file_manager.insert_to_scan_storage(
+                BECMessage.ScanMessage(
+                    point_id=pointID,
+                    scanID="scanID",
+                    data={"samx": {"samx": {"value": pointID}}},
+                    metadata={"scan_number": 5},
+                )
+            )
+        file_manager.update_async_data("scanID")
+    file_manager.journal.close()
+
+    recovered = load_FileWriter()
+    recovered.journal = RecoveryJournal(str(tmp_path))
+    recovered.recover_scans()
+    storage = recovered.scan_storage["scanID"]
+    assert storage.scan_number == 5
+    assert storage.start_time == 10
+    assert storage.received_points == 2
+    assert storage.columns.to_segments()[1] == {"samx": {"samx": {"value": 1}}}
+    assert storage.async_cursors[key] == b"1-0"
+    assert np.allclose(storage.async_data["dev1"]["data"], np.zeros(3))
+
+    with mock.patch.object(recovered, "submit_write") as mock_submit:
+        recovered.update_scan_storage_with_status(
+            BECMessage.ScanStatusMessage(
+                scanID="scanID",
+                status="closed",
+                info={"scan_number": 5, "num_points": 2, "enforce_sync": True},
+                timestamp=20,
+            )
+        )
+        mock_submit.assert_called_once_with("scanID")
+
+
+def test_file_writer_recovers_scans_before_receiving_data(tmp_path):
+    calls = []
+    with mock.patch.object(
+        FileWriterManagerMock, "recover_scans", side_effect=lambda: calls.append("recover") or []
+    ), mock.patch.object(
+        FileWriterManagerMock, "fetch_missed_data", side_effect=lambda _: calls.append("fetch")
+    ), mock.patch.object(
+        FileWriterManagerMock,
+        "_start_scan_segment_consumer",
+        side_effect=lambda: calls.append("consumer"),
+    ), mock.patch.object(
+        FileWriterManagerMock,
+        "_start_scan_status_consumer",
+        side_effect=lambda: calls.append("consumer"),
+    ):
+        load_FileWriter({"journal_path": str(tmp_path)})
+    assert calls == ["recover", "consumer", "consumer", "fetch"]
+
+
+def test_file_writer_journals_resolved_frames(tmp_path):
+    file_manager = load_FileWriter()
+    file_manager.journal = RecoveryJournal(str(tmp_path / "journal"))
+    frame_buffer = FrameRingBuffer("eiger.image", directory=str(tmp_path / "frames"))
+    frame = np.arange(16).reshape(4, 4)
+    data = {"eiger": {"eiger_image": {"value": frame_buffer.write(frame), "timestamp": 1}}}
+    msg = BECMessage.ScanMessage(point_id=0, scanID="scanID", data=data, metadata={})
+    file_manager.insert_to_scan_storage(msg)
+    file_manager.journal.close()
+    frame_buffer.close()
+
+    recovered = load_FileWriter()
+    recovered.journal = RecoveryJournal(str(tmp_path / "journal"))
+    recovered.recover_scans()
+    segment = recovered.scan_storage["scanID"].columns.to_segments()[0]
+    assert np.array_equal(segment["eiger"]["eiger_image"]["value"], frame)
+
+
+def test_file_writer_removes_expired_journals(tmp_path):
+    file_manager = load_FileWriter()
+    file_manager.journal = RecoveryJournal(str(tmp_path))
+    file_manager.journal_max_age = 3600
+    for scanID in ["old", "new"]:
+        file_manager.insert_to_scan_storage(
+            BECMessage.ScanMessage(
+                point_id=0,
+                scanID=scanID,
+                data={"samx": {"samx": {"value": 0}}},
+                metadata={"scan_number": 1},
+            )
+        )
+    file_manager.journal.close()
+    past = time.time() - 7200
+    os.utime(tmp_path / "old.journal", (past, past))
+    file_manager.remove_expired_journals()
+    assert file_manager.journal.pending_scans() == ["new"]
+    assert list(file_manager.scan_storage) == ["new"]
+
+
+def test_file_writer_fetches_data_missed_while_down(tmp_path):
+    file_manager = load_FileWriter()
+    file_manager.journal = RecoveryJournal(str(tmp_path))
+    file_manager.update_scan_storage_with_status(
+        BECMessage.ScanStatusMessage(
+            scanID="scanID", status="open", info={"scan_number": 5}, timestamp=10
+        )
+    )
+    segments = {
+        pointID: BECMessage.ScanMessage(
+            point_id=pointID,
+            scanID="scanID",
+            data={"samx": {"samx": {"value": pointID}}},
+            metadata={"scan_number": 5},
+        )
+        for pointID in range(3)
+    }
+    file_manager.insert_to_scan_storage(segments[0])
+    file_manager.journal.close()
+
+    # the scan has been closed while the file writer was down
+    closed = BECMessage.ScanStatusMessage(
+        scanID="scanID",
+        status="closed",
+        info={"scan_number": 5, "num_points": 3, "enforce_sync": True},
+        timestamp=20,
+    )
+    public_data = {
+        MessageEndpoints.public_scan_segment("scanID", pointID): msg.dumps()
+        for pointID, msg in segments.items()
+    }
+    public_data[MessageEndpoints.public_scan_info("scanID")] = closed.dumps()
+    recovered = load_FileWriter()
+    recovered.journal = RecoveryJournal(str(tmp_path))
+    with mock.patch.object(recovered, "producer") as mock_producer, mock.patch.object(
+        recovered, "submit_write"
+    ) as mock_submit:
+        segment_keys = [
+            f"{MessageEndpoints.public_scan_segment('scanID', pointID)}:val".encode()
+            for pointID in segments
+        ]
+        mock_producer.keys.side_effect = lambda pattern: (
+            segment_keys if pattern == MessageEndpoints.public_scan_segment("scanID", "*") else []
+        )
+        mock_producer.get.side_effect = public_data.get
+        recovered.fetch_missed_data(recovered.recover_scans())
+        mock_submit.assert_called_once_with("scanID")
+    storage = recovered.scan_storage["scanID"]
+    assert storage.received_points == 3
+    assert storage.scan_finished
+    # only the missing points are fetched
+    fetched = [call.args[0] for call in mock_producer.get.call_args_list]
+    assert MessageEndpoints.public_scan_segment("scanID", 0) not in fetched
+    recovered.journal.close()
+    records = [record_type for record_type, _ in recovered.journal.read("scanID")]
+    assert records.count(RecordType.POINT) == 3
+
+
+def test_file_writer_closes_journal_of_failed_files(tmp_path):
+    file_manager = load_FileWriter()
+    file_manager.journal = RecoveryJournal(str(tmp_path))
+    file_manager.insert_to_scan_storage(
+        BECMessage.ScanMessage(
+            point_id=0,
+            scanID="scanID",
+            data={"samx": {"samx": {"value": 0}}},
+            metadata={"scan_number": 1},
+        )
+    )
+    storage = file_manager.scan_storage.pop("scanID")
+    with mock.patch.object(file_manager.file_writer, "write", side_effect=RuntimeError):
+        file_manager._write_storage("scanID", storage, str(tmp_path / "S00001.h5"))
+    assert "scanID" not in file_manager.journal._files
+    assert file_manager.journal.pending_scans() == ["scanID"]
@@ -0,0 +1,82 @@
+import h5py
+import numpy as np
+
+from file_writer.file_writer import HDF5Storage, HDF5StorageWriter
+from file_writer.layout import DatasetLayout, LayoutPolicy
+
+# pylint: disable=missing-function-docstring
+
+
+def test_dataset_layout_pads_chunks():
+    layout = DatasetLayout(chunks=[1], compression="gzip", compression_opts=4, shuffle=True)
+    data, kwargs = layout.apply(np.zeros((10, 32, 64)))
+    assert data.shape == (10, 32, 64)
+    assert kwargs == {
+        "chunks": (1, 32, 64),
+        "compression": "gzip",
+        "compression_opts": 4,
+        "shuffle": True,
+    }
+
+
+def test_dataset_layout_skips_scalars_and_strings():
+    layout = DatasetLayout(chunks=True, compression="lzf", dtype="float32")
+    data, kwargs = layout.apply(1.5)
+    assert data.dtype == np.float32
+    assert kwargs == {}
+    assert layout.apply("text") == ("text", {})
+
+
+def test_layout_policy_selects_first_matching_rule():
+    policy = LayoutPolicy(
+        [
+            {"device_class": "*Eiger*", "compression": "lzf"},
+            {"min_ndim": 2, "compression": "gzip"},
+            {"signal": "*_setpoint", "dtype": "float32"},
+        ]
+    )
+    assert policy.get_layout("eiger", np.zeros(3), "ophyd_devices.Eiger9M").compression == "lzf"
+    assert policy.get_layout("roi", np.zeros((3, 3)), "SynAxisOPAAS").compression == "gzip"
+    assert policy.get_layout("samx_setpoint", [1, 2], "SynAxisOPAAS").dtype == "float32"
+    assert policy.get_layout("samx", [1, 2], "SynAxisOPAAS") is None
+
+
+def test_layout_policy_ignores_invalid_rules():
+    policy = LayoutPolicy([{"compresion": "gzip"}])
+    assert policy.rules == []
+
+
+def test_storage_writer_applies_layouts(tmp_path):
+    storage = HDF5Storage()
+    entry = storage.create_group("entry")
+    entry.create_dataset("explicit", np.zeros((4, 4)), layout=DatasetLayout(compression="lzf"))
+    entry.create_dataset("implicit", np.zeros((4, 4)))
+    collection = entry.create_group("collection")
+    collection.attrs["NX_class"] = "NXcollection"
+    collection.create_group("bec")
+    device_storage = {
+        "eiger": [{"eiger": {"value": np.zeros((8, 8)), "timestamp": 1}}] * 3,
+        "samx": [{"samx": {"value": 1.0, "timestamp": 1}}] * 3,
+    }
+    policy = LayoutPolicy(
+        [
+            {"device_class": "*Eiger*", "chunks": [1], "compression": "gzip"},
+            {"signal": "implicit", "compression": "gzip", "dtype": "float32"},
+        ]
+    )
+    with h5py.File(tmp_path / "test.h5", "w") as file:
+        HDF5StorageWriter.write_to_file(
+            storage._storage,
+            device_storage,
+            file,
+            layout_policy=policy,
+            device_classes={"eiger": "Eiger9M", "samx": "SynAxisOPAAS"},
+        )
+    with h5py.File(tmp_path / "test.h5", "r") as file:
+        assert file["entry/explicit"].compression == "lzf"
+        assert file["entry/implicit"].compression == "gzip"
+        assert file["entry/implicit"].dtype == np.float32
+        eiger = file["entry/collection/bec/eiger/eiger/value"]
+        assert eiger.compression == "gzip"
+        assert eiger.chunks == (1, 8, 8)
+        assert file["entry/collection/bec/samx/samx/value"].compression is None
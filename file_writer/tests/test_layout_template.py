@@ -0,0 +1,113 @@
+import os
+from unittest import mock
+
+import h5py
+import pytest
+from test_file_writer_manager import load_FileWriter
+
+import file_writer
+from file_writer import NeXusFileXMLWriter
+from file_writer.file_writer import HDF5Storage, HDF5StorageWriter
+from file_writer.layout_template import (
+    DataBinding,
+    NeXusLayoutError,
+    PluginLayout,
+    compile_layout,
+    load_layout_template,
+)
+
+# pylint: disable=missing-function-docstring
+
+dir_path = os.path.dirname(file_writer.__file__)
+layout_file = os.path.abspath(os.path.join(dir_path, "../layout_cSAXS_NXsas.xml"))
+
+
+def test_compile_layout_converts_constants():
+    layout = {
+        "hdf5_layout": {
+            "group": {
+                "@name": "entry",
+                "attribute": {
+                    "@name": "version",
+                    "@source": "constant",
+                    "@value": "1",
+                    "@type": "int",
+                },
+                "dataset": [
+                    {"@name": "x", "@source": "bec", "@entry": "samx"},
+                    {"@name": "mode", "@source": "constant", "@value": "monitor"},
+                ],
+            }
+        }
+    }
+    (entry,) = compile_layout(layout)
+    assert entry.name == "entry"
+    attribute, dataset_x, dataset_mode = entry.children
+    assert attribute.value == 1
+    assert dataset_x.entry == "samx"
+    assert dataset_mode.value == "monitor"
+
+
+def test_compile_layout_rejects_unknown_types():
+    with pytest.raises(NeXusLayoutError):
+        compile_layout(
+            {"dataset": {"@name": "x", "@source": "constant", "@value": "1", "@type": "bool"}}
+        )
+
+
+def test_load_layout_template_is_cached():
+    assert load_layout_template(layout_file) is load_layout_template(layout_file)
+
+
+def test_nexus_file_xml_writer_reuses_layout(tmp_path):
+    file_manager = load_FileWriter()
+    writer = NeXusFileXMLWriter(file_manager)
+    writer.configure(layout_file=layout_file)
+    with mock.patch.object(writer, "_create_device_data_storage", return_value={"samx": [0, 1, 2]}):
+        for ii in range(2):
+            writer.write(str(tmp_path / f"test_{ii}.h5"), {})
+    with h5py.File(tmp_path / "test_1.h5", "r") as test_file:
+        assert test_file["entry"].attrs["NX_class"] == "NXentry"
+        assert list(test_file["entry/sample/x_translation"][()]) == [0, 1, 2]
+
+
+def test_plugin_layout_is_built_once_per_device_config():
+    file_manager = load_FileWriter()
+    layout_func = mock.MagicMock(side_effect=lambda storage, *_args: storage)
+    plugin = PluginLayout(layout_func)
+    device_manager = file_manager.device_manager
+    first = plugin(HDF5Storage(), {}, {}, device_manager)
+    assert plugin(HDF5Storage(), {"samx": 1}, {}, device_manager) is first
+    assert layout_func.call_count == 1
+    plugin(HDF5Storage(), {}, {"eiger": {"path": "eiger.h5"}}, device_manager)
+    assert layout_func.call_count == 2
+    device_manager.devices.samx._config["enabled"] = False
+    plugin(HDF5Storage(), {}, {}, device_manager)
+    assert layout_func.call_count == 3
+
+
+def test_plugin_layout_binds_scan_data(tmp_path):
+    file_manager = load_FileWriter()
+    storage = HDF5Storage()
+    entry = storage.create_group("entry")
+    entry.attrs["start_time"] = DataBinding(lambda data, _: data.get("start_time"))
+    entry.create_dataset("samx", data=DataBinding(lambda data, _: data["samx"]))
+    entry.create_dataset("missing", data=DataBinding(lambda data, _: None))
+    entry.create_ext_link("eiger", DataBinding(lambda _, refs: refs["eiger"]["path"]), "data")
+    plugin = PluginLayout(lambda *_args: storage)
+    for ii in range(2):
+        data = {"start_time": f"start_{ii}", "samx": [ii, ii + 1]}
+        writer_storage = plugin(HDF5Storage(), data, {}, file_manager.device_manager)
+        with h5py.File(tmp_path / f"test_{ii}.h5", "w") as file:
+            HDF5StorageWriter.write_to_file(
+                writer_storage._storage,
+                {},
+                file,
+                data=data,
+                file_references={"eiger": {"path": f"eiger_{ii}.h5"}},
+            )
+    with h5py.File(tmp_path / "test_1.h5", "r") as file:
+        assert file["entry"].attrs["start_time"] == "start_1"
+        assert list(file["entry/samx"][()]) == [1, 2]
+        assert "missing" not in file["entry"]
+        assert file["entry"].get("eiger", getlink=True).filename == "eiger_1.h5"
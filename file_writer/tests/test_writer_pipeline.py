@@ -0,0 +1,58 @@
+import threading
+from unittest import mock
+
+import pytest
+
+from file_writer.writer_pipeline import WriterPipeline
+
+# pylint: disable=missing-function-docstring
+
+
+def test_writer_pipeline_keeps_order_per_scan():
+    pipeline = WriterPipeline(num_workers=3)
+    results = {"scan1": [], "scan2": []}
+    futures = []
+    for ii in range(20):
+        for scanID in results:
+            futures.append(pipeline.submit(scanID, results[scanID].append, ii))
+    for future in futures:
+        future.result(timeout=5)
+    assert results["scan1"] == list(range(20))
+    assert results["scan2"] == list(range(20))
+    pipeline.shutdown()
+
+
+def test_writer_pipeline_runs_scans_in_parallel():
+    pipeline = WriterPipeline(num_workers=2)
+    event = threading.Event()
+    blocked = pipeline.submit("scan1", event.wait, 5)
+    pipeline.submit("scan2", event.set).result(timeout=5)
+    assert blocked.result(timeout=5) is True
+    pipeline.shutdown()
+
+
+def test_writer_pipeline_reports_errors():
+    pipeline = WriterPipeline()
+
+    def fail():
+        raise ValueError("error")
+
+    with pytest.raises(ValueError):
+        pipeline.submit("scan1", fail).result(timeout=5)
+    assert pipeline.submit("scan1", lambda: 1).result(timeout=5) == 1
+    pipeline.shutdown()
+
+
+def test_writer_pipeline_does_not_block_when_full():
+    pipeline = WriterPipeline(num_workers=1, queue_size=1)
+    event = threading.Event()
+    pipeline.submit("scan1", event.wait, 5)
+    with mock.patch("file_writer.writer_pipeline.logger") as mock_logger:
+        futures = [pipeline.submit("scan2", lambda: None) for _ in range(3)]
+        mock_logger.warning.assert_called_once()
+    assert pipeline.pending_jobs == 4
+    event.set()
+    for future in futures:
+        future.result(timeout=5)
+    pipeline.shutdown()
+    assert pipeline.pending_jobs == 0
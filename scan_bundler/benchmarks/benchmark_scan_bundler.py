@@ -0,0 +1,349 @@
+"""
+Throughput benchmark for the scan bundler.
+
+The benchmark runs a ScanBundler against a local redis-server and feeds it with
+synthetic ScanStatusMessages and DeviceMessages. It reports the number of bundled
+points per second, the end-to-end latency from publishing the last device reading
+of a point to receiving the corresponding scan segment and the memory usage of the
+benchmark process (which includes the scan bundler).
+
+Examples:
+    Start a private redis-server and run a step scan with 20 monitored devices:
+    >>> python benchmark_scan_bundler.py --start-redis --scan-type step --monitored 20 --points 2000
+
+    Run a fly scan with 10 monitored devices at 500 points per second:
+    >>> python benchmark_scan_bundler.py --start-redis --scan-type fly --monitored 10 --rate 500
+
+    Run a step scan with additional baseline devices:
+    >>> python benchmark_scan_bundler.py --start-redis --scan-type mixed --baseline 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import uuid
+
+import msgpack
+import numpy as np
+import psutil
+from bec_lib.core import BECMessage, MessageEndpoints, RedisConnector, ServiceConfig, bec_logger
+
+from scan_bundler import ScanBundler
+
+logger = bec_logger.logger
+
+
+def get_free_port() -> int:
+    """Get a free TCP port on localhost."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def start_redis_server(port: int) -> subprocess.Popen:
+    """Start a redis-server without persistence on the given port."""
+    executable = shutil.which("redis-server")
+    if executable is None:
+        raise RuntimeError("Could not find redis-server. Please install redis or use --redis.")
+    proc = subprocess.Popen(
+        [executable, "--port", str(port), "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            with socket.create_connection(("localhost", port), timeout=0.1):
+                return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError(f"redis-server did not start on port {port}.")
+
+
+def _device_config(name: str, acquisition_group: str, readout_priority: str) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "accessGroups": "customer",
+        "name": name,
+        "sessionId": "benchmark",
+        "enabled": True,
+        "enabled_set": True,
+        "acquisitionConfig": {
+            "acquisitionGroup": acquisition_group,
+            "readoutPriority": readout_priority,
+            "schedule": "sync",
+        },
+        "deviceClass": "SynAxisOPAAS",
+        "deviceConfig": {"name": name, "labels": name},
+        "deviceTags": ["benchmark"],
+    }
+
+
+def create_device_config(num_motors: int, num_monitored: int, num_baseline: int) -> list:
+    """Create a synthetic device config with motors, monitored and baseline devices."""
+    devices = [_device_config(f"motor{ii}", "motor", "monitored") for ii in range(num_motors)]
+    devices.extend(
+        _device_config(f"mon{ii}", "monitor", "monitored") for ii in range(num_monitored)
+    )
+    devices.extend(_device_config(f"bl{ii}", "monitor", "baseline") for ii in range(num_baseline))
+    devices.append(_device_config("flyer", "detector", "ignored"))
+    return devices
+
+
+def _device_message(name: str, value, metadata: dict) -> BECMessage.DeviceMessage:
+    return BECMessage.DeviceMessage(
+        signals={name: {"value": value, "timestamp": time.time()}}, metadata=metadata
+    )
+
+
+class SegmentStatistics:
+    """Collect latencies of the scan segments published by the scan bundler."""
+
+    def __init__(self) -> None:
+        self.sent = {}
+        self.latencies = []
+        self.received = 0
+        self.first_sent = None
+        self.last_received = None
+        self.done = threading.Event()
+        self.expected_points = 0
+        self._lock = threading.Lock()
+
+    def point_sent(self, pointID: int) -> None:
+        now = time.time()
+        with self._lock:
+            if self.first_sent is None:
+                self.first_sent = now
+            self.sent[pointID] = now
+
+    @staticmethod
+    def _scan_segment_callback(msg, *, parent, **_kwargs) -> None:
+        now = time.time()
+        msgs = BECMessage.ScanMessage.loads(msg.value)
+        if not isinstance(msgs, list):
+            msgs = [msgs]
+        with parent._lock:
+            for scan_msg in msgs:
+                sent = parent.sent.pop(scan_msg.content["point_id"], None)
+                if sent is None:
+                    continue
+                parent.latencies.append(now - sent)
+                parent.received += 1
+            parent.last_received = now
+            if parent.received >= parent.expected_points:
+                parent.done.set()
+
+
+class MemorySampler(threading.Thread):
+    """Sample the RSS of the current process in the background."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        super().__init__(daemon=True, name="memory_sampler")
+        self.process = psutil.Process()
+        self.interval = interval
+        self.peak_rss = self.process.memory_info().rss
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+            time.sleep(self.interval)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def _send_scan_status(producer, scanID: str, status: str, info: dict) -> None:
+    msg = BECMessage.ScanStatusMessage(scanID=scanID, status=status, info=info).dumps()
+    producer.set_and_publish(MessageEndpoints.scan_status(), msg)
+
+
+def _wait_for(condition, timeout: float) -> bool:
+    start = time.time()
+    while not condition():
+        if time.time() - start > timeout:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def run_scan(
+    scan_bundler: ScanBundler,
+    producer,
+    stats: SegmentStatistics,
+    scan_type: str,
+    monitored: list,
+    baseline: list,
+    num_points: int,
+    rate: float,
+    timeout: float,
+) -> None:
+    """Feed a single synthetic scan into the scan bundler."""
+    scanID = str(uuid.uuid4())
+    info = {
+        "scan_type": "fly" if scan_type == "fly" else "step",
+        "scan_motors": [],
+        "readout_priority": {"monitored": [], "baseline": [], "ignored": []},
+        "queueID": str(uuid.uuid4()),
+        "scan_number": 1,
+        "num_points": num_points,
+    }
+    if scan_type == "fly":
+        # the bundler merges the last readback of all monitored devices into each fly scan point
+        pipe = producer.pipeline()
+        for dev in monitored:
+            msg = _device_message(dev, 0.0, {"scanID": scanID}).dumps()
+            producer.set(MessageEndpoints.device_readback(dev), msg, pipe=pipe)
+        pipe.execute()
+
+    stats.expected_points = num_points
+    _send_scan_status(producer, scanID, "open", info)
+    if not _wait_for(lambda: scanID in scan_bundler.storage_initialized, timeout):
+        raise TimeoutError(f"Scan bundler did not initialize scan {scanID}.")
+
+    for dev in baseline:
+        metadata = {"scanID": scanID, "readout_priority": "baseline"}
+        producer.set_and_publish(
+            MessageEndpoints.device_read(dev), _device_message(dev, 0.0, metadata).dumps()
+        )
+
+    period = 1 / rate if rate else 0
+    start = time.time()
+    for pointID in range(num_points):
+        metadata = {"scanID": scanID, "pointID": pointID, "readout_priority": "monitored"}
+        pipe = producer.pipeline()
+        if scan_type == "fly":
+            msg = _device_message("flyer", np.random.rand(), metadata).dumps()
+            producer.set_and_publish(MessageEndpoints.device_read("flyer"), msg, pipe=pipe)
+        else:
+            for dev in monitored:
+                msg = _device_message(dev, np.random.rand(), metadata).dumps()
+                producer.set_and_publish(MessageEndpoints.device_read(dev), msg, pipe=pipe)
+        pipe.execute()
+        stats.point_sent(pointID)
+        if period:
+            delay = start + (pointID + 1) * period - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+    if not stats.done.wait(timeout):
+        logger.warning(f"Received {stats.received} of {num_points} points before timeout.")
+    _send_scan_status(producer, scanID, "closed", info)
+
+
+def run_benchmark(args) -> dict:
+    """Run the benchmark and return a summary of the results."""
+    redis_proc = None
+    if args.start_redis:
+        port = get_free_port()
+        redis_proc = start_redis_server(port)
+        host = "localhost"
+    else:
+        host, port = args.redis.split(":")
+    connector = RedisConnector(f"{host}:{port}")
+    producer = connector.producer()
+
+    num_motors = args.motors if args.scan_type != "fly" else 0
+    num_baseline = args.baseline if args.scan_type == "mixed" else 0
+    devices = create_device_config(num_motors, args.monitored, num_baseline)
+    producer.set(MessageEndpoints.device_config(), msgpack.dumps(devices))
+    monitored = [
+        dev["name"] for dev in devices if dev["acquisitionConfig"]["readoutPriority"] == "monitored"
+    ]
+    baseline = [
+        dev["name"] for dev in devices if dev["acquisitionConfig"]["readoutPriority"] == "baseline"
+    ]
+
+    stats = SegmentStatistics()
+    consumer = connector.consumer(
+        MessageEndpoints.scan_segment(), cb=SegmentStatistics._scan_segment_callback, parent=stats
+    )
+    consumer.start()
+
+    sampler = MemorySampler()
+    rss_start = sampler.process.memory_info().rss
+    scan_bundler = ScanBundler(ServiceConfig(redis={"host": host, "port": port}), RedisConnector)
+    sampler.start()
+    try:
+        run_scan(
+            scan_bundler,
+            producer,
+            stats,
+            args.scan_type,
+            monitored,
+            baseline,
+            args.points,
+            args.rate,
+            args.timeout,
+        )
+    finally:
+        sampler.stop()
+        consumer.shutdown()
+        scan_bundler.shutdown()
+        if redis_proc is not None:
+            redis_proc.terminate()
+            redis_proc.wait()
+
+    latencies = np.asarray(stats.latencies) * 1e3
+    duration = (stats.last_received or time.time()) - (stats.first_sent or time.time())
+    return {
+        "scan_type": args.scan_type,
+        "points": args.points,
+        "received_points": stats.received,
+        "monitored_devices": len(monitored),
+        "baseline_devices": len(baseline),
+        "target_rate": args.rate,
+        "points_per_second": stats.received / duration if duration > 0 else float("nan"),
+        "latency_ms_mean": float(np.mean(latencies)) if latencies.size else float("nan"),
+        "latency_ms_p50": float(np.percentile(latencies, 50)) if latencies.size else float("nan"),
+        "latency_ms_p95": float(np.percentile(latencies, 95)) if latencies.size else float("nan"),
+        "latency_ms_max": float(np.max(latencies)) if latencies.size else float("nan"),
+        "rss_start_mb": rss_start / 1e6,
+        "rss_peak_mb": sampler.peak_rss / 1e6,
+    }
+
+
+def main():
+    """
+    Launch the scan bundler benchmark.
+    """
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--redis", default="localhost:6379", help="redis server address")
+    parser.add_argument(
+        "--start-redis",
+        action="store_true",
+        help="start a private redis-server on a free port instead of using --redis",
+    )
+    parser.add_argument("--scan-type", choices=["step", "fly", "mixed"], default="step")
+    parser.add_argument("--points", type=int, default=1000, help="number of points")
+    parser.add_argument("--motors", type=int, default=2, help="number of monitored motors")
+    parser.add_argument("--monitored", type=int, default=10, help="number of monitored devices")
+    parser.add_argument("--baseline", type=int, default=20, help="number of baseline devices")
+    parser.add_argument(
+        "--rate", type=float, default=0, help="points per second; 0 sends as fast as possible"
+    )
+    parser.add_argument("--timeout", type=float, default=60, help="timeout in seconds")
+    parser.add_argument("--json", action="store_true", help="print the results as json")
+    clargs = parser.parse_args()
+
+    bec_logger.level = bec_logger.LOGLEVEL.WARNING
+    results = run_benchmark(clargs)
+    if clargs.json:
+        print(json.dumps(results, indent=4))
+        return
+    for key, val in results.items():
+        if isinstance(val, float):
+            print(f"{key:>20}: {val:.2f}")
+        else:
+            print(f"{key:>20}: {val}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import threading
 import time
 import uuid
 from collections.abc import Iterable
@@ -9,6 +10,7 @@ import msgpack
 import numpy as np
 
 from bec_lib.core import MessageEndpoints, bec_logger
+from bec_lib.core.frame_buffer import FrameReader, FrameUnavailableError, is_frame_descriptor
 
 from .emitter import EmitterBase
 
@@ -23,6 +25,9 @@ class BlueskyEmitter(EmitterBase):
         super().__init__(scan_bundler.producer)
         self.scan_bundler = scan_bundler
         self.bluesky_metadata = {}
+        self.pending_points = {}
+        self.frame_reader = FrameReader()
+        self._lock = threading.Lock()
 
     def send_run_start_document(self, scanID) -> None:
         """Bluesky only: send run start documents."""
@@ -52,8 +57,11 @@ class BlueskyEmitter(EmitterBase):
             # copied from bluesky/callbacks/stream.py:
             for key, val in dev.signals.items():
                 val = val["value"]
+                if is_frame_descriptor(val):
+                    # frame published through a shared frame buffer
+                    key_desc = {"dtype": "array", "shape": tuple(val["bec_frame"]["shape"])}
                 # String key
-                if isinstance(val, str):
+                elif isinstance(val, str):
                     key_desc = {"dtype": "string", "shape": []}
                 # Iterable
                 elif isinstance(val, Iterable):
@@ -87,12 +95,18 @@ class BlueskyEmitter(EmitterBase):
     def send_descriptor_document(self, scanID) -> None:
         """Bluesky only: send descriptor document"""
         doc = self._get_descriptor_document(scanID)
-        self.bluesky_metadata[scanID]["descriptor"] = doc
         self.producer.send(MessageEndpoints.bluesky_events(), msgpack.dumps(("descriptor", doc)))
+        with self._lock:
+            self.bluesky_metadata[scanID]["descriptor"] = doc
+            for pointID in self.pending_points.pop(scanID, []):
+                self._add_event(scanID, pointID)
 
     def cleanup_storage(self, scanID):
         """remove old scanIDs to free memory"""
 
+        with self._lock:
+            self.pending_points.pop(scanID, None)
+        self.frame_reader.clear()
         for storage in [
             "bluesky_metadata",
         ]:
@@ -102,10 +116,53 @@ class BlueskyEmitter(EmitterBase):
                 logger.warning(f"Failed to remove {scanID} from {storage}.")
 
     def send_bluesky_scan_point(self, scanID, pointID) -> None:
-        self.producer.send(
-            MessageEndpoints.bluesky_events(),
-            msgpack.dumps(("event", self._prepare_bluesky_event_data(scanID, pointID))),
-        )
+        """Queue a scan point for publishing. Points that arrive before the
+        descriptor document has been sent are held back until it is available.
+        Points are queued under the lock so that held back points are never
+        overtaken by newer ones."""
+        with self._lock:
+            if not self.bluesky_metadata.get(scanID, {}).get("descriptor"):
+                self.pending_points.setdefault(scanID, []).append(pointID)
+                return
+            self._add_event(scanID, pointID)
+
+    def _add_event(self, scanID, pointID) -> None:
+        self._send_buffer.put(self._prepare_bluesky_event_data(scanID, pointID))
+
+    def _send_messages(self, msgs_to_send: list) -> None:
+        pipe = self.producer.pipeline()
+        for event_page in self._pack_event_pages(msgs_to_send):
+            self.producer.send(
+                MessageEndpoints.bluesky_events(),
+                msgpack.dumps(("event_page", event_page)),
+                pipe=pipe,
+            )
+        pipe.execute()
+
+    @staticmethod
+    def _pack_event_pages(events: list) -> list:
+        """Pack a list of events into event pages, one page per descriptor.
+        Events are ordered by seq_num within each page."""
+        pages = {}
+        for event in sorted(events, key=lambda event: event["seq_num"]):
+            page = pages.get(event["descriptor"])
+            if page is None:
+                page = pages[event["descriptor"]] = {
+                    "descriptor": event["descriptor"],
+                    "time": [],
+                    "seq_num": [],
+                    "uid": [],
+                    "filled": {},
+                    "data": {},
+                    "timestamps": {},
+                }
+            for key in ["time", "seq_num", "uid"]:
+                page[key].append(event[key])
+            for key, val in event["data"].items():
+                page["data"].setdefault(key, []).append(val)
+            for key, val in event["timestamps"].items():
+                page["timestamps"].setdefault(key, []).append(val)
+        return list(pages.values())
 
     def _prepare_bluesky_event_data(self, scanID, pointID) -> dict:
         # event = {
@@ -131,8 +188,6 @@ class BlueskyEmitter(EmitterBase):
         # }
         sb = self.scan_bundler
         metadata = self.bluesky_metadata[scanID]
-        while not metadata.get("descriptor"):
-            time.sleep(0.01)
 
         bls_event = {
             "descriptor": metadata["descriptor"].get("uid"),
@@ -145,10 +200,22 @@ class BlueskyEmitter(EmitterBase):
         }
         for data_point in sb.sync_storage[scanID][pointID].values():
             for key, val in data_point.items():
-                bls_event["data"][key] = val["value"]
+                bls_event["data"][key] = self._get_event_value(val["value"], key)
                 bls_event["timestamps"][key] = val["timestamp"]
         return bls_event
 
+    def _get_event_value(self, value, key: str):
+        if not is_frame_descriptor(value):
+            return value
+        try:
+            return self.frame_reader.read(value)
+        except FrameUnavailableError as exc:
+            logger.error(f"Failed to read the frame of signal {key} for the bluesky event: {exc}")
+            return None
+
+    def on_scan_point_emit(self, scanID: str, pointID: int):
+        self.send_bluesky_scan_point(scanID, pointID)
+
     def on_cleanup(self, scanID: str):
         self.cleanup_storage(scanID)
 
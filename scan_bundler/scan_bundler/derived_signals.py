@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import ast
+
+import numpy as np
+
+from bec_lib.core import bec_logger
+from bec_lib.core.frame_buffer import FrameReader, FrameUnavailableError, is_frame_descriptor
+
+logger = bec_logger.logger
+
+ALLOWED_FUNCTIONS = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "log": np.log,
+    "log10": np.log10,
+    "exp": np.exp,
+    "sum": np.sum,
+    "mean": np.mean,
+    "min": np.min,
+    "max": np.max,
+    "std": np.std,
+}
+
+ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.Call,
+    ast.Subscript,
+    ast.Slice,
+    ast.Tuple,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.USub,
+    ast.UAdd,
+)
+
+
+class DerivedSignalError(Exception):
+    pass
+
+
+class DerivedSignal:
+    def __init__(self, name: str, expression: str) -> None:
+        """
+        Signal that is computed from other signals of the same scan point.
+
+        Args:
+            name (str): Name of the derived signal
+            expression (str): Arithmetic expression using signal names, numbers and the
+                functions listed in ALLOWED_FUNCTIONS, e.g. "bpm4i / bpm3a" or "sum(roi[10:20])"
+        """
+        self.name = name
+        self.expression = expression
+        tree = self._parse(expression)
+        self.inputs = sorted(
+            {
+                node.id
+                for node in ast.walk(tree)
+                if isinstance(node, ast.Name) and node.id not in ALLOWED_FUNCTIONS
+            }
+        )
+        self._code = compile(tree, f"<derived signal {name}>", "eval")
+
+    @staticmethod
+    def _parse(expression: str) -> ast.Expression:
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except SyntaxError as exc:
+            raise DerivedSignalError(f"Invalid expression {expression}: {exc}") from exc
+        for node in ast.walk(tree):
+            if not isinstance(node, ALLOWED_NODES):
+                raise DerivedSignalError(
+                    f"Unsupported operation {node.__class__.__name__} in expression {expression}."
+                )
+            if isinstance(node, ast.Call) and (
+                not isinstance(node.func, ast.Name) or node.func.id not in ALLOWED_FUNCTIONS
+            ):
+                raise DerivedSignalError(f"Unsupported function call in expression {expression}.")
+        return tree
+
+    def evaluate(self, values: dict):
+        """
+        Evaluate the expression.
+
+        Args:
+            values (dict): Signal values by signal name
+
+        Returns:
+            result of the expression
+        """
+        namespace = {name: np.asarray(values[name]) for name in self.inputs}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = eval(self._code, {"__builtins__": {}, **ALLOWED_FUNCTIONS}, namespace)
+        result = np.asarray(result)
+        return result.item() if result.ndim == 0 else result
+
+
+class DerivedSignalPipeline:
+    def __init__(self, config: dict, reserved_names: set = None) -> None:
+        """
+        Compute derived signals for the points of a scan.
+
+        Args:
+            config (dict): Expressions by name of the derived signal
+            reserved_names (set, optional): Names that cannot be used for derived signals,
+                e.g. the device names. Derived signals with a reserved name are rejected.
+        """
+        self.signals = []
+        self.frame_reader = FrameReader()
+        reserved_names = reserved_names or set()
+        for name, expression in config.items():
+            if name in reserved_names:
+                logger.error(
+                    f"Failed to compile derived signal {name}: the name is already used by a"
+                    " device."
+                )
+                continue
+            try:
+                self.signals.append(DerivedSignal(name, expression))
+            except DerivedSignalError as exc:
+                logger.error(f"Failed to compile derived signal {name}: {exc}")
+
+    def update(self, point: dict) -> None:
+        """
+        Add the derived signals to a scan point. Signals whose inputs are not
+        part of the point are skipped. Inputs that have been published through shared frame
+        buffers are read from the buffers.
+
+        Args:
+            point (dict): Point data as device -> signal -> {value, timestamp}
+        """
+        values = {}
+        timestamps = {}
+        for signals in list(point.values()):
+            for signal_name, signal in signals.items():
+                values[signal_name] = signal.get("value")
+                timestamps[signal_name] = signal.get("timestamp", 0)
+        for derived in list(self.signals):
+            if any(name not in values for name in derived.inputs):
+                continue
+            try:
+                for name in derived.inputs:
+                    if is_frame_descriptor(values[name]):
+                        values[name] = self.frame_reader.read(values[name])
+            except FrameUnavailableError as exc:
+                logger.error(f"Failed to read the inputs of derived signal {derived.name}: {exc}")
+                continue
+            try:
+                value = derived.evaluate(values)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error(
+                    f"Failed to evaluate derived signal {derived.name} ({derived.expression}):"
+                    f" {exc}. The signal is disabled for this scan."
+                )
+                self.signals.remove(derived)
+                continue
+            timestamp = max((timestamps[name] for name in derived.inputs), default=0)
+            point[derived.name] = {derived.name: {"value": value, "timestamp": timestamp}}
+            values[derived.name] = value
+            timestamps[derived.name] = timestamp
@@ -37,6 +37,11 @@ class EmitterBase:
             time.sleep(0.1)
             return
 
+        self._send_messages(msgs_to_send)
+
+    def _send_messages(self, msgs_to_send: list) -> None:
+        """Send a batch of buffered messages. Subclasses may override this method
+        to change the payload while keeping the flush policy of _publish_data."""
         pipe = self.producer.pipeline()
         msgs = BECMessage.BundleMessage()
         _, endpoint, _ = msgs_to_send[0]
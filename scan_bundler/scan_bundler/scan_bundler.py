@@ -2,7 +2,6 @@ import collections
 import threading
 import time
 import traceback
-from concurrent.futures import ThreadPoolExecutor
 from typing import Callable
 
 from bec_lib.core import BECMessage, BECService, BECStatus
@@ -12,14 +11,19 @@ from bec_lib.core.connector import ConnectorBase
 
 from .bec_emitter import BECEmitter
 from .bluesky_emitter import BlueskyEmitter
+from .derived_signals import DerivedSignalPipeline
+from .scheduler import ScanTaskScheduler
 
 logger = bec_logger.logger
 
+DEFAULT_SCAN_PRIORITY = {"monitor_scan": -1, "time_scan": -1}
+
 
 class ScanBundler(BECService):
     def __init__(self, config, connector_cls: ConnectorBase) -> None:
         super().__init__(config, connector_cls, unique_service=True)
 
+        self.scan_bundler_config = self._service_config.service_config.get("scan_bundler", {})
         self.device_manager = None
         self._start_device_manager()
         self._start_device_read_consumer()
@@ -32,12 +36,16 @@ class ScanBundler(BECService):
         self.device_storage = {}
         self.scan_motors = {}
         self.readout_priority = {}
+        self.fly_scans = {}
+        self.derived_signals = {}
         self.storage_initialized = set()
         self.current_queue = None
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.scheduler = ScanTaskScheduler(
+            num_workers=self.scan_bundler_config.get("num_workers", 4)
+        )
         self.executor_tasks = collections.deque(maxlen=100)
         self.scanID_history = collections.deque(maxlen=10)
-        self._lock = threading.Lock()
+        self._scan_locks = {}
         self._emitter = []
         self._initialize_emitters()
         self.status = BECStatus.RUNNING
@@ -94,7 +102,8 @@ class ScanBundler(BECService):
         logger.debug(f"Received reading from device {dev}")
         if not isinstance(msgs, list):
             msgs = [msgs]
-        task = parent.executor.submit(parent._add_device_to_storage, msgs, dev)
+        scanID = msgs[0].metadata.get("scanID") if msgs else None
+        task = parent.scheduler.submit(scanID, parent._add_device_to_storage, msgs, dev)
         parent.executor_tasks.append(task)
 
     @staticmethod
@@ -132,12 +141,30 @@ class ScanBundler(BECService):
             return
         if self.sync_storage.get(scanID):
             self.sync_storage[scanID]["status"] = status
+            scan_type = self.sync_storage[scanID].get("info", {}).get("scan_type")
+            if status in ["closed", "aborted", "halted"] and scan_type == "fly":
+                # flush after the readings that are still queued for this scan
+                self.scheduler.submit(scanID, self._finish_fly_scan, scanID)
         else:
             self.sync_storage[scanID] = {"info": {}, "status": status, "sent": set()}
             self.storage_initialized.add(scanID)
             if scanID not in self.scanID_history:
                 self.scanID_history.append(scanID)
 
+    def _get_scan_lock(self, scanID: str) -> threading.Lock:
+        return self._scan_locks.setdefault(scanID, threading.Lock())
+
+    def _get_scan_priority(self, scan_info: dict) -> int:
+        """get the scheduling priority of a scan based on its scan name or queue"""
+        scan_priority = {
+            **DEFAULT_SCAN_PRIORITY,
+            **self.scan_bundler_config.get("scan_priority", {}),
+        }
+        for key in [scan_info.get("scan_name"), scan_info.get("queue", "primary")]:
+            if key in scan_priority:
+                return scan_priority[key]
+        return 0
+
     def _initialize_scan_container(self, scan_msg: BECMessage.ScanStatusMessage):
         if scan_msg.content.get("status") != "open":
             return
@@ -147,6 +174,15 @@ class ScanBundler(BECService):
         scan_motors = list(set(self.device_manager.devices[m] for m in scan_info["scan_motors"]))
         self.scan_motors[scanID] = scan_motors
         self.readout_priority[scanID] = scan_info["readout_priority"]
+        self.scheduler.set_priority(scanID, self._get_scan_priority(scan_info))
+        derived_signals = {
+            **self.scan_bundler_config.get("derived_signals", {}),
+            **scan_info.get("derived_signals", {}),
+        }
+        if derived_signals:
+            self.derived_signals[scanID] = DerivedSignalPipeline(
+                derived_signals, reserved_names=set(self.device_manager.devices)
+            )
         if not scanID in self.storage_initialized:
             self.sync_storage[scanID] = {"info": scan_info, "status": "open", "sent": set()}
             self.monitored_devices[scanID] = {
@@ -173,7 +209,7 @@ class ScanBundler(BECService):
     def _step_scan_update(self, scanID, device, signal, metadata):
         if "pointID" not in metadata:
             return
-        with self._lock:
+        with self._get_scan_lock(scanID):
             dev = {device: signal}
             pointID = metadata["pointID"]
             monitored_devices = self.monitored_devices[scanID]
@@ -203,10 +239,21 @@ class ScanBundler(BECService):
                 self._update_monitor_signals(scanID, pointID)
                 self._send_scan_point(scanID, pointID)
 
+    def _get_fly_scan_config(self, scanID) -> dict:
+        """get the fly scan assembly config; scan-specific entries take precedence"""
+        return {
+            **self.scan_bundler_config.get("fly_scan", {}),
+            **self.sync_storage[scanID].get("info", {}).get("fly_scan", {}),
+        }
+
     def _fly_scan_update(self, scanID, device, signal, metadata):
         if "pointID" not in metadata:
             return
-        with self._lock:
+        fly_scan_config = self._get_fly_scan_config(scanID)
+        if fly_scan_config.get("reorder_window") or fly_scan_config.get("expected_devices"):
+            self._fly_scan_assembly_update(scanID, device, signal, metadata["pointID"])
+            return
+        with self._get_scan_lock(scanID):
             pointID = metadata["pointID"]
 
             self.sync_storage[scanID][pointID] = {
@@ -218,8 +265,123 @@ class ScanBundler(BECService):
                 self._update_monitor_signals(scanID, pointID)
                 self._send_scan_point(scanID, pointID)
 
+    def _get_fly_scan_state(self, scanID) -> dict:
+        if scanID not in self.fly_scans:
+            fly_scan_config = self._get_fly_scan_config(scanID)
+            self.fly_scans[scanID] = {
+                "devices": set(fly_scan_config.get("expected_devices", [])),
+                "reorder_window": fly_scan_config.get("reorder_window", 100),
+                "pending": {},
+                "max_pointID": -1,
+                "watermark": -1,
+                "emitted": set(),
+                "late_readings": 0,
+                "duplicate_readings": 0,
+                "incomplete_points": 0,
+            }
+        return self.fly_scans[scanID]
+
+    def get_fly_scan_statistics(self, scanID) -> dict:
+        """
+        Get the assembly statistics of a fly scan.
+
+        Args:
+            scanID (str): Scan ID
+
+        Returns:
+            dict: watermark, number of pending and incomplete points and number of late
+                and duplicate readings or an empty dict if the scan is not assembled
+        """
+        state = self.fly_scans.get(scanID)
+        if state is None:
+            return {}
+        return {
+            "watermark": state["watermark"],
+            "pending_points": len(state["pending"]),
+            "incomplete_points": state["incomplete_points"],
+            "late_readings": state["late_readings"],
+            "duplicate_readings": state["duplicate_readings"],
+        }
+
+    def _fly_scan_assembly_update(self, scanID, device, signal, pointID):
+        """
+        Assemble fly scan points from multiple devices that may report out of order.
+
+        A point is emitted as soon as all expected devices have reported it. Points
+        that fall more than reorder_window points behind the most recent pointID are
+        emitted with the data available at that time. Readings for points that have
+        already been emitted are counted as late and dropped. The current statistics
+        are kept in the "fly_scan_statistics" entry of the scan's sync_storage.
+        """
+        with self._get_scan_lock(scanID):
+            state = self._get_fly_scan_state(scanID)
+            state["devices"].add(device)
+
+            if pointID <= state["watermark"] or pointID in state["emitted"]:
+                state["late_readings"] += 1
+                logger.warning(
+                    f"Received late reading from {device} for pointID {pointID} of scanID"
+                    f" {scanID}. Total number of late readings: {state['late_readings']}."
+                )
+                self._update_fly_scan_statistics(scanID)
+                return
+
+            reported_devices = state["pending"].setdefault(pointID, set())
+            if device in reported_devices:
+                state["duplicate_readings"] += 1
+                logger.debug(f"Received duplicate reading from {device} for pointID {pointID}.")
+            reported_devices.add(device)
+            state["max_pointID"] = max(state["max_pointID"], pointID)
+
+            self.sync_storage[scanID][pointID] = {
+                **self.sync_storage[scanID].get(pointID, {}),
+                **signal,
+            }
+            self._flush_fly_scan_points(scanID)
+            self._update_fly_scan_statistics(scanID)
+
+    def _finish_fly_scan(self, scanID):
+        with self._get_scan_lock(scanID):
+            if scanID in self.fly_scans:
+                self._flush_fly_scan_points(scanID, force=True)
+                self._update_fly_scan_statistics(scanID)
+
+    def _update_fly_scan_statistics(self, scanID):
+        self.sync_storage[scanID]["fly_scan_statistics"] = self.get_fly_scan_statistics(scanID)
+
+    def _flush_fly_scan_points(self, scanID, force=False):
+        """Emit all pending fly scan points that are complete or outside the reorder window."""
+        state = self.fly_scans[scanID]
+        for pointID in sorted(state["pending"]):
+            complete = state["pending"][pointID] >= state["devices"]
+            expired = state["max_pointID"] - pointID >= state["reorder_window"]
+            if not (complete or expired or force):
+                continue
+            if not complete:
+                state["incomplete_points"] += 1
+            state["pending"].pop(pointID)
+            state["emitted"].add(pointID)
+            self._update_monitor_signals(scanID, pointID)
+            self._send_scan_point(scanID, pointID)
+
+        # readings for points below the watermark are considered late
+        if force:
+            watermark = state["max_pointID"]
+        else:
+            watermark = state["max_pointID"] - state["reorder_window"]
+        if watermark > state["watermark"]:
+            state["watermark"] = watermark
+            state["emitted"] = {pid for pid in state["emitted"] if pid > watermark}
+
+        if force and (state["late_readings"] or state["incomplete_points"]):
+            logger.warning(
+                f"Fly scan {scanID}: {state['incomplete_points']} incomplete points,"
+                f" {state['late_readings']} late readings,"
+                f" {state['duplicate_readings']} duplicate readings."
+            )
+
     def _baseline_update(self, scanID, device, signal):
-        with self._lock:
+        with self._get_scan_lock(scanID):
             dev = {device: signal}
             baseline_devices_status = self.baseline_devices[scanID]["done"]
             baseline_devices_status[device] = True
@@ -348,12 +510,20 @@ class ScanBundler(BECService):
                     getattr(self, storage).pop(scanID)
                 except KeyError:
                     logger.warning(f"Failed to remove {scanID} from {storage}.")
+            self.fly_scans.pop(scanID, None)
+            self.derived_signals.pop(scanID, None)
+            self._scan_locks.pop(scanID, None)
+            scan_statistics = self.scheduler.remove_scan(scanID)
+            if scan_statistics:
+                logger.info(f"Bundling statistics for scanID {scanID}: {scan_statistics}")
             # self.bluesky_emitter.cleanup_storage(scanID)
             self.run_emitter("on_cleanup", scanID)
             self.storage_initialized.remove(scanID)
 
     def _send_scan_point(self, scanID, pointID) -> None:
         logger.info(f"Sending point {pointID} for scanID {scanID}.")
+        if scanID in self.derived_signals:
+            self.derived_signals[scanID].update(self.sync_storage[scanID][pointID])
         logger.debug(f"{pointID}, {self.sync_storage[scanID][pointID]}")
 
         self.run_emitter("on_scan_point_emit", scanID, pointID)
@@ -365,3 +535,4 @@ class ScanBundler(BECService):
 
     def shutdown(self):
         self.device_manager.shutdown()
+        self.scheduler.shutdown()
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import collections
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+from bec_lib.core import bec_logger
+
+logger = bec_logger.logger
+
+
+class _ScanTasks:
+    def __init__(self, priority: int = 0) -> None:
+        self.priority = priority
+        self.tasks = collections.deque()
+        self.running = False
+        self.removed = False
+        self.heap_seq = None
+        self.num_tasks = 0
+        self.cpu_time = 0.0
+        self.busy_time = 0.0
+        self.queue_time = 0.0
+        self.max_queue_time = 0.0
+
+
+class ScanTaskScheduler:
+    """
+    Scheduler for the bundling tasks of concurrent scans.
+
+    Tasks of the same scan are executed one at a time and in the order of submission,
+    while tasks of different scans run in parallel on a fixed number of worker threads.
+    Whenever a worker becomes available, it picks the next task of the scan with the
+    highest priority. Scans with the same priority are served in a round-robin fashion.
+    CPU time, execution time and queueing latency are accounted per scan.
+    """
+
+    def __init__(self, num_workers: int = 4) -> None:
+        self._lock = threading.Lock()
+        self._tasks_available = threading.Condition(self._lock)
+        self._scans = {}
+        self._ready = []
+        self._seq = itertools.count()
+        self._shutdown = False
+        self._workers = [
+            threading.Thread(target=self._run, daemon=True, name=f"scan_task_worker_{ii}")
+            for ii in range(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def set_priority(self, scanID: str, priority: int) -> None:
+        """
+        Set the priority of a scan. Tasks of scans with a higher priority are executed first.
+
+        Args:
+            scanID (str): Scan ID
+            priority (int): Priority of the scan
+        """
+        with self._lock:
+            scan = self._scans.setdefault(scanID, _ScanTasks())
+            scan.priority = priority
+            if scan.heap_seq is not None:
+                self._schedule(scanID, scan)
+
+    def submit(self, scanID: str, func: Callable, *args, **kwargs) -> Future:
+        """
+        Submit a task for the given scan.
+
+        Args:
+            scanID (str): Scan ID
+            func (Callable): Function to execute
+
+        Returns:
+            Future: Future of the task
+        """
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit new tasks after shutdown.")
+            scan = self._scans.setdefault(scanID, _ScanTasks())
+            scan.tasks.append((future, func, args, kwargs, time.time()))
+            if not scan.running and scan.heap_seq is None:
+                self._schedule(scanID, scan)
+        return future
+
+    def get_statistics(self, scanID: str) -> dict:
+        """
+        Get the accounting information of a scan.
+
+        Args:
+            scanID (str): Scan ID
+
+        Returns:
+            dict: number of tasks, CPU time, execution time and queueing latency in seconds
+        """
+        with self._lock:
+            scan = self._scans.get(scanID)
+            if scan is None:
+                return {}
+            return self._get_statistics(scan)
+
+    def remove_scan(self, scanID: str) -> dict:
+        """
+        Remove the accounting information of a scan.
+        Scans with pending or running tasks are marked for removal and dropped
+        once their last task has finished.
+
+        Args:
+            scanID (str): Scan ID
+
+        Returns:
+            dict: final statistics of the scan or an empty dict if the scan is still active
+        """
+        with self._lock:
+            scan = self._scans.get(scanID)
+            if scan is None:
+                return {}
+            if scan.running or scan.tasks:
+                scan.removed = True
+                return {}
+            self._scans.pop(scanID)
+            return self._get_statistics(scan)
+
+    def shutdown(self) -> None:
+        """Stop all workers. Pending tasks are not executed."""
+        with self._lock:
+            self._shutdown = True
+            self._tasks_available.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+    @staticmethod
+    def _get_statistics(scan: _ScanTasks) -> dict:
+        return {
+            "priority": scan.priority,
+            "num_tasks": scan.num_tasks,
+            "pending_tasks": len(scan.tasks),
+            "cpu_time": scan.cpu_time,
+            "busy_time": scan.busy_time,
+            "mean_queue_time": scan.queue_time / scan.num_tasks if scan.num_tasks else 0.0,
+            "max_queue_time": scan.max_queue_time,
+        }
+
+    def _schedule(self, scanID: str, scan: _ScanTasks) -> None:
+        # stale heap entries of a rescheduled scan are skipped by comparing heap_seq
+        scan.heap_seq = next(self._seq)
+        heapq.heappush(self._ready, (-scan.priority, scan.heap_seq, scanID))
+        self._tasks_available.notify()
+
+    def _next_task(self):
+        with self._lock:
+            while True:
+                if self._shutdown:
+                    return None
+                while self._ready:
+                    _, seq, scanID = heapq.heappop(self._ready)
+                    scan = self._scans.get(scanID)
+                    if scan is None or scan.heap_seq != seq:
+                        continue
+                    scan.heap_seq = None
+                    scan.running = True
+                    return scanID, scan, scan.tasks.popleft()
+                self._tasks_available.wait()
+
+    def _run(self) -> None:
+        while True:
+            task = self._next_task()
+            if task is None:
+                return
+            scanID, scan, (future, func, args, kwargs, submit_time) = task
+            start_time = time.time()
+            start_cpu = time.thread_time()
+            result, exception = None, None
+            run = future.set_running_or_notify_cancel()
+            if run:
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as exc:  # pylint: disable=broad-except
+                    logger.error(f"Failed to run task for scanID {scanID}: {exc}")
+                    exception = exc
+            with self._lock:
+                queue_time = start_time - submit_time
+                scan.num_tasks += 1
+                scan.cpu_time += time.thread_time() - start_cpu
+                scan.busy_time += time.time() - start_time
+                scan.queue_time += queue_time
+                scan.max_queue_time = max(scan.max_queue_time, queue_time)
+                scan.running = False
+                if scan.tasks:
+                    self._schedule(scanID, scan)
+                elif scan.removed and self._scans.get(scanID) is scan:
+                    self._scans.pop(scanID)
+                    logger.info(
+                        f"Bundling statistics for scanID {scanID}: {self._get_statistics(scan)}"
+                    )
+            # complete the future only after the accounting has been updated
+            if run and exception is not None:
+                future.set_exception(exception)
+            elif run:
+                future.set_result(result)
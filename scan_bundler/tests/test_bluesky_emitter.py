@@ -1,8 +1,10 @@
 from unittest import mock
 
 import msgpack
+import numpy as np
 import pytest
 from bec_lib.core import BECMessage, MessageEndpoints
+from bec_lib.core.frame_buffer import FrameRingBuffer
 from test_scan_bundler import load_ScanBundlerMock
 
 from scan_bundler.bluesky_emitter import BlueskyEmitter
@@ -81,3 +83,78 @@ def test_bls_on_init():
     with mock.patch.object(bls_emitter, "send_run_start_document") as start:
         bls_emitter.on_init(scanID)
         start.assert_called_once_with(scanID)
+
+
+def test_send_bluesky_scan_point_waits_for_descriptor():
+    sb = load_ScanBundlerMock()
+    bls_emitter = BlueskyEmitter(sb)
+    scanID = "lkajsdl"
+    bls_emitter.bluesky_metadata[scanID] = {}
+    with mock.patch.object(bls_emitter, "_add_event") as add_event:
+        bls_emitter.send_bluesky_scan_point(scanID, 0)
+        bls_emitter.send_bluesky_scan_point(scanID, 1)
+        add_event.assert_not_called()
+        assert bls_emitter.pending_points[scanID] == [0, 1]
+        with mock.patch.object(
+            bls_emitter, "_get_descriptor_document", return_value={"uid": "descr"}
+        ):
+            bls_emitter.send_descriptor_document(scanID)
+        add_event.assert_has_calls([mock.call(scanID, 0), mock.call(scanID, 1)])
+        assert scanID not in bls_emitter.pending_points
+        bls_emitter.send_bluesky_scan_point(scanID, 2)
+        add_event.assert_called_with(scanID, 2)
+
+
+def test_bls_send_messages_event_page():
+    sb = load_ScanBundlerMock()
+    bls_emitter = BlueskyEmitter(sb)
+    events = [
+        {
+            "descriptor": "descr",
+            "time": 10 + ii,
+            "seq_num": ii,
+            "uid": f"uid{ii}",
+            "filled": {},
+            "data": {"samx": ii},
+            "timestamps": {"samx": 20 + ii},
+        }
+        for ii in [1, 0]
+    ]
+    with mock.patch.object(bls_emitter.producer, "send") as send:
+        bls_emitter._send_messages(events)
+        page = {
+            "descriptor": "descr",
+            "time": [10, 11],
+            "seq_num": [0, 1],
+            "uid": ["uid0", "uid1"],
+            "filled": {},
+            "data": {"samx": [0, 1]},
+            "timestamps": {"samx": [20, 21]},
+        }
+        send.assert_called_once_with(
+            MessageEndpoints.bluesky_events(),
+            msgpack.dumps(("event_page", page)),
+            pipe=mock.ANY,
+        )
+
+
+def test_bls_event_data_reads_shared_frames(tmp_path):
+    sb = load_ScanBundlerMock()
+    bls_emitter = BlueskyEmitter(sb)
+    scanID = "lkajsdl"
+    frame_buffer = FrameRingBuffer("eiger.image", directory=str(tmp_path), num_slots=1)
+    lost = frame_buffer.write(np.zeros((2, 2)))
+    frame = frame_buffer.write(np.ones((2, 2)))
+    bls_emitter.bluesky_metadata[scanID] = {"descriptor": {"uid": "descriptor_uid"}}
+    sb.sync_storage[scanID] = {
+        0: {
+            "eiger": {
+                "eiger_image": {"value": frame, "timestamp": 1},
+                "eiger_lost": {"value": lost, "timestamp": 1},
+            }
+        }
+    }
+    event = bls_emitter._prepare_bluesky_event_data(scanID, 0)
+    frame_buffer.close()
+    assert np.array_equal(event["data"]["eiger_image"], np.ones((2, 2)))
+    assert event["data"]["eiger_lost"] is None
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from bec_lib.core.frame_buffer import FrameRingBuffer
+
+from scan_bundler.derived_signals import DerivedSignal, DerivedSignalError, DerivedSignalPipeline
+
+# pylint: disable=missing-function-docstring
+
+
+@pytest.mark.parametrize(
+    "expression,inputs",
+    [
+        ("bpm4i / bpm3a", ["bpm3a", "bpm4i"]),
+        ("sum(eiger[2:4]) - 2 * samx", ["eiger", "samx"]),
+        ("-abs(samx)", ["samx"]),
+    ],
+)
+def test_derived_signal_inputs(expression, inputs):
+    assert DerivedSignal("out", expression).inputs == inputs
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "__import__('os')",
+        "samx.real",
+        "open('file')",
+        "[samx]",
+        "lambda: 1",
+        "samx +",
+        "9**9**9**9",
+    ],
+)
+def test_derived_signal_rejects_unsupported_expressions(expression):
+    with pytest.raises(DerivedSignalError):
+        DerivedSignal("out", expression)
+
+
+def test_derived_signal_pipeline_update():
+    pipeline = DerivedSignalPipeline(
+        {
+            "norm": "bpm4i / bpm3a",
+            "roi": "sum(eiger[1:3])",
+            "diff": "samx - samy",
+            "invalid": "samx.real",
+        }
+    )
+    point = {
+        "bpm4i": {"bpm4i": {"value": 4.0, "timestamp": 2}},
+        "bpm3a": {"bpm3a": {"value": 2.0, "timestamp": 3}},
+        "eiger": {"eiger": {"value": np.arange(5), "timestamp": 1}},
+    }
+    pipeline.update(point)
+    assert point["norm"] == {"norm": {"value": 2.0, "timestamp": 3}}
+    assert point["roi"] == {"roi": {"value": 3, "timestamp": 1}}
+    assert "diff" not in point
+    assert [signal.name for signal in pipeline.signals] == ["norm", "roi", "diff"]
+
+
+def test_derived_signal_pipeline_disables_failing_signals():
+    pipeline = DerivedSignalPipeline({"roi": "sum(eiger[1:3]) + samx"})
+    point = {
+        "eiger": {"eiger": {"value": np.arange(5), "timestamp": 1}},
+        "samx": {"samx": {"value": "text", "timestamp": 1}},
+    }
+    pipeline.update(point)
+    assert "roi" not in point
+    assert not pipeline.signals
+
+
+def test_derived_signal_pipeline_rejects_reserved_names():
+    pipeline = DerivedSignalPipeline(
+        {"samx": "bpm4i / bpm3a", "norm": "bpm4i / bpm3a"}, reserved_names={"samx", "bpm4i"}
+    )
+    assert [signal.name for signal in pipeline.signals] == ["norm"]
+    point = {
+        "samx": {"samx": {"value": 1.0, "timestamp": 1}},
+        "bpm4i": {"bpm4i": {"value": 4.0, "timestamp": 2}},
+        "bpm3a": {"bpm3a": {"value": 2.0, "timestamp": 3}},
+    }
+    pipeline.update(point)
+    assert point["samx"] == {"samx": {"value": 1.0, "timestamp": 1}}
+    assert point["norm"] == {"norm": {"value": 2.0, "timestamp": 3}}
+
+
+def test_derived_signal_pipeline_reads_shared_frames(tmp_path):
+    frame_buffer = FrameRingBuffer("eiger.image", directory=str(tmp_path), num_slots=1)
+    pipeline = DerivedSignalPipeline({"roi": "sum(eiger[1:3])"})
+    point = {"eiger": {"eiger": {"value": frame_buffer.write(np.arange(5)), "timestamp": 1}}}
+    pipeline.update(point)
+    assert point["roi"] == {"roi": {"value": 3, "timestamp": 1}}
+    assert isinstance(point["eiger"]["eiger"]["value"], dict)
+
+    lost = frame_buffer.write(np.arange(5))
+    frame_buffer.write(np.arange(5))
+    point = {"eiger": {"eiger": {"value": lost, "timestamp": 1}}}
+    pipeline.update(point)
+    frame_buffer.close()
+    assert "roi" not in point
+    assert pipeline.signals
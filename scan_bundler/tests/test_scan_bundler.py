@@ -1,4 +1,5 @@
 import os
+import threading
 import time
 from concurrent.futures import wait
 from unittest import mock
@@ -12,6 +13,7 @@ from bec_lib.core import MessageEndpoints, ServiceConfig
 from bec_lib.core.tests.utils import ConnectorMock, create_session_from_config
 
 from scan_bundler import ScanBundler
+from scan_bundler.derived_signals import DerivedSignalPipeline
 from scan_bundler.emitter import EmitterBase
 
 # pylint: disable=missing-function-docstring
@@ -64,6 +66,7 @@ def test_device_read_callback():
 
     with mock.patch.object(scan_bundler, "_add_device_to_storage") as add_dev:
         scan_bundler._device_read_callback(msg, scan_bundler)
+        scan_bundler.executor_tasks[-1].result(timeout=5)
         add_dev.assert_called_once_with([dev_msg], "samx")
 
 
@@ -632,6 +635,21 @@ def test_send_scan_point(scanID, pointID, sent):
                 logger.debug.assert_called_once()
 
 
+def test_send_scan_point_adds_derived_signals():
+    sb = load_ScanBundlerMock()
+    scanID = "alskjd"
+    sb.sync_storage[scanID] = {"sent": set()}
+    sb.sync_storage[scanID][1] = {
+        "bpm4i": {"bpm4i": {"value": 4.0, "timestamp": 2}},
+        "bpm3a": {"bpm3a": {"value": 2.0, "timestamp": 3}},
+    }
+    sb.derived_signals[scanID] = DerivedSignalPipeline({"norm": "bpm4i / bpm3a"})
+    with mock.patch.object(sb, "run_emitter") as emitter:
+        sb._send_scan_point(scanID, 1)
+        emitter.assert_called_once_with("on_scan_point_emit", scanID, 1)
+    assert sb.sync_storage[scanID][1]["norm"] == {"norm": {"value": 2.0, "timestamp": 3}}
+
+
 def test_run_emitter():
     sb = load_ScanBundlerMock()
     with mock.patch("scan_bundler.scan_bundler.logger") as logger:
@@ -663,6 +681,93 @@ def test_fly_scan_update(scanID, device, signal, metadata):
                 send_point.assert_called_once_with(scanID, pointID)
 
 
+def test_fly_scan_assembly_waits_for_expected_devices():
+    sb = load_ScanBundlerMock()
+    scanID = "scanID-lkjd"
+    sb.scan_bundler_config = {"fly_scan": {"reorder_window": 10, "expected_devices": ["a", "b"]}}
+    sb.sync_storage[scanID] = {}
+    with mock.patch.object(sb, "_update_monitor_signals"):
+        with mock.patch.object(sb, "_send_scan_point") as send_point:
+            sb._fly_scan_update(scanID, "a", {"a": 1}, {"pointID": 0})
+            sb._fly_scan_update(scanID, "a", {"a": 2}, {"pointID": 1})
+            send_point.assert_not_called()
+            sb._fly_scan_update(scanID, "b", {"b": 2}, {"pointID": 1})
+            send_point.assert_called_once_with(scanID, 1)
+            sb._fly_scan_update(scanID, "b", {"b": 1}, {"pointID": 0})
+            send_point.assert_called_with(scanID, 0)
+    assert sb.sync_storage[scanID][0] == {"a": 1, "b": 1}
+    assert not sb.fly_scans[scanID]["pending"]
+
+
+def test_fly_scan_assembly_reorder_window_and_late_readings():
+    sb = load_ScanBundlerMock()
+    scanID = "scanID-lkjd"
+    sb.scan_bundler_config = {"fly_scan": {"reorder_window": 2, "expected_devices": ["a", "b"]}}
+    sb.sync_storage[scanID] = {}
+    with mock.patch.object(sb, "_update_monitor_signals"):
+        with mock.patch.object(sb, "_send_scan_point") as send_point:
+            for pointID in range(3):
+                sb._fly_scan_update(scanID, "a", {"a": pointID}, {"pointID": pointID})
+            send_point.assert_called_once_with(scanID, 0)
+            state = sb.fly_scans[scanID]
+            assert state["incomplete_points"] == 1
+            sb._fly_scan_update(scanID, "b", {"b": 0}, {"pointID": 0})
+            assert state["late_readings"] == 1
+            assert sb.sync_storage[scanID][0] == {"a": 0}
+
+            assert sb.sync_storage[scanID]["fly_scan_statistics"] == {
+                "watermark": 0,
+                "pending_points": 2,
+                "incomplete_points": 1,
+                "late_readings": 1,
+                "duplicate_readings": 0,
+            }
+
+            sb.sync_storage[scanID].update({"status": "open", "info": {"scan_type": "fly"}})
+            sb._scan_status_modification(
+                BECMessage.ScanStatusMessage(scanID=scanID, status="closed", info={})
+            )
+            # tasks of a scan run in order; wait for the flush
+            sb.scheduler.submit(scanID, lambda: None).result(timeout=5)
+            assert send_point.call_count == 3
+            assert not state["pending"]
+            assert sb.get_fly_scan_statistics(scanID)["incomplete_points"] == 3
+
+
+def test_fly_scan_flush_runs_after_queued_readings():
+    sb = load_ScanBundlerMock()
+    scanID = "scanID-lkjd"
+    sb.scan_bundler_config = {"fly_scan": {"reorder_window": 10, "expected_devices": ["a", "b"]}}
+    sb.sync_storage[scanID] = {"info": {"scan_type": "fly"}, "status": "open"}
+    release = threading.Event()
+    with mock.patch.object(sb, "_update_monitor_signals"):
+        with mock.patch.object(sb, "_send_scan_point") as send_point:
+            sb.scheduler.submit(scanID, release.wait)
+            sb.scheduler.submit(scanID, sb._fly_scan_update, scanID, "a", {"a": 0}, {"pointID": 0})
+            sb._scan_status_modification(
+                BECMessage.ScanStatusMessage(scanID=scanID, status="closed", info={})
+            )
+            send_point.assert_not_called()
+            release.set()
+            sb.scheduler.submit(scanID, lambda: None).result(timeout=5)
+            send_point.assert_called_once_with(scanID, 0)
+    assert sb.get_fly_scan_statistics(scanID)["late_readings"] == 0
+
+
+def test_fly_scan_assembly_uses_scan_config():
+    sb = load_ScanBundlerMock()
+    scanID = "scanID-lkjd"
+    sb.scan_bundler_config = {"fly_scan": {"reorder_window": 10}}
+    sb.sync_storage[scanID] = {"info": {"fly_scan": {"expected_devices": ["a", "b"]}}}
+    with mock.patch.object(sb, "_update_monitor_signals"):
+        with mock.patch.object(sb, "_send_scan_point") as send_point:
+            sb._fly_scan_update(scanID, "a", {"a": 1}, {"pointID": 0})
+            send_point.assert_not_called()
+            sb._fly_scan_update(scanID, "b", {"b": 1}, {"pointID": 0})
+            send_point.assert_called_once_with(scanID, 0)
+    assert sb.fly_scans[scanID]["reorder_window"] == 10
+
+
 @pytest.mark.parametrize("scanID,device,signal", [("scanID-lkjd", "bpm4r", {"value": 5})])
 def test_baseline_update(scanID, device, signal):
     sb = load_ScanBundlerMock()
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+from scan_bundler.scheduler import ScanTaskScheduler
+
+# pylint: disable=missing-function-docstring
+
+
+def test_scheduler_runs_tasks_of_a_scan_in_order():
+    scheduler = ScanTaskScheduler(num_workers=4)
+    out = []
+    futures = [scheduler.submit("scanID", out.append, ii) for ii in range(50)]
+    for future in futures:
+        future.result(timeout=5)
+    assert out == list(range(50))
+    stats = scheduler.get_statistics("scanID")
+    assert stats["num_tasks"] == 50
+    assert stats["pending_tasks"] == 0
+    scheduler.shutdown()
+
+
+def test_scheduler_prefers_high_priority_scans():
+    scheduler = ScanTaskScheduler(num_workers=1)
+    blocker = threading.Event()
+    out = []
+    scheduler.submit("blocker", blocker.wait, 5)
+    scheduler.set_priority("primary", 1)
+    scheduler.set_priority("monitor", -1)
+    futures = [scheduler.submit("monitor", out.append, "monitor") for _ in range(3)]
+    futures.extend(scheduler.submit("primary", out.append, "primary") for _ in range(3))
+    blocker.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert out == ["primary"] * 3 + ["monitor"] * 3
+    scheduler.shutdown()
+
+
+def test_scheduler_runs_scans_in_parallel():
+    scheduler = ScanTaskScheduler(num_workers=2)
+    start = time.time()
+    futures = [scheduler.submit(scanID, time.sleep, 0.2) for scanID in ["scan1", "scan2"]]
+    for future in futures:
+        future.result(timeout=5)
+    assert time.time() - start < 0.35
+    scheduler.shutdown()
+
+
+def test_scheduler_propagates_exceptions_and_removes_scans():
+    scheduler = ScanTaskScheduler(num_workers=1)
+
+    def _raise():
+        raise ValueError("failed")
+
+    future = scheduler.submit("scanID", _raise)
+    with pytest.raises(ValueError):
+        future.result(timeout=5)
+    stats = scheduler.remove_scan("scanID")
+    assert stats["num_tasks"] == 1
+    assert scheduler.get_statistics("scanID") == {}
+    scheduler.shutdown()
+
+
+def test_scheduler_removes_active_scans_after_their_last_task():
+    scheduler = ScanTaskScheduler(num_workers=1)
+    blocker = threading.Event()
+    scheduler.submit("scanID", blocker.wait, 5)
+    future = scheduler.submit("scanID", lambda: None)
+    assert scheduler.remove_scan("scanID") == {}
+    assert scheduler.get_statistics("scanID")["pending_tasks"] >= 1
+    blocker.set()
+    future.result(timeout=5)
+    assert scheduler.get_statistics("scanID") == {}
+    scheduler.shutdown()